@@ -1,12 +1,18 @@
 # agents/billing_agents.py
 from crewai import Agent, Task, Crew, Process
 from langchain_community.utilities import SQLDatabase
-from langchain_openai import ChatOpenAI
 from crewai.tools import BaseTool
+from langchain_core.messages import HumanMessage, SystemMessage
 from pydantic import BaseModel, Field
 from typing import Type
 from config.config import Config
+from utils.database import aget_bill_breakdown, get_bill_breakdown
+from utils.registry import checkout, get_llm, get_sql_database
+from utils.tracing import span
+from orchestration.streaming import emit_progress
+import asyncio
 import os
+import re
 
 os.environ["OPENAI_API_KEY"] = Config.OPENAI_API_KEY
 
@@ -21,6 +27,7 @@ class BillingDatabaseTool(BaseTool):
     description: str = """
     Use this to query the telecom database. 
     Useful tables: 
+    - 'customer_summary' (one row per customer: plan, limits, latest-period usage, data_percent_used, open_tickets)
     - 'customer_usage' (contains data_used_gb, minutes_used, sms_used)
     - 'service_plans' (contains monthly_cost, data_limit_gb, etc.)
     - 'customers' (contains current_plan_id)
@@ -35,27 +42,118 @@ class BillingDatabaseTool(BaseTool):
 
     def _run(self, query: str) -> str:
         """Execute the query against the database"""
-        try:
-            return self.db_conn.run(query)
-        except Exception as e:
-            return f"Error executing SQL: {e}"
+        with span("tool", self.name, input=query[:500]) as attrs:
+            try:
+                result = self.db_conn.run(query)
+            except Exception as e:
+                attrs["error"] = str(e)
+                return f"Error executing SQL: {e}"
+            attrs["output_chars"] = len(result)
+            return result
 
 def get_billing_tools():
     """Create the custom SQL tool for the agents to use"""
-    db = SQLDatabase.from_uri(f"sqlite:///{Config.DB_PATH}")
-    return [BillingDatabaseTool(db_conn=db)]
+    return [BillingDatabaseTool(db_conn=get_sql_database())]
 
-# --- 2. Process Function ---
+# --- 2. Deterministic Fast Path ---
 
-def process_billing_query(query: str, customer_id: str = "CUST_001") -> str:
+# Questions the precomputed breakdown answers on its own
+COMMON_BILLING_PATTERN = re.compile(
+    r"\b(bill|billed|charge[sd]?|amount|total|owe|cost|price|breakdown|usage|used|"
+    r"overage|over (my )?limit|data|minutes|sms|plan)\b"
+)
+
+# Questions that need the analyst crew to explore the database
+OPEN_ENDED_PATTERN = re.compile(
+    r"\b(dispute|refund|compare|comparison|history|trend|last \d+ months|every month|"
+    r"predict|forecast|next month|all (my )?bills|other customers?|why .* (different|change))\b"
+)
+
+
+def needs_billing_crew(query: str) -> bool:
+    """True when the question is open-ended enough to warrant the CrewAI analysts."""
+    text = query.lower()
+    return bool(OPEN_ENDED_PATTERN.search(text)) or not COMMON_BILLING_PATTERN.search(text)
+
+
+ALLOWANCE_LABELS = {"data": "Data", "voice": "Voice", "sms": "SMS"}
+
+
+def format_bill_breakdown(breakdown: dict) -> str:
+    """Render the precomputed breakdown as plain facts for the explanation step."""
+    lines = [
+        f"Customer: {breakdown['customer_name']} ({breakdown['customer_id']})",
+        f"Plan: {breakdown['plan_name']} ({breakdown['plan_id']})",
+        f"Base monthly cost: {breakdown['base_cost']}",
+    ]
+    if breakdown["billing_period_end"]:
+        lines.append(f"Billing period: {breakdown['billing_period_start']} to {breakdown['billing_period_end']}")
+        for name, a in breakdown["allowances"].items():
+            label = ALLOWANCE_LABELS[name]
+            if a["unlimited"]:
+                lines.append(f"{label} usage: {a['used']} {a['unit']} (unlimited)")
+            else:
+                line = f"{label} usage: {a['used']} of {a['limit']} {a['unit']} ({a['percent_used']}%)"
+                if a["over_by"]:
+                    line += f", over the limit by {round(a['over_by'], 2)} {a['unit']}"
+                lines.append(line)
+        lines.append(f"Additional charges: {breakdown['additional_charges']}")
+        lines.append(f"Estimated total (base + additional): {breakdown['estimated_total']}")
+        lines.append(f"Billed total: {breakdown['billed_total']}")
+    else:
+        lines.append("No usage has been recorded for this customer yet.")
+    return "\n".join(lines)
+
+
+def _explain_bill_messages(query: str, facts: str):
+    return [
+        SystemMessage(content="""
+        You are a Customer Service Manager who helps customers understand their charges.
+        Answer the customer's question using ONLY the bill breakdown provided.
+        Explain simply (e.g., "Your base plan is X, and you used extra data").
+        If usage was high or over a limit, mention that. Do not invent charges.
+        """),
+        HumanMessage(content=f"Bill breakdown:\n{facts}\n\nCustomer question: {query}")
+    ]
+
+def explain_bill(query: str, breakdown: dict) -> str:
+    """One LLM call to phrase the precomputed breakdown for the customer."""
+    facts = format_bill_breakdown(breakdown)
+    try:
+        llm = get_llm(Config.LLM_MODEL, temperature=0)
+        return llm.invoke(_explain_bill_messages(query, facts)).content
+    except Exception as e:
+        # The numbers are already correct; return them unphrased rather than failing
+        print(f"Error explaining bill: {e}")
+        return f"Here is your current bill breakdown:\n{facts}"
+
+async def aexplain_bill(query: str, breakdown: dict) -> str:
+    """Async twin of explain_bill."""
+    facts = format_bill_breakdown(breakdown)
+    try:
+        llm = get_llm(Config.LLM_MODEL, temperature=0)
+        return (await llm.ainvoke(_explain_bill_messages(query, facts))).content
+    except Exception as e:
+        print(f"Error explaining bill: {e}")
+        return f"Here is your current bill breakdown:\n{facts}"
+
+
+# --- 3. Reusable Agents ---
+
+def get_billing_agents():
     """
-    Orchestrates a CrewAI team to analyze billing issues.
+    Checks out an (analyst, advisor) pair for one crew run. The pair is built
+    once and reused by later requests from any thread or session; the
+    customer-specific details travel in the per-request Tasks.
+
+        with get_billing_agents() as (billing_specialist, service_advisor): ...
     """
-    print(f"   [CrewAI] Spawning Billing Agents for: '{query}'...")
-    
+    return checkout("billing_agents", _build_billing_agents)
+
+def _build_billing_agents():
     # Setup Tools & LLM
     billing_tools = get_billing_tools()
-    llm = ChatOpenAI(model=Config.LLM_MODEL, temperature=0)
+    llm = get_llm(Config.LLM_MODEL, temperature=0)
     
     # Define Agents with Smarter Backstories
     billing_specialist = Agent(
@@ -81,6 +179,43 @@ def process_billing_query(query: str, customer_id: str = "CUST_001") -> str:
         verbose=True
     )
 
+    return billing_specialist, service_advisor
+
+# --- 4. Process Function ---
+
+def process_billing_query(query: str, customer_id: str = "CUST_001") -> str:
+    """
+    Answers common billing questions from a precomputed breakdown with a
+    single LLM call; only open-ended questions spawn the CrewAI team.
+    """
+    emit_progress("Querying billing DB")
+    breakdown = get_bill_breakdown(customer_id)
+    if breakdown and not needs_billing_crew(query):
+        print(f"   [Billing] Fast path for {customer_id}: '{query}'...")
+        return explain_bill(query, breakdown)
+    return run_billing_crew(query, customer_id)
+
+async def aprocess_billing_query(query: str, customer_id: str = "CUST_001") -> str:
+    """
+    Async twin of process_billing_query. The fast path awaits the DB and the
+    LLM; the crew is blocking, so it runs in a worker thread.
+    """
+    emit_progress("Querying billing DB")
+    breakdown = await aget_bill_breakdown(customer_id)
+    if breakdown and not needs_billing_crew(query):
+        print(f"   [Billing] Fast path for {customer_id}: '{query}'...")
+        return await aexplain_bill(query, breakdown)
+    return await asyncio.to_thread(run_billing_crew, query, customer_id)
+
+def run_billing_crew(query: str, customer_id: str) -> str:
+    """The CrewAI analyst + advisor team, for open-ended billing questions."""
+    print(f"   [CrewAI] Spawning Billing Agents for: '{query}'...")
+    emit_progress("Billing team is analysing your account")
+
+    with get_billing_agents() as (billing_specialist, service_advisor):
+        return _kickoff_billing_crew(query, customer_id, billing_specialist, service_advisor)
+
+def _kickoff_billing_crew(query: str, customer_id: str, billing_specialist, service_advisor) -> str:
     # Define Tasks
     # Task 1: Smarter Analysis
     analysis_task = Task(
@@ -1,25 +1,97 @@
 # agents/knowledge_agents.py
-from utils.document_loader import get_knowledge_index
+import asyncio
+import time
+from llama_index.core.schema import QueryBundle
+from config.config import Config
+from utils.document_loader import get_query_engine
+from utils.retrieval import record_retrieval
+from orchestration.streaming import emit_progress, emit_token
 
-def process_knowledge_query(query: str) -> str:
+def search_documents(query: str, similarity_top_k: int = 5, mode: str = None, on_token=None):
+    """
+    Retrieve (timed and logged per query) then synthesize an answer, passing
+    each synthesized token to on_token as it arrives.
+    Returns (answer or None if the knowledge base is unavailable, retrieval report).
+    """
+    mode = mode or Config.RETRIEVAL_MODE
+    query_engine = get_query_engine(similarity_top_k=similarity_top_k, mode=mode)
+    if not query_engine:
+        return None, None
+
+    bundle = QueryBundle(query)
+    started = time.perf_counter()
+    nodes = query_engine.retrieve(bundle)
+    report = record_retrieval(query, mode, nodes, started)
+
+    response = query_engine.synthesize(bundle, nodes)
+    response_gen = getattr(response, "response_gen", None)
+    if response_gen is None:
+        # e.g. "Empty Response" when nothing was retrieved
+        return str(response), report
+
+    parts = []
+    for token in response_gen:
+        parts.append(token)
+        if on_token:
+            on_token(token)
+    return "".join(parts), report
+
+async def asearch_documents(query: str, similarity_top_k: int = 5, mode: str = None, on_token=None):
+    """Async twin of search_documents (aretrieve + asynthesize)."""
+    mode = mode or Config.RETRIEVAL_MODE
+    # Building or loading the index the first time blocks (disk, embeddings): keep it off the loop
+    query_engine = await asyncio.to_thread(get_query_engine, similarity_top_k=similarity_top_k, mode=mode)
+    if not query_engine:
+        return None, None
+
+    bundle = QueryBundle(query)
+    started = time.perf_counter()
+    nodes = await query_engine.aretrieve(bundle)
+    report = record_retrieval(query, mode, nodes, started)
+
+    response = await query_engine.asynthesize(bundle, nodes)
+    if not hasattr(response, "async_response_gen"):
+        return str(response), report
+
+    parts = []
+    async for token in response.async_response_gen():
+        parts.append(token)
+        if on_token:
+            on_token(token)
+    return "".join(parts), report
+
+def _knowledge_answer(response) -> str:
+    if response is None:
+        return "Knowledge base unavailable."
+
+    # Check if response is empty
+    if response.strip() == "Empty Response":
+        return "I couldn't find that specific information in my documents."
+
+    return response
+
+def process_knowledge_query(query: str, mode: str = None) -> str:
     try:
-        # Load index
-        index = get_knowledge_index()
-        if not index:
-            return "Knowledge base unavailable."
-        
-        # INCREASED TOP_K TO 5
-        query_engine = index.as_query_engine(similarity_top_k=5)
-        
         print(f"   [LlamaIndex] Searching documents for: '{query}'...")
-        response = query_engine.query(query)
-        
-        # Check if response is empty
-        if str(response).strip() == "Empty Response":
-            return "I couldn't find that specific information in my documents."
-            
-        return str(response)
+        emit_progress("Searching the knowledge base")
+        # Cached index + engine (INCREASED TOP_K TO 5)
+        response, _report = search_documents(query, similarity_top_k=5, mode=mode,
+                                             on_token=lambda token: emit_token("knowledge", token))
+        return _knowledge_answer(response)
         
     except Exception as e:
         print(f"Error: {e}")
-        return "Error searching documentation."
\ No newline at end of file
+        return "Error searching documentation."
+
+async def aprocess_knowledge_query(query: str, mode: str = None) -> str:
+    """Async twin of process_knowledge_query."""
+    try:
+        print(f"   [LlamaIndex] Searching documents for: '{query}'...")
+        emit_progress("Searching the knowledge base")
+        response, _report = await asearch_documents(query, similarity_top_k=5, mode=mode,
+                                                    on_token=lambda token: emit_token("knowledge", token))
+        return _knowledge_answer(response)
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return "Error searching documentation."
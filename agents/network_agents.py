@@ -1,10 +1,16 @@
 # agents/network_agents.py
 import autogen
 from config.config import Config
-from utils.database import get_db_connection
-from utils.document_loader import get_knowledge_index
-import pandas as pd
+from utils.database import get_active_incidents, get_known_locations
+from utils.geo_index import describe_location
+from agents.knowledge_agents import search_documents
+from utils.registry import checkout, get_llm_http_clients
+from utils.tracing import span
+from orchestration.streaming import emit_progress
+from typing import Optional
+import asyncio
 import os
+import re
 
 os.environ["OPENAI_API_KEY"] = Config.OPENAI_API_KEY
 
@@ -15,38 +21,85 @@ def check_network_status(region: str) -> str:
     Checks the 'network_incidents' table in SQL for any reported outages 
     in a specific region (e.g., 'Mumbai', 'Delhi').
     """
+    emit_progress(f"Checking outages in {region}")
     try:
-        conn = get_db_connection()
-        # Sanitize input to prevent basic SQL injection issues in this demo
-        clean_region = region.replace("'", "").strip()
-        query = f"SELECT * FROM network_incidents WHERE location LIKE '%{clean_region}%' AND status = 'Active'"
-        df = pd.read_sql(query, conn)
-        conn.close()
+        clean_region = region.strip()
+        with span("tool", "check_network_status", region=clean_region) as attrs:
+            incidents = get_active_incidents(clean_region)
+            attrs["incidents"] = len(incidents)
         
-        if df.empty:
+        if not incidents:
             return f"No active network incidents reported in {clean_region}. The tower status is normal."
         else:
-            return f"ALERT: Found active incidents in {clean_region}: \n{df.to_string()}"
+            lines = [
+                f"- {i.incident_id} | {i.incident_type} | {i.location} | severity {i.severity} | "
+                f"affects {i.affected_services} | since {i.start_time} | {i.description}"
+                for i in incidents
+            ]
+            return f"ALERT: Found active incidents in {clean_region}: \n" + "\n".join(lines)
     except Exception as e:
         return f"Error checking network status: {e}"
 
-def search_troubleshooting_guide(issue: str) -> str:
+def check_local_network(location: str) -> str:
+    """
+    Tower status, active incidents and coverage for a place name, postal code
+    or 'latitude, longitude', from the in-memory geo index (no SQL round trip).
+    """
+    emit_progress(f"Checking towers and coverage near {location}")
+    try:
+        with span("tool", "check_local_network", location=location.strip()):
+            return describe_location(location)
+    except Exception as e:
+        return f"Error checking local network: {e}"
+
+def search_troubleshooting_guide(issue: str, mode: Optional[str] = None) -> str:
     """
     Searches the technical support manuals for troubleshooting steps.
+    mode: 'vector', 'bm25' (exact terms like APN, VoLTE, error codes) or 'hybrid';
+    defaults to Config.RETRIEVAL_MODE at call time.
     """
+    mode = mode or Config.RETRIEVAL_MODE
+    emit_progress("Searching troubleshooting guides")
     try:
-        index = get_knowledge_index()
-        query_engine = index.as_query_engine()
-        response = query_engine.query(f"Troubleshooting steps for: {issue}")
-        return str(response)
+        with span("tool", "search_troubleshooting_guide", issue=issue[:200]):
+            response, _report = search_documents(f"Troubleshooting steps for: {issue}", similarity_top_k=2, mode=mode)
+        return response if response is not None else "Manual unavailable."
     except Exception as e:
         return "Manual unavailable."
 
 # --- 2. Configure Agents ---
 
-def process_network_query(query: str) -> str:
-    print(f"   [AutoGen] Starting Group Chat for: '{query}'...")
+NETWORK_MODES = ("pipeline", "groupchat")
+
+def get_network_agents(mode: str = "groupchat"):
+    """
+    AutoGen agents keep chat history on the instance, so a team (per mode) is
+    checked out for one conversation and reset before it; teams are built once
+    and reused by later requests from any thread or session.
+
+        with get_network_agents(mode) as (user_proxy, groupchat, manager): ...
+    """
+    if mode not in NETWORK_MODES:
+        raise ValueError(f"Unknown network mode '{mode}', expected one of {NETWORK_MODES}")
+    return checkout(("network_agents", mode), lambda: _build_network_agents(mode))
+
+def _fixed_speaker_order(last_speaker, groupchat):
+    """
+    Pipeline speaker order, decided without an LLM call: Network_Engineer, then
+    Support_Specialist, then stop. Tool calls go to User_Proxy to execute and
+    the result goes back to the agent that asked for it.
+    """
+    user_proxy, engineer, support = groupchat.agents
+    messages = groupchat.messages
+    if messages[-1].get("tool_calls"):
+        return user_proxy
+    if last_speaker is user_proxy:
+        return engineer if len(messages) == 1 else groupchat.agent_by_name(messages[-2]["name"])
+    if last_speaker is engineer:
+        return support
+    return None  # the Support Specialist has answered: ends the chat
 
+def _build_network_agents(mode: str = "groupchat"):
     # Configuration for GPT-4o
     config_list = [
         {
@@ -54,6 +107,11 @@ def process_network_query(query: str) -> str:
             "api_key": Config.OPENAI_API_KEY
         }
     ]
+
+    # Route the group chat's completions through the shared LLM call cache
+    http_client, _ = get_llm_http_clients()
+    if http_client is not None:
+        config_list[0]["http_client"] = http_client
     
     llm_config = {
         "config_list": config_list,
@@ -76,6 +134,8 @@ def process_network_query(query: str) -> str:
         system_message="""
         You are a Level 2 Network Engineer.
         Your job is to FIRST check if there is a known outage in the user's region using 'check_network_status'.
+        To see the towers and coverage where the customer is (a place, a postal code or 'lat, lon'),
+        use 'check_local_network'.
         If there is an outage, inform the team.
         If there is NO outage, ask the Support Specialist to provide device troubleshooting steps.
         """
@@ -102,16 +162,33 @@ def process_network_query(query: str) -> str:
         description="Check for network outages in a region"
     )
 
+    autogen.register_function(
+        check_local_network,
+        caller=engineer,
+        executor=user_proxy,
+        name="check_local_network",
+        description="Tower status, incidents and coverage at a place, postal code or 'lat, lon'"
+    )
+
     autogen.register_function(
         search_troubleshooting_guide,
         caller=support,
         executor=user_proxy,
         name="search_troubleshooting_guide",
-        description="Search manual for troubleshooting steps"
+        description="Search manual for troubleshooting steps (mode: 'vector', 'bm25' or 'hybrid')"
     )
 
-    # --- 3. Start the Group Chat ---
-    
+    if mode == "pipeline":
+        # Opening message, then a tool call, its result and a reply from each agent
+        groupchat = autogen.GroupChat(
+            agents=[user_proxy, engineer, support],
+            messages=[],
+            max_round=7,
+            speaker_selection_method=_fixed_speaker_order,
+        )
+        manager = autogen.GroupChatManager(groupchat=groupchat, llm_config=False)
+        return user_proxy, groupchat, manager
+
     groupchat = autogen.GroupChat(
         agents=[user_proxy, engineer, support], 
         messages=[], 
@@ -120,16 +197,92 @@ def process_network_query(query: str) -> str:
     
     manager = autogen.GroupChatManager(groupchat=groupchat, llm_config=llm_config)
 
-    # Start the conversation
-    user_proxy.initiate_chat(
-        manager, 
-        message=f"Customer Issue: {query}. \nFirst check for outages, then if needed provide troubleshooting steps. Return 'TERMINATE' when you have a final answer."
+    return user_proxy, groupchat, manager
+
+def extract_region(query: str) -> Optional[str]:
+    """The place the customer names: a known location if any, else a capitalised word after 'in'/'at'/'near'."""
+    text = query.lower()
+    try:
+        for name in get_known_locations():
+            if re.search(rf"\b{re.escape(name.lower())}\b", text):
+                return name
+    except Exception as e:
+        print(f"   [AutoGen] Known locations unavailable: {e}")
+    match = re.search(r"\b(?:in|at|near|around)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", query)
+    return match.group(1) if match else None
+
+def format_outage_answer(region: str, incidents) -> str:
+    lines = [
+        f"- {i.location}: {i.incident_type} ({i.severity} severity) affecting {i.affected_services}, "
+        f"reported {i.start_time}. {i.description}"
+        for i in incidents
+    ]
+    return (
+        f"There is a known network incident in {region} that explains the problem:\n" + "\n".join(lines) +
+        "\nOur engineers are already working on it, so there is nothing you need to change on your device. "
+        "Service should return to normal once the incident is resolved."
     )
 
+def process_network_query(query: str, mode: Optional[str] = None) -> str:
+    mode = mode or Config.NETWORK_MODE
+    if mode != "pipeline":
+        return _run_network_chat(query, "groupchat",
+                                 f"Customer Issue: {query}. \nFirst check for outages, then if needed provide troubleshooting steps. Return 'TERMINATE' when you have a final answer.")
+
+    # 1. Deterministic pre-check: a known outage answers the question without any agent
+    region = extract_region(query)
+    if region:
+        emit_progress(f"Checking outages in {region}")
+        with span("tool", "outage_precheck", region=region) as attrs:
+            incidents = get_active_incidents(region)
+            attrs["incidents"] = len(incidents)
+        if incidents:
+            print(f"   [AutoGen] Active incident in {region}: answered without the agents")
+            return format_outage_answer(region, incidents)
+        finding = f"Outage check: no active network incidents in {region}."
+        try:
+            finding += f"\nLocal network:\n{describe_location(region)}"
+        except Exception as e:
+            print(f"   [AutoGen] Geo index unavailable: {e}")
+    else:
+        finding = "Outage check: the customer did not name a location."
+
+    # 2. No outage: engineer, then support, in a fixed order
+    return _run_network_chat(query, "pipeline",
+                             f"Customer Issue: {query}. \n{finding}\n"
+                             "Network_Engineer: assess the issue given this check (only run check_network_status if "
+                             "a location is still unknown). Support_Specialist: then provide troubleshooting steps.")
+
+def _run_network_chat(query: str, mode: str, message: str) -> str:
+    print(f"   [AutoGen] Starting Group Chat ({mode}) for: '{query}'...")
+
+    with get_network_agents(mode) as (user_proxy, groupchat, manager):
+        return _run_group_chat(user_proxy, groupchat, manager, message)
+
+def _run_group_chat(user_proxy, groupchat, manager, message: str) -> str:
+    # Clear the previous conversation before reusing the team
+    groupchat.reset()
+    manager.reset()
+    for agent in groupchat.agents:
+        agent.reset()
+
+    # --- 3. Start the Group Chat ---
+
+    # Start the conversation
+    emit_progress("Network team is diagnosing the issue")
+    user_proxy.initiate_chat(manager, message=message)
+
     # Extract the final helpful response from history
     for message in reversed(groupchat.messages):
         content = message["content"]
         if content and "TERMINATE" not in content and message["name"] != "User_Proxy":
             return content
 
-    return "I couldn't generate a complete network diagnosis."
\ No newline at end of file
+    return "I couldn't generate a complete network diagnosis."
+
+async def aprocess_network_query(query: str, mode: Optional[str] = None) -> str:
+    """
+    The AutoGen team is blocking, so the async path runs the whole
+    conversation in a worker thread.
+    """
+    return await asyncio.to_thread(process_network_query, query, mode)
\ No newline at end of file
@@ -1,58 +1,128 @@
 # agents/service_agents.py
-from langchain_openai import ChatOpenAI
-from langchain_community.utilities import SQLDatabase
 from langchain_community.agent_toolkits import create_sql_agent
 from config.config import Config
+from utils.database import get_customer_summary
+from utils.registry import get_llm, get_shared, get_sql_database
+from utils.schema_cards import schema_context
+from utils.tracing import tracing_callbacks
+from orchestration.streaming import emit_progress
 import os
 
 # Ensure API key is set
 os.environ["OPENAI_API_KEY"] = Config.OPENAI_API_KEY
 
-def process_service_query(query: str, customer_id: str) -> str:
-    """
-    Uses a LangChain SQL Agent to query the telecom.db database.
-    """
-    try:
-        # 1. Connect to the Database
-        db = SQLDatabase.from_uri(f"sqlite:///{Config.DB_PATH}")
-        
-        # 2. Create the LLM
-        llm = ChatOpenAI(
-            model=Config.LLM_MODEL,
-            temperature=0
-        )
-        
-        # 3. Create the SQL Agent
-        agent_executor = create_sql_agent(
-            llm=llm,
-            db=db,
+# With schema cards the agent is told where the schema is, instead of the stock
+# "I should look at the tables in the database" opening that costs two extra turns
+SCHEMA_CARD_PREFIX = """You are an agent designed to interact with a {dialect} database.
+Given an input question, create a syntactically correct {dialect} query to run, then look at the results of the query and return the answer.
+Unless the user specifies a specific number of examples they wish to obtain, always limit your query to at most {top_k} results.
+Never query for all the columns from a specific table, only ask for the relevant columns given the question.
+The tables relevant to the question are described with it, one line per table: columns, primary and foreign keys, and typical values in [brackets].
+Write your query from those descriptions. Only list the tables or fetch a schema if a table you need is not described.
+If you get an error while executing a query, rewrite the query and try again.
+
+DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the database.
+"""
+SCHEMA_CARD_SUFFIX = "The relevant tables are described with the question, so I can write the query directly."
+
+def get_service_agent():
+    """The SQL agent is stateless between calls, so one executor serves every request."""
+    schema_cards = Config.SQL_SCHEMA_CARDS
+
+    def build():
+        prompt_kwargs = {"prefix": SCHEMA_CARD_PREFIX, "suffix": SCHEMA_CARD_SUFFIX} if schema_cards else {}
+        return create_sql_agent(
+            llm=get_llm(Config.LLM_MODEL, temperature=0),
+            db=get_sql_database(),
             agent_type="openai-tools",
-            verbose=True
+            verbose=True,
+            **prompt_kwargs
         )
-        
-        # 4. Define the Contextual Prompt
-        # We explicitly tell the AI who the user is and how to find their plan.
-        system_prefix = f"""
+    return get_shared(("service_sql_agent", schema_cards), build)
+
+def _account_facts(customer_id: str) -> str:
+    """The customer's plan and current usage from the materialised summary (one indexed read)."""
+    try:
+        summary = get_customer_summary(customer_id)
+    except Exception as e:
+        print(f"   [LangChain] Customer summary unavailable: {e}")
+        return ""
+    if summary is None:
+        return ""
+
+    def allowance(used, limit, unit):
+        return f"{used} of {limit} {unit}" if limit is not None else f"{used} {unit} (unlimited)"
+
+    return (
+        f"Account: plan '{summary.plan_name}' ({summary.plan_id}), monthly cost {summary.monthly_cost}; "
+        f"latest period {summary.billing_period_start} to {summary.billing_period_end}: "
+        f"data {allowance(summary.data_used, summary.data_limit_gb, 'GB')}, "
+        f"voice {allowance(summary.voice_used, summary.voice_minutes, 'minutes')}, "
+        f"SMS {allowance(summary.sms_used, summary.sms_count, 'SMS')}; "
+        f"open support tickets: {summary.open_tickets}."
+    )
+
+def _service_prompt(query: str, customer_id: str) -> str:
+    # We explicitly tell the AI who the user is and hand it their account summary up front,
+    # so "my plan" questions rarely need a query at all.
+    system_prefix = f"""
         You are a helpful telecom assistant.
         The user you are speaking with has customer_id: '{customer_id}'.
+        {_account_facts(customer_id)}
         
         Rules:
-        1. If the user asks about "my plan", "current plan", or "account details":
-           - First query the 'customers' table using customer_id='{customer_id}' to find their 'service_plan_id'.
-           - Then query the 'service_plans' table with that id to retrieve the plan name, cost, and features.
+        1. If the user asks about "my plan", "current plan", "my usage" or "account details":
+           - Answer from the account facts above when they cover the question.
+           - Otherwise query the 'customer_summary' table (one row per customer: plan, limits,
+             latest-period usage, open tickets) with customer_id='{customer_id}', and
+             'service_plans' for plan features.
         
         2. If the user asks for generic recommendations (e.g., "best plan for families"), just query the 'service_plans' table directly.
         
         3. Always mention the Plan Name and Monthly Cost in your answer.
         """
+    if Config.SQL_SCHEMA_CARDS:
+        system_prefix += f"\n{_schema_context(query)}\n"
+    return f"{system_prefix} User Query: {query}"
+
+def _schema_context(query: str) -> str:
+    """Cards for the tables this question needs (cached until the schema changes)."""
+    try:
+        return schema_context(query)
+    except Exception as e:
+        print(f"   [LangChain] Schema cards unavailable: {e}")
+        return ""
+
+def process_service_query(query: str, customer_id: str) -> str:
+    """
+    Uses a LangChain SQL Agent to query the telecom.db database.
+    """
+    try:
+        # 1. Reuse the process-wide SQL Agent (DB handle and LLM included)
+        agent_executor = get_service_agent()
         
         print(f"   [LangChain] Querying DB for user {customer_id}: '{query}'...")
+        emit_progress("Querying plan database")
         
-        # Run the agent with the injected prompt
-        response = agent_executor.invoke(f"{system_prefix} User Query: {query}")
+        # 2. Run the agent with the injected prompt
+        response = agent_executor.invoke(_service_prompt(query, customer_id),
+                                         config={"callbacks": tracing_callbacks()})
         
         return response["output"]
 
+    except Exception as e:
+        print(f"Error in Service Agent: {e}")
+        return "I apologize, but I'm having trouble accessing the plan database right now."
+
+async def aprocess_service_query(query: str, customer_id: str) -> str:
+    """Async twin of process_service_query (the executor is stateless, so it is shared)."""
+    try:
+        agent_executor = get_service_agent()
+        print(f"   [LangChain] Querying DB for user {customer_id}: '{query}'...")
+        emit_progress("Querying plan database")
+        response = await agent_executor.ainvoke(_service_prompt(query, customer_id),
+                                                config={"callbacks": tracing_callbacks()})
+        return response["output"]
     except Exception as e:
         print(f"Error in Service Agent: {e}")
         return "I apologize, but I'm having trouble accessing the plan database right now."
\ No newline at end of file
@@ -0,0 +1,145 @@
+# api/server.py
+"""
+Headless async HTTP/JSON service over the same graph as the Streamlit app.
+
+    python -m api.server --port 8080 --max-concurrency 32
+
+POST /query   {"query": "...", "customer_id": "CUST001", "memory": {...}}
+           -> {"response": "...", "classification": "...", "cache_hit": false, "latency_ms": 812.4,
+               "request_id": "...",   # the id of this request's spans in the trace file
+               "memory": {...}}       # send back with the next question of the conversation
+
+"memory" is the bounded conversation snapshot (orchestration/memory.py); the
+first question sends none. Clients that send the whole "chat_history"
+instead have it folded into a snapshot first.
+GET  /health  -> {"status": "ok", "in_flight": 3, "served": 120, "max_concurrency": 32}
+
+Requests run through graph.ainvoke, so while one conversation waits on the
+LLM the event loop serves the others. At most max_concurrency graphs run at
+once; further requests queue. To run without the real API, point
+OPENAI_BASE_URL at any OpenAI-compatible stand-in server.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from config.config import Config
+from orchestration.memory import ConversationMemory
+from utils.tracing import new_request_id
+
+
+class QueryService:
+    """Runs graph.ainvoke per request under a concurrency limit."""
+
+    def __init__(self, graph, max_concurrency: int):
+        self.graph = graph
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.served = 0
+        self._limiter = asyncio.Semaphore(max_concurrency)
+
+    @staticmethod
+    def _conversation(customer_id: str, chat_history: list, memory: dict = None) -> ConversationMemory:
+        if memory:
+            return ConversationMemory.from_snapshot(memory)
+        if chat_history:
+            return ConversationMemory.from_history(chat_history)
+        return ConversationMemory.for_customer(customer_id)
+
+    async def answer(self, query: str, customer_id: str, chat_history: list, memory: dict = None) -> dict:
+        # Memory reads the customer's plan and entity vocabulary from the pooled (blocking) SQLite
+        # and may summarise with the LLM, so it is built and updated in worker threads
+        conversation = await asyncio.to_thread(self._conversation, customer_id, chat_history, memory)
+        initial_state = {
+            "query": query,
+            "customer_info": {"id": customer_id},
+            "classification": "",
+            "intermediate_responses": {},
+            "final_response": "",
+            "chat_history": [],
+            "memory": conversation.snapshot(),
+            "request_id": new_request_id(),
+        }
+        async with self._limiter:
+            self.in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await self.graph.ainvoke(initial_state)
+            finally:
+                self.in_flight -= 1
+                self.served += 1
+        await asyncio.to_thread(conversation.add_turn, query, result["final_response"])
+        return {
+            "response": result["final_response"],
+            "classification": result.get("classification"),
+            "cache_hit": bool(result.get("cache_hit")),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "request_id": initial_state["request_id"],
+            "memory": conversation.snapshot(),
+        }
+
+    # --- Handlers ---
+
+    async def handle_query(self, request: web.Request) -> web.Response:
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "Body must be JSON"}, status=400)
+
+        query = body.get("query") if isinstance(body, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            return web.json_response({"error": "'query' must be a non-empty string"}, status=400)
+
+        try:
+            result = await self.answer(query, body.get("customer_id", "CUST_001"), body.get("chat_history", []),
+                                       body.get("memory"))
+        except Exception as e:
+            print(f"   [API] Error answering '{query}': {e}")
+            return web.json_response({"error": "Internal error"}, status=500)
+        return web.json_response(result)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "status": "ok",
+            "in_flight": self.in_flight,
+            "served": self.served,
+            "max_concurrency": self.max_concurrency,
+        })
+
+
+def create_app(graph=None, max_concurrency: int = None) -> web.Application:
+    """aiohttp application serving `graph` (the compiled telecom graph by default)."""
+    if graph is None:
+        from orchestration.graph import create_graph
+        graph = create_graph()
+    max_concurrency = max_concurrency or Config.API_MAX_CONCURRENCY
+    service = QueryService(graph, max_concurrency)
+
+    async def size_thread_pool(app):
+        # Blocking agents (CrewAI, AutoGen) run in worker threads: one per concurrent graph
+        asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_concurrency))
+
+    app = web.Application()
+    app.on_startup.append(size_thread_pool)
+    app.router.add_post("/query", service.handle_query)
+    app.router.add_get("/health", service.handle_health)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Telecom assistant HTTP/JSON service")
+    parser.add_argument("--host", default=Config.API_HOST)
+    parser.add_argument("--port", type=int, default=Config.API_PORT)
+    parser.add_argument("--max-concurrency", type=int, default=Config.API_MAX_CONCURRENCY)
+    args = parser.parse_args()
+
+    print(f"🚀 Serving the Telecom Assistant on http://{args.host}:{args.port} "
+          f"(max {args.max_concurrency} concurrent conversations)")
+    web.run_app(create_app(max_concurrency=args.max_concurrency), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# benchmarks/agent_setup.py
+"""
+Per-request setup cost of the specialist agents, before and after the
+process-wide registry.
+
+"rebuild" clears the registry before every request, which reproduces the
+old behaviour of constructing ChatOpenAI, SQLDatabase.from_uri, the SQL
+agent, the CrewAI agents and the AutoGen team on each call. "registry"
+reuses what the first request built. Every request runs on a new thread,
+as Streamlit runs every rerun. No LLM calls are made.
+
+    python -m benchmarks.agent_setup
+"""
+import statistics
+import threading
+import time
+
+from agents.billing_agents import get_billing_agents
+from agents.network_agents import get_network_agents
+from agents.service_agents import get_service_agent
+from config.config import Config
+from utils.registry import clear_registry, get_llm
+
+
+def setup_request():
+    """Everything a billing, network, service and general request needs before its first LLM call."""
+    get_service_agent()
+    with get_billing_agents(), get_network_agents():
+        get_llm(Config.LLM_MODEL, temperature=0.7)
+
+
+def on_new_thread(fn):
+    thread = threading.Thread(target=fn)
+    thread.start()
+    thread.join()
+
+
+def time_setup(requests: int, rebuild: bool) -> list:
+    timings = []
+    clear_registry()
+    for _ in range(requests):
+        if rebuild:
+            clear_registry()
+        start = time.perf_counter()
+        on_new_thread(setup_request)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(requests: int = 20):
+    print("=== PER-REQUEST AGENT SETUP (ms) ===\n")
+    print(f"{'mode':<10}{'mean':>10}{'median':>10}{'max':>10}")
+    for name, rebuild in [("rebuild", True), ("registry", False)]:
+        timings = time_setup(requests, rebuild)
+        # The registry's first request pays the one-off build; report steady state
+        steady = timings if rebuild else timings[1:]
+        print(f"{name:<10}{statistics.mean(steady):>10.2f}{statistics.median(steady):>10.2f}{max(steady):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
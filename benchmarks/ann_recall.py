@@ -0,0 +1,122 @@
+# benchmarks/ann_recall.py
+"""
+Recall vs latency of the IVF index (utils/ann_index.py) against exact search
+in the NumPy vector store, to choose IVF_NLIST and IVF_NPROBE.
+
+The corpus is synthetic: --topics topic directions, every chunk its topic
+plus Gaussian noise (--spread: 1.0 puts chunks of one topic at a cosine of
+about 0.5 to each other, as related passages of different manuals are), and
+queries drawn the same way. Ground truth is the exact top-k of the same store.
+
+    nlist / nprobe   IVF cells / cells searched per query
+    recall@k         share of the exact top-k the IVF top-k found
+    scanned          rows scored per query, as a share of the corpus
+    insert           incremental insert of 1,000 new chunks into the built index
+
+    python -m benchmarks.ann_recall
+    python -m benchmarks.ann_recall --chunks 250000 --dim 1536 --nlist 0,1000 --nprobe 4,8,16,32
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from benchmarks.e2e_latency import percentile
+from utils.vector_store import SIMPLE_STORE_NAME, NumpyVectorStore
+
+BLOCK = 10_000
+
+
+def synthetic_vectors(count: int, centers: np.ndarray, spread: float, rng) -> np.ndarray:
+    topics = rng.integers(0, len(centers), count)
+    noise = rng.standard_normal((count, centers.shape[1]), dtype=np.float32) * (spread / np.sqrt(centers.shape[1]))
+    return centers[topics] + noise
+
+
+def timed_queries(store: NumpyVectorStore, queries: list, top_k: int, **kwargs):
+    results, samples = [], []
+    for vector in queries:
+        query = VectorStoreQuery(query_embedding=vector, similarity_top_k=top_k)
+        started = time.perf_counter()
+        results.append(store.query(query, **kwargs).ids)
+        samples.append((time.perf_counter() - started) * 1000)
+    return results, samples
+
+
+def recall(found: list, expected: list) -> float:
+    return float(np.mean([len(set(f) & set(e)) / len(e) for f, e in zip(found, expected)]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF recall vs latency over a synthetic corpus")
+    parser.add_argument("--chunks", type=int, default=100_000, help="corpus size")
+    parser.add_argument("--dim", type=int, default=1536, help="embedding width")
+    parser.add_argument("--topics", type=int, default=2000, help="topic directions in the corpus")
+    parser.add_argument("--spread", type=float, default=1.0, help="noise norm relative to the topic direction")
+    parser.add_argument("--queries", type=int, default=200, help="queries per setting")
+    parser.add_argument("--top-k", type=int, default=5, help="similarity_top_k")
+    parser.add_argument("--nlist", default="0", help="comma-separated IVF cell counts (0: about sqrt(chunks))")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32,64", help="comma-separated cells searched per query")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(17)
+    centers = rng.standard_normal((args.topics, args.dim), dtype=np.float32) / np.float32(np.sqrt(args.dim))
+    queries = synthetic_vectors(args.queries, centers, args.spread, rng).tolist()
+
+    tmp_dir = tempfile.mkdtemp(prefix="ann_recall_")
+    try:
+        exact_dir = os.path.join(tmp_dir, "exact")
+        store = NumpyVectorStore(ann_index="off")
+        for start in range(0, args.chunks, BLOCK):
+            count = min(BLOCK, args.chunks - start)
+            store.add_vectors([f"chunk-{i}" for i in range(start, start + count)],
+                              synthetic_vectors(count, centers, args.spread, rng))
+        store.persist(os.path.join(exact_dir, SIMPLE_STORE_NAME))
+        del store
+
+        exact = NumpyVectorStore.from_persist_dir(exact_dir, ann_index="off")
+        timed_queries(exact, queries[:5], args.top_k)  # page the matrix in
+        expected, exact_ms = timed_queries(exact, queries, args.top_k)
+        exact_p50 = percentile(exact_ms, 0.5)
+
+        print(f"=== IVF RECALL VS LATENCY, {args.chunks:,} chunks x {args.dim}, top-{args.top_k}, "
+              f"{args.queries} queries ===\n")
+        print(f"exact search: p50 {exact_p50:.2f} ms, p95 {percentile(exact_ms, 0.95):.2f} ms\n")
+        print(f"{'nlist':>6}{'nprobe':>8}{'recall@k':>10}{'scanned':>9}{'p50 ms':>9}{'p95 ms':>9}{'speedup':>9}")
+
+        for nlist in (int(n) for n in args.nlist.split(",")):
+            ivf_dir = os.path.join(tmp_dir, f"ivf{nlist}")
+            started = time.perf_counter()
+            ivf = NumpyVectorStore.from_persist_dir(exact_dir, ann_index="ivf", ann_min_vectors=0, ivf_nlist=nlist)
+            ivf.persist(os.path.join(ivf_dir, SIMPLE_STORE_NAME))
+            build_s = time.perf_counter() - started
+            cells = ivf._ivf.nlist
+            timed_queries(ivf, queries[:5], args.top_k)
+
+            for nprobe in (int(p) for p in args.nprobe.split(",")):
+                if nprobe > cells:
+                    continue
+                found, ivf_ms = timed_queries(ivf, queries, args.top_k, nprobe=nprobe)
+                p50 = percentile(ivf_ms, 0.5)
+                print(f"{cells:>6}{nprobe:>8}{recall(found, expected):>10.3f}{min(nprobe / cells, 1):>8.1%}"
+                      f"{p50:>9.2f}{percentile(ivf_ms, 0.95):>9.2f}{exact_p50 / p50:>8.1f}x")
+
+            new_vectors = synthetic_vectors(1000, centers, args.spread, rng)
+            started = time.perf_counter()
+            ivf.add_vectors([f"new-{i}" for i in range(1000)], new_vectors)
+            insert_ms = (time.perf_counter() - started) * 1000
+            found, _ = timed_queries(ivf, new_vectors[:50].tolist(), 1, nprobe=1)
+            print(f"{'':>6}  built in {build_s:.1f}s; insert of 1,000 chunks {insert_ms:.0f} ms, "
+                  f"{sum(f == [f'new-{i}'] for i, f in enumerate(found))}/50 found at nprobe=1 before re-persisting\n")
+            del ivf
+            shutil.rmtree(ivf_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/db_lookups.py
+"""
+Login and dashboard lookups per second, before and after the pooled,
+parameterised data layer.
+
+"before" reproduces the old utils/database.py: a fresh sqlite3.connect per
+call, f-string SQL and pd.read_sql for every lookup (three round trips for
+the dashboard). "after" calls the current get_customer_by_email and
+get_customer_dashboard_data. Both run against a temporary copy of
+data/telecom.db, so switching it to WAL does not touch the tracked file.
+
+    python -m benchmarks.db_lookups
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+
+from config.config import Config
+from utils import database, db_pool
+
+EMAILS = ["siva@example.com", "rishik@example.com", "suresh.patel@example.com", "nobody@example.com"]
+
+
+def old_customer_by_email(email):
+    conn = sqlite3.connect(Config.DB_PATH)
+    df = pd.read_sql(f"SELECT customer_id, name FROM customers WHERE email = '{email.strip()}'", conn)
+    conn.close()
+    return df.iloc[0].to_dict() if not df.empty else None
+
+
+def old_dashboard_data(customer_id):
+    conn = sqlite3.connect(Config.DB_PATH)
+    usage_df = pd.read_sql(f"SELECT * FROM customer_usage WHERE customer_id = '{customer_id}'", conn)
+    cust_df = pd.read_sql(f"SELECT service_plan_id FROM customers WHERE customer_id = '{customer_id}'", conn)
+    plan_id = cust_df.iloc[0]["service_plan_id"] if not cust_df.empty else None
+    plan_name = "Unknown"
+    if plan_id:
+        plan_df = pd.read_sql(f"SELECT name FROM service_plans WHERE plan_id = '{plan_id}'", conn)
+        if not plan_df.empty:
+            plan_name = plan_df.iloc[0]["name"]
+    conn.close()
+    return usage_df, plan_name
+
+
+def new_customer_by_email(email):
+    return database.get_customer_by_email(email)
+
+
+def new_dashboard_data(customer_id):
+    return database.get_customer_dashboard_data(customer_id)
+
+
+def lookups_per_second(lookup, args, seconds: float) -> float:
+    lookup(args[0])  # warm-up (pool creation, statement cache, imports)
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        lookup(args[calls % len(args)])
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def main(seconds: float = 2.0):
+    tmp_dir = tempfile.mkdtemp(prefix="db_lookups_")
+    Config.DB_PATH = os.path.join(tmp_dir, "telecom.db")
+    shutil.copy(os.path.join(Config.DATA_DIR, "telecom.db"), Config.DB_PATH)
+    customer_ids = [f"CUST00{i}" for i in range(1, 6)]
+
+    try:
+        print("=== DB LOOKUPS PER SECOND ===\n")
+        print(f"{'lookup':<18}{'before':>12}{'after':>12}{'speedup':>10}")
+        for name, old, new, args in [
+            ("customer_by_email", old_customer_by_email, new_customer_by_email, EMAILS),
+            ("dashboard_data", old_dashboard_data, new_dashboard_data, customer_ids),
+        ]:
+            before = lookups_per_second(old, args, seconds)
+            after = lookups_per_second(new, args, seconds)
+            print(f"{name:<18}{before:>12.0f}{after:>12.0f}{after / before:>9.1f}x")
+    finally:
+        db_pool.close_pools()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
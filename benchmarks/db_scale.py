@@ -0,0 +1,128 @@
+# benchmarks/db_scale.py
+"""
+Latency of every utils/database.py lookup and the agents' tool queries as the
+database grows.
+
+For each scale a seeded synthetic database is generated (utils/synthetic_data.py)
+with that many customer_usage rows, one per customer per month, so 10M rows is
+~1.7M customers at the default 6 months. Each function is then called with
+random existing keys and p50/p95 are reported. No LLM calls are made: the
+agent rows time the SQL their tools run (through the same SQLDatabase handle
+the LangChain and CrewAI agents use) and the AutoGen network status tool.
+
+    python -m benchmarks.db_scale                      # 10k, 1M, 10M usage rows
+    python -m benchmarks.db_scale --rows 10000 --keep /tmp/dbs
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from config.config import Config
+from utils import database, db_pool
+from utils.registry import clear_registry, get_sql_database
+from utils.synthetic_data import generate_database
+
+# SQL the agents' tools typically issue (service SQL agent, billing crew's database tool)
+AGENT_QUERIES = {
+    "agent: plan of customer": (
+        "SELECT p.name, p.monthly_cost FROM customers c JOIN service_plans p ON p.plan_id = c.service_plan_id "
+        "WHERE c.customer_id = :customer_id"
+    ),
+    "agent: usage history": (
+        "SELECT billing_period_end, data_used_gb, total_bill_amount FROM customer_usage "
+        "WHERE customer_id = :customer_id ORDER BY billing_period_end DESC"
+    ),
+    "agent: summary row": "SELECT * FROM customer_summary WHERE customer_id = :customer_id",
+}
+
+
+def sample_keys(path: str, n: int, seed: int = 7):
+    """Random existing customer ids, their emails and incident locations."""
+    conn = sqlite3.connect(path)
+    total = conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+    rng = random.Random(seed)
+    ids = [f"CUST{rng.randrange(1, total + 1):07d}" for _ in range(n)]
+    emails = [conn.execute("SELECT email FROM customers WHERE customer_id = ?", (cid,)).fetchone()[0] for cid in ids]
+    locations = [row[0] for row in conn.execute("SELECT DISTINCT location FROM network_incidents")]
+    conn.close()
+    return ids, emails, [rng.choice(locations) for _ in range(n)]
+
+
+def time_calls(func, args: list, max_seconds: float = 5.0) -> list:
+    func(args[0])  # warm-up
+    timings = []
+    budget_end = time.perf_counter() + max_seconds
+    for arg in args:
+        start = time.perf_counter()
+        func(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+        if time.perf_counter() > budget_end:
+            break
+    return timings
+
+
+def benchmark_scale(path: str, calls: int):
+    from agents.network_agents import check_network_status
+
+    Config.DB_PATH = path
+    db_pool.close_pools()
+    clear_registry()
+    ids, emails, locations = sample_keys(path, calls)
+    sql_db = get_sql_database()
+
+    cases = [
+        ("get_customer_by_email", database.get_customer_by_email, emails),
+        ("get_customer_summary", database.get_customer_summary, ids),
+        ("get_bill_breakdown", database.get_bill_breakdown, ids),
+        ("get_active_incidents(loc)", database.get_active_incidents, locations),
+        ("get_active_incidents()", lambda _: database.get_active_incidents(), ids),
+        ("get_network_dashboard_data", lambda _: database.get_network_dashboard_data(), ids),
+        ("get_all_support_tickets", lambda _: database.get_all_support_tickets(), ids),
+        ("tool: check_network_status", check_network_status, locations),
+        ("tool: sql_db_schema", lambda _: sql_db.get_table_info(["customer_usage", "customers"]), ids),
+    ]
+    for name, sql in AGENT_QUERIES.items():
+        cases.append((name, lambda cid, sql=sql: sql_db.run(sql, parameters={"customer_id": cid}), ids))
+
+    print(f"{'function':<30}{'calls':>7}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, func, args in cases:
+        timings = time_calls(func, args)
+        p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) >= 20 else max(timings)
+        print(f"{name:<30}{len(timings):>7}{statistics.median(timings):>10.3f}{p95:>10.3f}")
+    db_pool.close_pools()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database latency at increasing scale")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000],
+                        help="customer_usage rows per scale")
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--calls", type=int, default=200, help="calls per function (capped at 5 s)")
+    parser.add_argument("--keep", default=None, help="directory to keep (and reuse) generated databases")
+    args = parser.parse_args()
+
+    work_dir = args.keep or tempfile.mkdtemp(prefix="db_scale_")
+    os.makedirs(work_dir, exist_ok=True)
+    try:
+        for rows in args.rows:
+            customers = max(rows // args.months, 1)
+            path = os.path.join(work_dir, f"telecom_{rows}.db")
+            print(f"\n=== {rows:,} USAGE ROWS ({customers:,} customers) ===")
+            if not os.path.exists(path):
+                started = time.perf_counter()
+                generate_database(path, customers, args.months)
+                print(f"generated in {time.perf_counter() - started:.1f}s, "
+                      f"{os.path.getsize(path) / 2**20:.0f} MB\n")
+            benchmark_scale(path, args.calls)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
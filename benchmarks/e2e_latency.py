@@ -0,0 +1,134 @@
+# benchmarks/e2e_latency.py
+"""
+End-to-end latency of the whole graph per route, against the offline fake
+OpenAI server (utils/fake_openai.py), so no API calls are made.
+
+Every request runs create_graph() exactly as the app does: classification,
+the specialist framework (LangChain SQL agent, CrewAI, AutoGen, LlamaIndex)
+and formulate_response. The fake server counts how long it made each
+request wait, so
+
+    total    = wall time of graph.invoke
+    model    = simulated LLM time for that request (latency + per-token)
+    overhead = total - model: our code, the frameworks, HTTP on localhost and SQLite
+
+Requests run one at a time on a temporary copy of telecom.db, with the answer
+cache disabled.
+
+    python -m benchmarks.e2e_latency
+    python -m benchmarks.e2e_latency --requests 50 --latency-ms 400 --ms-per-token 10
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from utils.fake_openai import FakeOpenAI, FakeOpenAIServer, point_clients_at
+
+ROUTE_QUERIES = {
+    "billing": ["Why is my bill so high this month?", "How much do I owe on my bill?",
+                "What are the charges on my bill?"],
+    "billing-crew": ["Compare my bills over the last 3 months", "Show my billing history for every month"],
+    "network": ["My internet is very slow in Mumbai", "Calls keep dropping in Delhi",
+                "No signal at home in Bangalore"],
+    "service": ["What is my current plan?", "Which plan is best for a family of four?",
+                "Can I upgrade my plan?"],
+    "knowledge": ["How do I set up APN settings?", "How to enable VoLTE on my phone?",
+                  "What is the difference between eSIM and a physical SIM?"],
+    "general": ["Hello there", "Tell me a joke", "Thanks, goodbye"],
+}
+# Classification the route's queries are expected to get
+EXPECTED_INTENT = {"billing-crew": "billing"}
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    if len(values) == 1:
+        return values[0]
+    position = (len(values) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def initial_state(query: str) -> dict:
+    return {"query": query, "customer_info": {"id": "CUST001"}, "classification": "",
+            "intermediate_responses": {}, "final_response": "", "chat_history": []}
+
+
+def run_route(graph, fake: FakeOpenAI, queries, requests: int, quiet: bool):
+    samples = []
+    for i in range(requests + 1):
+        query = queries[i % len(queries)]
+        before = fake.stats.snapshot()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            state = graph.invoke(initial_state(query))
+        total_ms = (time.perf_counter() - start) * 1000
+        after = fake.stats.snapshot()
+        if i == 0:
+            continue  # warm-up: lazy agent construction, imports, index loading
+        model_ms = after["simulated_ms"] - before["simulated_ms"]
+        samples.append({
+            "intent": state["classification"],
+            "total": total_ms,
+            "model": model_ms,
+            "overhead": total_ms - model_ms,
+            "calls": after["completions"] - before["completions"],
+        })
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end graph latency on a fake LLM")
+    parser.add_argument("--requests", type=int, default=20, help="measured requests per route")
+    parser.add_argument("--routes", nargs="+", default=list(ROUTE_QUERIES), choices=list(ROUTE_QUERIES))
+    parser.add_argument("--latency-ms", type=float, default=300, help="simulated time to first token")
+    parser.add_argument("--ms-per-token", type=float, default=5, help="simulated time per output word")
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--verbose", action="store_true", help="show the agents' own logging")
+    args = parser.parse_args()
+
+    # Offline: no telemetry exports, no answer cache, a throwaway database
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    fake = FakeOpenAI(args.latency_ms, args.ms_per_token, args.jitter_ms)
+    tmp_dir = tempfile.mkdtemp(prefix="e2e_latency_")
+    with FakeOpenAIServer(fake) as server:
+        point_clients_at(server.base_url)
+        from config.config import Config
+        from orchestration.graph import create_graph
+        from utils import db_pool
+
+        Config.DB_PATH = os.path.join(tmp_dir, "telecom.db")
+        shutil.copy(os.path.join(Config.DATA_DIR, "telecom.db"), Config.DB_PATH)
+        Config.ANSWER_CACHE_SIZE = 0
+        Config.LLM_CACHE_MODE = "off"
+        graph = create_graph()
+
+        print(f"=== END-TO-END LATENCY (ms), fake LLM {args.latency_ms:g} ms + {args.ms_per_token:g} ms/word ===\n")
+        print(f"{'route':<14}{'calls':>6}  {'total p50/p95/p99':>24}  {'model p50':>10}  "
+              f"{'overhead p50/p95/p99':>24}")
+        try:
+            for route in args.routes:
+                samples = run_route(graph, fake, ROUTE_QUERIES[route], args.requests, quiet=not args.verbose)
+                expected = EXPECTED_INTENT.get(route, route)
+                misrouted = sum(s["intent"] != expected for s in samples)
+
+                def p(key):
+                    values = [s[key] for s in samples]
+                    return "/".join(f"{percentile(values, q):.0f}" for q in (0.5, 0.95, 0.99))
+                print(f"{route:<14}{statistics.mean(s['calls'] for s in samples):>6.1f}  {p('total'):>24}  "
+                      f"{statistics.median(s['model'] for s in samples):>10.0f}  {p('overhead'):>24}"
+                      + (f"  ({misrouted} misrouted)" if misrouted else ""))
+        finally:
+            db_pool.close_pools()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
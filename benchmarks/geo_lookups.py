@@ -0,0 +1,132 @@
+# benchmarks/geo_lookups.py
+"""
+"Is there a problem near me" lookups: the in-memory geo index
+(utils/geo_index.py) against the SQL a tool would otherwise run.
+
+    nearest towers     3 closest towers to a point
+                       SQL: ORDER BY squared distance over cell_towers
+    area status        towers, active incidents and coverage of a place
+                       SQL: service_areas by city/district/postal code, then
+                       its towers, coverage and a LIKE on incident locations
+    coverage at point  coverage of the area served by the nearest tower
+    refresh            one tower status change applied to the loaded index
+
+Runs on a seeded synthetic database (utils/synthetic_data.py, 8 towers per
+service area) in a temporary directory.
+
+    python -m benchmarks.geo_lookups
+    python -m benchmarks.geo_lookups --customers 500000 --lookups 5000
+"""
+import argparse
+import math
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.e2e_latency import percentile
+from utils.geo_index import COVERAGE_QUERY, GeoIndex
+from utils.synthetic_data import generate_database
+
+NEAREST_SQL = """
+SELECT tower_id, operational_status FROM cell_towers
+ORDER BY (latitude - :lat) * (latitude - :lat) + (longitude - :lon) * (longitude - :lon) * :scale
+LIMIT 3
+"""
+AREA_SQL = """
+SELECT area_id, city, district FROM service_areas
+WHERE postal_code = :place OR lower(city || ' ' || district) = lower(:place) OR lower(city) = lower(:place)
+"""
+
+
+def sql_nearest(conn, lat, lon):
+    return conn.execute(NEAREST_SQL, {"lat": lat, "lon": lon,
+                                      "scale": math.cos(math.radians(lat)) ** 2}).fetchall()
+
+
+def sql_area_status(conn, place):
+    result = []
+    for area_id, city, district in conn.execute(AREA_SQL, {"place": place}).fetchall():
+        result.append((
+            conn.execute("SELECT tower_id, operational_status FROM cell_towers WHERE area_id = ?", (area_id,)).fetchall(),
+            conn.execute("SELECT incident_id FROM network_incidents WHERE status = 'Active' AND location LIKE ?",
+                         (f"%{city} {district}%",)).fetchall(),
+            conn.execute(COVERAGE_QUERY + " WHERE area_id = ?", (area_id,)).fetchall(),
+        ))
+    return result
+
+
+def sql_coverage_at(conn, lat, lon):
+    nearest = sql_nearest(conn, lat, lon)[:1]
+    if not nearest:
+        return None
+    (area_id,) = conn.execute("SELECT area_id FROM cell_towers WHERE tower_id = ?", (nearest[0][0],)).fetchone()
+    return conn.execute(COVERAGE_QUERY + " WHERE area_id = ?", (area_id,)).fetchall()
+
+
+def time_us(func, args) -> list:
+    func(*args[0])  # warm-up
+    samples = []
+    for arg in args:
+        start = time.perf_counter()
+        func(*arg)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geo index vs SQL for location lookups")
+    parser.add_argument("--customers", type=int, default=100_000, help="synthetic customers (500 per area)")
+    parser.add_argument("--lookups", type=int, default=2000, help="lookups per row")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="geo_lookups_")
+    path = os.path.join(tmp_dir, "telecom.db")
+    try:
+        counts = generate_database(path, customers=args.customers, months=1)
+        conn = sqlite3.connect(path)
+        started = time.perf_counter()
+        index = GeoIndex().load(conn)
+        load_ms = (time.perf_counter() - started) * 1000
+
+        rng = random.Random(11)
+        towers = list(index.towers.values())
+        points = [(t.latitude + rng.uniform(-0.05, 0.05), t.longitude + rng.uniform(-0.05, 0.05))
+                  for t in rng.choices(towers, k=args.lookups)]
+        areas = list(index.areas.values())
+        places = [rng.choice((a.name, a.postal_code, a.city.lower())) for a in rng.choices(areas, k=args.lookups)]
+
+        print(f"=== GEO LOOKUPS (us), {counts['cell_towers']:,} towers in {counts['service_areas']:,} areas, "
+              f"index loaded in {load_ms:.0f} ms ===\n")
+        print(f"{'lookup':<20}{'SQL p50/p95':>18}{'index p50/p95':>18}{'speedup':>10}")
+        rows = [
+            ("nearest towers", lambda la, lo: sql_nearest(conn, la, lo), index.nearest_towers, points),
+            ("area status", lambda p: sql_area_status(conn, p), index.status_of, [(p,) for p in places]),
+            ("coverage at point", lambda la, lo: sql_coverage_at(conn, la, lo), index.coverage_at, points),
+        ]
+        for name, sql, indexed, lookup_args in rows:
+            before, after = time_us(sql, lookup_args), time_us(indexed, lookup_args)
+            print(f"{name:<20}{percentile(before, 0.5):>9.0f}/{percentile(before, 0.95):<8.0f}"
+                  f"{percentile(after, 0.5):>9.1f}/{percentile(after, 0.95):<8.1f}"
+                  f"{statistics.median(before) / statistics.median(after):>9.0f}x")
+
+        refresh_ms = []
+        for tower in rng.sample(towers, 20):
+            conn.execute("UPDATE cell_towers SET operational_status = 'Offline' WHERE tower_id = ?", (tower.tower_id,))
+            conn.commit()
+            started = time.perf_counter()
+            index.refresh(conn)
+            refresh_ms.append((time.perf_counter() - started) * 1000)
+            assert index.towers[tower.tower_id].operational_status == "Offline"
+        print(f"\nrefresh after one tower update: p50 {statistics.median(refresh_ms):.1f} ms "
+              f"(full load {load_ms:.0f} ms)")
+        conn.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# benchmarks/network_modes.py
+"""
+LLM calls and latency of the network route in its two modes
+(agents/network_agents.py), against the offline fake OpenAI server.
+
+    groupchat  AutoGen's GroupChatManager picks every speaker with an LLM
+               call; the engineer checks outages with a tool call
+    pipeline   the region is looked up in network_incidents first: an active
+               incident is answered straight away, otherwise the engineer
+               and then the support specialist speak in a fixed order
+
+Two kinds of question, on a temporary copy of telecom.db where the Delhi
+West incident is marked Active:
+
+    outage     the customer is in an area with an active incident
+    no-outage  the customer's area is fine, so troubleshooting is needed
+
+    python -m benchmarks.network_modes
+    python -m benchmarks.network_modes --requests 20 --latency-ms 400
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.e2e_latency import percentile
+from utils.fake_openai import FakeOpenAI, FakeOpenAIServer, point_clients_at
+
+CASES = {
+    "outage": ["My internet is down in Delhi West", "Calls keep dropping in Delhi West",
+               "No 4G signal in Delhi West since this morning"],
+    "no-outage": ["My internet is very slow in Mumbai", "Calls keep dropping in Bangalore",
+                  "No signal at home in Chennai"],
+}
+
+
+def run_case(process, fake: FakeOpenAI, mode: str, queries, requests: int, quiet: bool):
+    samples = []
+    for i in range(requests + 1):
+        before = fake.stats.snapshot()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            answer = process(queries[i % len(queries)], mode)
+        total_ms = (time.perf_counter() - start) * 1000
+        after = fake.stats.snapshot()
+        if i == 0:
+            continue  # warm-up: agent construction, index loading
+        samples.append({
+            "total": total_ms,
+            "model": after["simulated_ms"] - before["simulated_ms"],
+            "calls": after["completions"] - before["completions"],
+            "answered": not answer.startswith("I couldn't"),
+        })
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Network route: AutoGen group chat vs pre-check pipeline")
+    parser.add_argument("--requests", type=int, default=10, help="measured requests per mode and case")
+    parser.add_argument("--latency-ms", type=float, default=300, help="simulated time to first token")
+    parser.add_argument("--ms-per-token", type=float, default=5, help="simulated time per output word")
+    parser.add_argument("--verbose", action="store_true", help="show the agents' own logging")
+    args = parser.parse_args()
+
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    fake = FakeOpenAI(args.latency_ms, args.ms_per_token)
+    tmp_dir = tempfile.mkdtemp(prefix="network_modes_")
+    with FakeOpenAIServer(fake) as server:
+        point_clients_at(server.base_url)
+        from config.config import Config
+        from agents.network_agents import process_network_query
+        from utils import db_pool
+
+        Config.DB_PATH = os.path.join(tmp_dir, "telecom.db")
+        shutil.copy(os.path.join(Config.DATA_DIR, "telecom.db"), Config.DB_PATH)
+        with sqlite3.connect(Config.DB_PATH) as conn:
+            conn.execute("UPDATE network_incidents SET status = 'Active' WHERE location = 'Delhi West'")
+        Config.LLM_CACHE_MODE = "off"
+
+        print(f"=== NETWORK ROUTE (ms), fake LLM {args.latency_ms:g} ms + {args.ms_per_token:g} ms/word ===\n")
+        print(f"{'case':<11}{'mode':<11}{'LLM calls':>10}  {'total p50/p95':>16}  {'model p50':>10}  {'answered':>9}")
+        try:
+            for case, queries in CASES.items():
+                for mode in ("groupchat", "pipeline"):
+                    samples = run_case(process_network_query, fake, mode, queries, args.requests,
+                                       quiet=not args.verbose)
+                    totals = [s["total"] for s in samples]
+                    print(f"{case:<11}{mode:<11}{statistics.mean(s['calls'] for s in samples):>10.1f}  "
+                          f"{percentile(totals, 0.5):>7.0f}/{percentile(totals, 0.95):<8.0f}  "
+                          f"{statistics.median(s['model'] for s in samples):>10.0f}  "
+                          f"{sum(s['answered'] for s in samples):>4}/{len(samples):<4}")
+        finally:
+            db_pool.close_pools()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
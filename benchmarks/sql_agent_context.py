@@ -0,0 +1,140 @@
+# benchmarks/sql_agent_context.py
+"""
+LLM turns and prompt size of the LangChain SQL agent (service route), with
+and without intent-scoped schema cards (utils/schema_cards.py).
+
+    explore  LangChain's stock prompt: list tables, fetch schemas and sample
+             rows, then query (Config.SQL_SCHEMA_CARDS = False)
+    cards    the cards for the question's tables are in the prompt, so the
+             agent can query on its first turn
+
+Per question, counted from the agent's own callbacks:
+
+    turns          chat completions the agent made
+    prompt chars   characters sent across those calls (message contents)
+    ~tokens        prompt chars / 4 (the agent streams, so no usage is reported)
+    schema chars   table listings and schemas the agent fetched with tools,
+                   or the cards it was given
+
+By default the agent talks to the offline fake OpenAI server, which follows
+the stock prompt's explore-then-query protocol; --real uses the configured
+OpenAI API (costs tokens). Runs on a temporary copy of telecom.db.
+
+    python -m benchmarks.sql_agent_context
+    python -m benchmarks.sql_agent_context --real --repeat 3
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+QUESTIONS = [
+    "What is my current plan?",
+    "Which plan includes international roaming?",
+    "Is there a cheaper plan with unlimited calls?",
+    "How much data have I used this period?",
+    "Is the Galaxy S21 compatible with 5G?",
+    "What is the early termination fee for my plan?",
+]
+SCHEMA_TOOLS = ("sql_db_list_tables", "sql_db_schema")
+
+
+class AgentMeter(BaseCallbackHandler):
+    """Counts LLM turns, prompt size and fetched schema text for one agent run."""
+
+    def __init__(self):
+        self.turns = 0
+        self.prompt_chars = 0
+        self.schema_chars = 0
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.turns += 1
+        self.prompt_chars += sum(len(str(m.content)) for batch in messages for m in batch)
+
+    def on_tool_end(self, output, *, name=None, **kwargs):
+        if name in SCHEMA_TOOLS:
+            self.schema_chars += len(str(getattr(output, "content", output)))
+
+
+def run_mode(schema_cards: bool, repeat: int, quiet: bool):
+    from agents import service_agents
+    from config.config import Config
+    from utils.schema_cards import schema_context
+
+    Config.SQL_SCHEMA_CARDS = schema_cards
+    agent = service_agents.get_service_agent()
+    rows = []
+    for question in QUESTIONS:
+        samples = []
+        for _ in range(repeat):
+            meter = AgentMeter()
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+                agent.invoke(service_agents._service_prompt(question, "CUST001"), config={"callbacks": [meter]})
+            if schema_cards:
+                meter.schema_chars += len(schema_context(question))
+            samples.append((meter, (time.perf_counter() - start) * 1000))
+        rows.append({
+            "question": question,
+            "turns": statistics.mean(m.turns for m, _ in samples),
+            "prompt_chars": statistics.mean(m.prompt_chars for m, _ in samples),
+            "schema_chars": statistics.mean(m.schema_chars for m, _ in samples),
+            "ms": statistics.median(ms for _, ms in samples),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQL agent turns and prompt size with and without schema cards")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per question")
+    parser.add_argument("--real", action="store_true", help="use the configured OpenAI API instead of the fake")
+    parser.add_argument("--latency-ms", type=float, default=50, help="fake server time per call")
+    parser.add_argument("--verbose", action="store_true", help="show the agent's own logging")
+    args = parser.parse_args()
+
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+    tmp_dir = tempfile.mkdtemp(prefix="sql_agent_context_")
+    with contextlib.ExitStack() as stack:
+        if not args.real:
+            from utils.fake_openai import FakeOpenAI, FakeOpenAIServer, point_clients_at
+
+            server = stack.enter_context(FakeOpenAIServer(FakeOpenAI(latency_ms=args.latency_ms)))
+            point_clients_at(server.base_url)
+        from config.config import Config
+        from utils import db_pool
+
+        Config.DB_PATH = os.path.join(tmp_dir, "telecom.db")
+        shutil.copy(os.path.join(Config.DATA_DIR, "telecom.db"), Config.DB_PATH)
+        Config.TRACING_ENABLED = False
+        try:
+            results = {mode: run_mode(mode == "cards", args.repeat, quiet=not args.verbose)
+                       for mode in ("explore", "cards")}
+        finally:
+            db_pool.close_pools()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"=== SQL AGENT CONTEXT ({'OpenAI API' if args.real else 'fake LLM'}, mean per question) ===\n")
+    print(f"{'question':<46}{'mode':<9}{'turns':>6}{'prompt chars':>14}{'~tokens':>10}"
+          f"{'schema chars':>14}{'ms':>8}")
+    for explore, cards in zip(results["explore"], results["cards"]):
+        for mode, row in (("explore", explore), ("cards", cards)):
+            print(f"{row['question'][:45] if mode == 'explore' else '':<46}{mode:<9}{row['turns']:>6.1f}"
+                  f"{row['prompt_chars']:>14.0f}{row['prompt_chars'] / 4:>10.0f}{row['schema_chars']:>14.0f}"
+                  f"{row['ms']:>8.0f}")
+
+    def total(mode, key):
+        return sum(r[key] for r in results[mode])
+    print(f"\nTurns: {total('explore', 'turns'):.0f} -> {total('cards', 'turns'):.0f}   "
+          f"prompt chars: {total('explore', 'prompt_chars'):.0f} -> {total('cards', 'prompt_chars'):.0f} "
+          f"({1 - total('cards', 'prompt_chars') / total('explore', 'prompt_chars'):.0%} less)")
+
+
+if __name__ == "__main__":
+    main()
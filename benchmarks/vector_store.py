@@ -0,0 +1,102 @@
+# benchmarks/vector_store.py
+"""
+Load and query time of the vector store backends (utils/vector_store.py):
+
+    simple  LlamaIndex's SimpleVectorStore: one JSON file, parsed in full on
+            load; top-k by a Python loop over every embedding
+    numpy   float32 .npy opened with mmap plus a SQLite side table; top-k is
+            one matrix-vector product
+
+For each store size: persisted size, load time, time to the first query
+(the mapped rows are paged in) and warm top-5 latency. Random unit vectors
+of the OpenAI embedding width, in a temporary directory.
+
+    python -m benchmarks.vector_store
+    python -m benchmarks.vector_store --sizes 1000,20000 --dim 1536 --queries 200
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.simple import SimpleVectorStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from benchmarks.e2e_latency import percentile
+from utils.vector_store import SIMPLE_STORE_NAME, TABLE_NAME, NumpyVectorStore
+
+
+def make_nodes(count: int, dim: int, rng) -> list:
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    return [TextNode(text="", id_=f"node-{i}", embedding=vector.tolist(), metadata={"file_name": f"doc{i % 50}.txt"})
+            for i, vector in enumerate(vectors)]
+
+
+def dir_megabytes(path: str) -> float:
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)) / 1e6
+
+
+def measure(load, persist_dir: str, query_list: list) -> dict:
+    started = time.perf_counter()
+    store = load(persist_dir)
+    load_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    store.query(query_list[0])
+    first_ms = (time.perf_counter() - started) * 1000
+    samples = []
+    for query in query_list:
+        started = time.perf_counter()
+        store.query(query)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"size": dir_megabytes(persist_dir), "load": load_ms, "first": first_ms,
+            "p50": percentile(samples, 0.5), "p95": percentile(samples, 0.95)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SimpleVectorStore (JSON) vs NumpyVectorStore (mmap)")
+    parser.add_argument("--sizes", default="1000,5000", help="comma-separated vector counts")
+    parser.add_argument("--dim", type=int, default=1536, help="embedding width")
+    parser.add_argument("--queries", type=int, default=50, help="top-5 queries per store")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(5)
+    query_list = [VectorStoreQuery(query_embedding=rng.normal(size=args.dim).tolist(), similarity_top_k=5)
+                  for _ in range(args.queries)]
+
+    print(f"=== VECTOR STORES, dim {args.dim}, top-5 ===\n")
+    print(f"{'vectors':>9}  {'store':<7}{'on disk':>10}{'load ms':>10}{'1st query':>11}{'p50 ms':>9}{'p95 ms':>9}")
+    tmp_dir = tempfile.mkdtemp(prefix="vector_store_")
+    try:
+        for size in (int(s) for s in args.sizes.split(",")):
+            nodes = make_nodes(size, args.dim, rng)
+            simple_dir, numpy_dir = os.path.join(tmp_dir, f"simple{size}"), os.path.join(tmp_dir, f"numpy{size}")
+            simple, numpy_store = SimpleVectorStore(), NumpyVectorStore()
+            simple.add(nodes)
+            numpy_store.add(nodes)
+            simple.persist(os.path.join(simple_dir, SIMPLE_STORE_NAME))
+            numpy_store.persist(os.path.join(numpy_dir, SIMPLE_STORE_NAME))
+            del nodes, simple, numpy_store
+
+            rows = [
+                ("simple", lambda d: SimpleVectorStore.from_persist_path(os.path.join(d, SIMPLE_STORE_NAME)), simple_dir),
+                ("numpy", NumpyVectorStore.from_persist_dir, numpy_dir),
+            ]
+            results = {}
+            for name, load, persist_dir in rows:
+                results[name] = r = measure(load, persist_dir, query_list)
+                print(f"{size:>9,}  {name:<7}{r['size']:>8.1f}MB{r['load']:>10.1f}{r['first']:>11.1f}"
+                      f"{r['p50']:>9.2f}{r['p95']:>9.2f}")
+            print(f"{'':>9}  speedup: load {results['simple']['load'] / results['numpy']['load']:.0f}x, "
+                  f"query p50 {results['simple']['p50'] / results['numpy']['p50']:.0f}x\n")
+            shutil.rmtree(simple_dir)
+            shutil.rmtree(numpy_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    print(f"(numpy loads read only the .npy header and {TABLE_NAME}; node ids are fetched for the top-k rows)")
+
+
+if __name__ == "__main__":
+    main()
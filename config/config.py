@@ -20,6 +20,81 @@ class Config:
     DB_PATH = os.path.join(DATA_DIR, "telecom.db")
     DOCS_DIR = os.path.join(DATA_DIR, "documents")
     VECTOR_STORE_DIR = os.path.join(DATA_DIR, "vector_store")
+    INTENT_TRAINING_PATH = os.path.join(DATA_DIR, "intent_queries.csv")
+    EMBEDDING_CACHE_PATH = os.path.join(DATA_DIR, "embedding_cache.db")
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.db"))
+
+    # Pooled SQLite connections per database file (see utils/db_pool.py)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+
+    # Routing: below this confidence the local classifier defers to the LLM
+    INTENT_CONFIDENCE_THRESHOLD = 0.4
+    # Compound questions fan out to every specialist scoring at least MIN_SCORE and within
+    # RATIO of the best one ("my bill went up and my internet is slow" -> billing + network)
+    MULTI_INTENT_MIN_SCORE = float(os.getenv("MULTI_INTENT_MIN_SCORE", "0.3"))
+    MULTI_INTENT_RATIO = float(os.getenv("MULTI_INTENT_RATIO", "0.6"))
+    MAX_PARALLEL_INTENTS = int(os.getenv("MAX_PARALLEL_INTENTS", "3"))
+
+    # SQL agent context: put compact schema cards for the question's tables in the prompt
+    # (utils/schema_cards.py) instead of letting the agent list tables and fetch schemas first
+    SQL_SCHEMA_CARDS = os.getenv("SQL_SCHEMA_CARDS", "true").lower() in ("1", "true", "yes")
+
+    # Vector store: 'numpy' (memory-mapped float32 matrix + SQLite side table, utils/vector_store.py)
+    # or 'simple' (LlamaIndex's JSON store); a JSON store is converted to 'numpy' on first load
+    VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "numpy")
+    # Approximate nearest-neighbour search in the 'numpy' store (utils/ann_index.py): 'ivf' or 'off'.
+    # Below ANN_MIN_VECTORS exact search is fast enough. NLIST cells (0: about sqrt(vectors)), NPROBE
+    # of them searched per query; pick both with benchmarks/ann_recall.py
+    ANN_INDEX = os.getenv("ANN_INDEX", "off")
+    ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "20000"))
+    IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+
+    # Knowledge retrieval: 'vector', 'bm25' (no embedding call) or 'hybrid'
+    RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+    # Network route: 'pipeline' (outage pre-check in SQL, then a fixed engineer -> support
+    # order with no LLM speaker selection) or 'groupchat' (AutoGen picks every speaker)
+    NETWORK_MODE = os.getenv("NETWORK_MODE", "pipeline")
+    # In-memory tower/area/coverage index (utils/geo_index.py): how stale it may get before
+    # the next lookup applies the rows changed since its last refresh
+    GEO_REFRESH_SECONDS = float(os.getenv("GEO_REFRESH_SECONDS", "5"))
+
+    # Document ingestion (utils/ingestion.py): uploads are written to disk a chunk at a time; changed
+    # files are split into parts (PDF page ranges, text byte ranges) parsed by a process pool, whose
+    # chunks are embedded and inserted a batch at a time, so memory does not grow with file size
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(min(4, os.cpu_count() or 1))))
+    INGEST_POOL_MIN_BYTES = int(os.getenv("INGEST_POOL_MIN_BYTES", str(2 * 1024 * 1024)))
+    INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", "25"))
+    INGEST_SEGMENT_BYTES = int(os.getenv("INGEST_SEGMENT_BYTES", str(4 * 1024 * 1024)))
+    INGEST_EMBED_BATCH = int(os.getenv("INGEST_EMBED_BATCH", "128"))
+    INGEST_UPLOAD_CHUNK_BYTES = int(os.getenv("INGEST_UPLOAD_CHUNK_BYTES", str(1024 * 1024)))
+    # Texts per embedding API request (OpenAIEmbedding defaults to 10)
+    EMBED_REQUEST_SIZE = int(os.getenv("EMBED_REQUEST_SIZE", "100"))
+
+    # Conversation memory per chat session (orchestration/memory.py): recent turns verbatim, older
+    # ones rolled into a summary ('extractive', or 'llm' for the fast model), within this many tokens
+    MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "800"))
+    MEMORY_SUMMARY_MODE = os.getenv("MEMORY_SUMMARY_MODE", "extractive")
+
+    # Final-answer cache (LRU + TTL); similarity > 0 also matches near-duplicate queries by embedding
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "300"))
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0"))
+
+    # LLM call cache: 'off', 'record', 'replay' (offline, fails on a miss) or 'read-through'
+    LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off")
+
+    # Latency tracing: spans per graph node, LLM call, tool call, SQL query and retrieval (utils/tracing.py)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+    TRACE_PATH = os.getenv("TRACE_PATH", os.path.join(DATA_DIR, "traces", "spans.jsonl"))
+    TRACE_MAX_BYTES = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+    TRACE_BACKUP_COUNT = int(os.getenv("TRACE_BACKUP_COUNT", "5"))
+
+    # Headless HTTP/JSON service (python -m api.server)
+    API_HOST = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT = int(os.getenv("API_PORT", "8080"))
+    API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "32"))
 
     # Validate setup
     @classmethod
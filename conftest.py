@@ -0,0 +1,63 @@
+# conftest.py
+"""Fixtures shared by the test modules."""
+import shutil
+
+import pytest
+from llama_index.core import Settings
+from llama_index.core.embeddings import MockEmbedding
+
+from config.config import Config
+from utils import db_pool, document_loader, tracing
+
+
+class CountingEmbedding(MockEmbedding):
+    """Offline embedding model that counts how many texts it was asked to embed."""
+    calls: int = 0
+
+    def _get_text_embedding(self, text):
+        self.calls += 1
+        return super()._get_text_embedding(text)
+
+
+@pytest.fixture(autouse=True)
+def trace_to_tmp(tmp_path, monkeypatch):
+    """Spans recorded during a test go under tmp_path, never into the real data/traces."""
+    monkeypatch.setattr(Config, "TRACE_PATH", str(tmp_path / "traces" / "spans.jsonl"))
+    tracing.reset_tracing()
+    yield
+    tracing.reset_tracing()
+
+
+@pytest.fixture
+def telecom_db(tmp_path, monkeypatch):
+    """A throwaway copy of data/telecom.db, used by the pool and every agent, so tests can modify rows."""
+    db_path = tmp_path / "telecom.db"
+    shutil.copy(Config.DB_PATH, db_path)
+    monkeypatch.setattr(Config, "DB_PATH", str(db_path))
+    yield db_path
+    db_pool.close_pools()
+
+
+@pytest.fixture
+def fresh_loader(monkeypatch):
+    """document_loader with nothing cached: no index, version stamp, query engines or BM25 index."""
+    monkeypatch.setattr(document_loader, "_cached_index", None)
+    monkeypatch.setattr(document_loader, "_cached_version", None)
+    monkeypatch.setattr(document_loader, "_query_engines", {})
+    monkeypatch.setattr(document_loader, "_cached_bm25", None)
+
+
+@pytest.fixture
+def knowledge_base(tmp_path, monkeypatch, fresh_loader):
+    """An empty documents folder, vector store and embedding cache under tmp_path, embedded offline."""
+    docs = tmp_path / "documents"
+    docs.mkdir()
+    monkeypatch.setattr(Config, "DOCS_DIR", str(docs))
+    monkeypatch.setattr(Config, "VECTOR_STORE_DIR", str(tmp_path / "vector_store"))
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_PATH", str(tmp_path / "embedding_cache.db"))
+
+    embed_model = CountingEmbedding(embed_dim=8)
+    previous = Settings._embed_model
+    Settings.embed_model = embed_model
+    yield docs, embed_model
+    Settings._embed_model = previous
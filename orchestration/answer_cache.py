@@ -0,0 +1,213 @@
+# orchestration/answer_cache.py
+"""
+Final-answer cache in front of the specialist nodes.
+
+An answer is keyed by (normalised query, intent, customer scope, data version,
+conversation context):
+- customer scope is the customer id for personal intents (billing, service)
+  and None for generic ones (network, knowledge), so an outage question asked
+  by a hundred customers is answered once;
+- data version is the DB file state for DB-backed intents and the knowledge
+  index version for document answers, so any data change misses naturally;
+- conversation context is the region/device/plan established earlier in the
+  chat (follow-up questions are not cached at all).
+
+Entries are evicted LRU-first and expire after a TTL. With a similarity
+threshold set, a miss falls back to the closest cached query (by embedding)
+within the same intent, scope and version.
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config.config import Config
+from orchestration.intent_classifier import join_intents, split_intents
+from utils.registry import get_shared
+
+# Intents whose answers depend on who is asking
+CUSTOMER_SCOPED_INTENTS = ("billing", "service")
+# Intents whose answers come from the SQLite DB (billing/service/network) or the documents
+DB_INTENTS = ("billing", "service", "network")
+KNOWLEDGE_INTENTS = ("knowledge",)
+# 'general' is open chat at a non-zero temperature and is never cached
+CACHEABLE_INTENTS = DB_INTENTS + KNOWLEDGE_INTENTS
+
+# Agent fallbacks that must not be served to the next customer
+_FAILURE_PREFIXES = (
+    "error", "i'm having trouble", "i apologize", "knowledge base unavailable",
+    "manual unavailable", "i couldn't generate",
+)
+
+_PUNCT_RE = re.compile(r"[^\w\s-]")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case, drop punctuation and collapse whitespace: 'Is the internet DOWN?' == 'is the internet down'."""
+    return _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", query.lower())).strip()
+
+
+def db_version() -> str:
+    """Changes whenever the SQLite file (or its WAL) is written."""
+    parts = []
+    for path in (Config.DB_PATH, Config.DB_PATH + "-wal"):
+        try:
+            stats = os.stat(path)
+            parts.append(f"{stats.st_mtime_ns}:{stats.st_size}")
+        except FileNotFoundError:
+            parts.append("-")
+    return "|".join(parts)
+
+
+def data_version(intent: str) -> Optional[str]:
+    if intent in DB_INTENTS:
+        return "db:" + db_version()
+    if intent in KNOWLEDGE_INTENTS:
+        from utils.document_loader import get_index_version
+        return "kb:" + get_index_version()
+    return None
+
+
+def answer_key(query: str, intent: str, customer_id: Optional[str],
+               context: Optional[str] = None) -> Optional[Tuple]:
+    """
+    Cache key for this request, or None if the answer must not be cached. A
+    compound intent ('billing+network') is cacheable if every part is, scoped
+    to the customer if any part is, and versioned by all of its parts.
+    `context` is what the conversation has established (orchestration/memory.py).
+    """
+    intents = split_intents(intent)
+    if not all(i in CACHEABLE_INTENTS for i in intents):
+        return None
+    normalized = normalize_query(query)
+    if not normalized:
+        return None
+    scope = customer_id if any(i in CUSTOMER_SCOPED_INTENTS for i in intents) else None
+    return (normalized, intent, scope, join_intents([data_version(i) for i in intents]), context)
+
+
+def is_cacheable_answer(answer) -> bool:
+    return isinstance(answer, str) and bool(answer.strip()) and not answer.strip().lower().startswith(_FAILURE_PREFIXES)
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    near_hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.near_hits + self.misses
+        return (self.hits + self.near_hits) / lookups if lookups else 0.0
+
+
+class _Entry:
+    __slots__ = ("answer", "expires_at", "embedding")
+
+    def __init__(self, answer: str, expires_at: float, embedding: Optional[np.ndarray]):
+        self.answer = answer
+        self.expires_at = expires_at
+        self.embedding = embedding
+
+
+def _unit(vector: List[float]) -> np.ndarray:
+    """Normalised float32 copy, so cosine similarity is a plain dot product."""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+class AnswerCache:
+    """Thread-safe LRU + TTL cache of final answers, with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 300.0,
+                 similarity_threshold: float = 0.0,
+                 embed: Optional[Callable[[str], List[float]]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # 0 disables near-duplicate matching (no embedding calls at all)
+        self.similarity_threshold = similarity_threshold
+        self._embed = embed
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._near_hits = self._misses = self._evictions = self._expirations = 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.similarity_threshold > 0 and self._embed is not None
+
+    def get(self, key: Tuple) -> Optional[str]:
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.answer
+                del self._entries[key]
+                self._expirations += 1
+            if not self.semantic:
+                self._misses += 1
+                return None
+
+        # Near-duplicate lookup: embed outside the lock, then scan the same bucket
+        embedding = _unit(self._embed(key[0]))
+        with self._lock:
+            best_key, best_score = None, self.similarity_threshold
+            for other_key, other in self._entries.items():
+                if other_key[1:] != key[1:] or other.embedding is None or other.expires_at <= now:
+                    continue
+                score = float(embedding @ other.embedding)
+                if score >= best_score:
+                    best_key, best_score = other_key, score
+            if best_key is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self._near_hits += 1
+            return self._entries[best_key].answer
+
+    def put(self, key: Tuple, answer: str):
+        embedding = _unit(self._embed(key[0])) if self.semantic else None
+        with self._lock:
+            self._entries[key] = _Entry(answer, self._clock() + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._near_hits, self._misses,
+                              self._evictions, self._expirations, len(self._entries))
+
+
+# --- Process-wide instance ---
+
+def _embed_query(text: str) -> List[float]:
+    from llama_index.core import Settings
+    return Settings.embed_model.get_query_embedding(text)
+
+
+def get_answer_cache() -> AnswerCache:
+    return get_shared("answer_cache", lambda: AnswerCache(
+        max_entries=Config.ANSWER_CACHE_SIZE,
+        ttl_seconds=Config.ANSWER_CACHE_TTL_SECONDS,
+        similarity_threshold=Config.ANSWER_CACHE_SIMILARITY,
+        embed=_embed_query,
+    ))
@@ -0,0 +1,181 @@
+# orchestration/batch_triage.py
+"""
+Bulk triage: draft a reply for every open support ticket.
+
+    python -m orchestration.batch_triage --workers 8 --chunk-size 50
+
+Open tickets are read from support_tickets in keyset-paginated chunks and run
+through one compiled graph on a bounded thread pool (the graph, LLM clients
+and per-thread agents are reused across tickets). Each finished ticket is
+written to the ticket_triage table (migration 4) as soon as it completes, with its timing,
+so an interrupted run resumes where it stopped: tickets already triaged are
+skipped (failed ones too, unless --retry-errors).
+"""
+import argparse
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Iterator, List, NamedTuple, Optional
+
+from utils.database import db_connection
+
+CLOSED_STATUSES = ("Resolved", "Closed")
+
+PENDING_TICKETS_QUERY = f"""
+SELECT t.ticket_id, t.customer_id, t.issue_category, t.issue_description
+FROM support_tickets t
+LEFT JOIN ticket_triage r ON r.ticket_id = t.ticket_id
+WHERE t.status NOT IN ({', '.join('?' * len(CLOSED_STATUSES))})
+  AND t.ticket_id > ?
+  AND (r.ticket_id IS NULL OR (? AND r.status = 'error'))
+ORDER BY t.ticket_id
+LIMIT ?
+"""
+
+
+class TriageReport(NamedTuple):
+    succeeded: int
+    failed: int
+    seconds: float
+    interrupted: bool = False
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.failed
+
+    @property
+    def tickets_per_minute(self) -> float:
+        return 60 * self.processed / self.seconds if self.seconds else 0.0
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def iter_pending_tickets(chunk_size: int = 50, retry_errors: bool = False) -> Iterator[List[sqlite3.Row]]:
+    """
+    Open, not-yet-triaged tickets in ticket_id order, one chunk at a time (keyset
+    pagination). A pooled connection is borrowed per chunk, not held between them.
+    """
+    last_id = ""
+    while True:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            rows = cursor.execute(PENDING_TICKETS_QUERY,
+                                  (*CLOSED_STATUSES, last_id, int(retry_errors), chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["ticket_id"]
+
+
+def triage_ticket(graph, ticket) -> dict:
+    """Run one ticket through the graph; never raises, failures are recorded."""
+    started_at = _now()
+    started = time.perf_counter()
+    result = {"ticket_id": ticket["ticket_id"], "customer_id": ticket["customer_id"],
+              "classification": None, "draft_reply": None, "status": "done", "error": None}
+    try:
+        state = graph.invoke({
+            "query": ticket["issue_description"],
+            "customer_info": {"id": ticket["customer_id"]},
+            "classification": "",
+            "intermediate_responses": {},
+            "final_response": "",
+            "chat_history": [],
+        })
+        result.update(classification=state.get("classification"), draft_reply=state["final_response"])
+    except Exception as e:
+        result.update(status="error", error=f"{type(e).__name__}: {e}")
+    result.update(latency_ms=round((time.perf_counter() - started) * 1000, 1),
+                  started_at=started_at, completed_at=_now())
+    return result
+
+
+def _save_result(result: dict):
+    # Committed per ticket (on leaving db_connection): an interruption loses at most the tickets still in flight
+    with db_connection() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO ticket_triage "
+            "(ticket_id, customer_id, classification, draft_reply, status, error, latency_ms, started_at, completed_at) "
+            "VALUES (:ticket_id, :customer_id, :classification, :draft_reply, :status, :error, "
+            ":latency_ms, :started_at, :completed_at)",
+            result,
+        )
+
+
+def run_triage(graph=None, workers: int = 4, chunk_size: int = 50, limit: Optional[int] = None,
+               retry_errors: bool = False) -> TriageReport:
+    """
+    Triage pending tickets with at most `workers` graphs in flight.
+    `limit` caps how many tickets this run handles (the rest wait for the next run).
+    """
+    if graph is None:
+        from orchestration.graph import create_graph
+        graph = create_graph()
+
+    succeeded = failed = 0
+    interrupted = False
+    started = time.perf_counter()
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="triage")
+    in_flight = set()
+
+    def collect(done):
+        nonlocal succeeded, failed
+        for future in done:
+            result = future.result()
+            _save_result(result)
+            if result["status"] == "done":
+                succeeded += 1
+            else:
+                failed += 1
+                print(f"   [Triage] {result['ticket_id']} failed: {result['error']}")
+
+    try:
+        submitted = 0
+        for chunk in iter_pending_tickets(chunk_size, retry_errors):
+            for ticket in chunk:
+                if limit is not None and submitted >= limit:
+                    break
+                # Bounded queue: never more than two tickets per worker waiting
+                while len(in_flight) >= 2 * workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+                in_flight.add(executor.submit(triage_ticket, graph, dict(ticket)))
+                submitted += 1
+            elapsed = time.perf_counter() - started
+            print(f"   [Triage] {succeeded + failed} done, {len(in_flight)} in flight, "
+                  f"{60 * (succeeded + failed) / elapsed:.1f} tickets/min")
+            if limit is not None and submitted >= limit:
+                break
+        done, in_flight = wait(in_flight)
+        collect(done)
+    except KeyboardInterrupt:
+        interrupted = True
+        print("   [Triage] Interrupted: saving finished tickets, the rest resume on the next run")
+        collect([f for f in in_flight if f.done() and not f.cancelled()])
+    finally:
+        executor.shutdown(wait=not interrupted, cancel_futures=True)
+
+    return TriageReport(succeeded, failed, time.perf_counter() - started, interrupted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draft replies for all open support tickets")
+    parser.add_argument("--workers", type=int, default=4, help="graphs run in parallel")
+    parser.add_argument("--chunk-size", type=int, default=50, help="tickets read from the DB per query")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many tickets")
+    parser.add_argument("--retry-errors", action="store_true", help="re-run tickets that failed before")
+    args = parser.parse_args()
+
+    report = run_triage(workers=args.workers, chunk_size=args.chunk_size,
+                        limit=args.limit, retry_errors=args.retry_errors)
+    print(f"Triaged {report.processed} tickets ({report.succeeded} ok, {report.failed} failed) "
+          f"in {report.seconds:.1f}s: {report.tickets_per_minute:.1f} tickets/min"
+          + (" [interrupted]" if report.interrupted else ""))
+
+
+if __name__ == "__main__":
+    main()
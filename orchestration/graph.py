@@ -1,115 +1,172 @@
 # orchestration/graph.py
-from typing import Dict, Any
+from typing import Dict, Any, List
 from langgraph.graph import StateGraph, END
-from agents.knowledge_agents import process_knowledge_query
+from agents.knowledge_agents import aprocess_knowledge_query, process_knowledge_query
 from orchestration.state import TelecomAssistantState
-from agents.service_agents import process_service_query
-from agents.billing_agents import process_billing_query
-from agents.network_agents import process_network_query
-from langchain_openai import ChatOpenAI
+from orchestration.intent_classifier import (
+    allm_classify, get_intent_classifier, join_intents, llm_classify, specialist_intents, split_intents,
+)
+from orchestration.answer_cache import answer_key, get_answer_cache, is_cacheable_answer
+from orchestration.memory import contextual_query, follow_up_intent, memory_context
+from orchestration.streaming import emit_progress
+from agents.service_agents import aprocess_service_query, process_service_query
+from agents.billing_agents import aprocess_billing_query, process_billing_query
+from agents.network_agents import aprocess_network_query, process_network_query
+from utils.registry import get_llm
+from utils.tracing import atraced_node, traced_node
 from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from config.config import Config
 
 
 # --- 1. CLASSIFICATION NODE ---
 def classify_query(state: TelecomAssistantState) -> TelecomAssistantState:
-    query = state["query"].lower().strip()
+    query = state["query"].strip()
     
     # 1. Edge Case: Empty Query
     if not query:
-        return {**state, "classification": "general"}
+        return {**state, "classification": "general", "intent_scores": {}}
         
-    classification = "general" 
+    # 2. Local one-pass classifier (sub-millisecond)
+    prediction = get_intent_classifier().classify(query)
+    intents = specialist_intents(prediction)
+    classification = join_intents(intents)
 
-    # Check for "Complex" queries (referencing multiple topics)
-    # If user mentions both "bill" and "network", we route to general to ask for clarification
-    if any(w in query for w in ["bill", "payment"]) and any(w in query for w in ["network", "slow", "internet"]):
-        classification = "general"
+    # 3. Only ask the LLM when the local model is unsure (a compound query explains its own low
+    #    confidence, and a follow-up like "what about last month?" keeps the previous turn's intent)
+    follow_up = None
+    if len(intents) == 1 and prediction.confidence < Config.INTENT_CONFIDENCE_THRESHOLD:
+        follow_up = follow_up_intent(state)
+        classification = follow_up or llm_classify(query, default=classification)
 
-    # Billing
-    elif any(w in query for w in ["bill", "charge", "price", "cost", "invoice", "payment", "top-up", "balance", "usage"]):
-        classification = "billing"
-    
-    # Network
-    elif any(w in query for w in ["internet", "slow", "down", "speed", "signal", "coverage", "no service", "latency", "outage"]):
-        classification = "network"
-    
-    # Service/Sales
-    elif any(w in query for w in ["plan", "recommend", "buy", "purchase", "upgrade", "new connection", "sim", "prepaid", "postpaid"]):
-        classification = "service"
-    
-    # Technical/Knowledge
-    elif any(w in query for w in ["how to", "how do", "set up", "setup", "configure", "apn", "manual", "guide", "what is", "volte", "activate", "promo", "code", "offer"]):
-        classification = "knowledge"
+    return _routed(state, classification, prediction, follow_up is not None)
+
+async def aclassify_query(state: TelecomAssistantState) -> TelecomAssistantState:
+    """Async twin of classify_query."""
+    query = state["query"].strip()
+    if not query:
+        return {**state, "classification": "general", "intent_scores": {}}
+
+    prediction = get_intent_classifier().classify(query)
+    intents = specialist_intents(prediction)
+    classification = join_intents(intents)
+    follow_up = None
+    if len(intents) == 1 and prediction.confidence < Config.INTENT_CONFIDENCE_THRESHOLD:
+        follow_up = follow_up_intent(state)
+        classification = follow_up or await allm_classify(query, default=classification)
+
+    return _routed(state, classification, prediction, follow_up is not None)
+
+def _routed(state, classification, prediction, follow_up=False):
+    print(f"--- ROUTER DECISION: {classification.upper()} (confidence {prediction.confidence:.2f}"
+          f"{', follow-up' if follow_up else ''}) ---")
+    emit_progress(f"Routed to {classification}")
+    return {**state, "classification": classification, "intent_scores": prediction.scores, "follow_up": follow_up}
+
+def check_answer_cache(state: TelecomAssistantState) -> TelecomAssistantState:
+    """Serve a repeated question from the answer cache, skipping the specialist agents."""
+    customer_id = state.get("customer_info", {}).get("id")
+    # A follow-up only makes sense in its own conversation
+    key = None if state.get("follow_up") else answer_key(
+        state["query"], state["classification"], customer_id, memory_context(state))
+    if key is None:
+        return {**state, "cache_key": None, "cache_hit": False}
 
-    print(f"--- ROUTER DECISION: {classification.upper()} ---")
-    return {**state, "classification": classification}
+    cached = get_answer_cache().get(key)
+    if cached is None:
+        return {**state, "cache_key": key, "cache_hit": False}
+
+    print(f"--- ANSWER CACHE HIT ({state['classification']}) ---")
+    emit_progress("Answered from cache")
+    return {**state, "cache_key": key, "cache_hit": True, "final_response": cached}
+
+GENERAL_FALLBACK = "I'm here to help with Billing, Network, or Plans."
 
 def general_node(state: TelecomAssistantState) -> TelecomAssistantState:
     """
     Handles fallback, chit-chat, jokes, and complex queries.
     """
     print("--> Entering General Node (Fallback)")
-    query = state["query"]
+    query = contextual_query(state)
     
     # 1. NEW LOGIC: Use LLM instead of hardcoded string
     try:
-        llm = ChatOpenAI(model=Config.LLM_MODEL, temperature=0.7)
+        llm = get_llm(Config.LLM_MODEL, temperature=0.7)
         
-        messages = [
-            SystemMessage(content="""
-            You are a polite Telecom Assistant.
-            - If the user asks for a joke, tell a telecom-related joke.
-            - If the user asks about TWO topics at once (e.g., "Bill and Network"), politely ask them to focus on one at a time so you can connect them to the right department.
-            - If it's a greeting, say hello and list your capabilities (Billing, Network, Plans, Tech Support).
-            - Do not try to answer technical questions yourself; just guide them.
-            """),
-            HumanMessage(content=query)
-        ]
-        
-        # 2. GENERATE RESPONSE
-        response = llm.invoke(messages).content
+        # 2. GENERATE RESPONSE (tokens reach the UI via the graph's "messages" stream)
+        response = llm.invoke(_general_messages(query)).content
         return {**state, "intermediate_responses": {"general": response}}
         
     except Exception as e:
         # Fallback only if LLM fails
-        return {**state, "intermediate_responses": {"general": "I'm here to help with Billing, Network, or Plans."}}
+        return {**state, "intermediate_responses": {"general": GENERAL_FALLBACK}}
+
+async def ageneral_node(state: TelecomAssistantState) -> TelecomAssistantState:
+    """Async twin of general_node."""
+    print("--> Entering General Node (Fallback)")
+    try:
+        llm = get_llm(Config.LLM_MODEL, temperature=0.7)
+        response = (await llm.ainvoke(_general_messages(contextual_query(state)))).content
+        return {**state, "intermediate_responses": {"general": response}}
+    except Exception as e:
+        return {**state, "intermediate_responses": {"general": GENERAL_FALLBACK}}
+
+def _general_messages(query: str):
+    return [
+        SystemMessage(content="""
+        You are a polite Telecom Assistant.
+        - If the user asks for a joke, tell a telecom-related joke.
+        - If the user asks about several topics at once, say briefly which department handles each (Billing, Network, Plans, Tech Support).
+        - If it's a greeting, say hello and list your capabilities (Billing, Network, Plans, Tech Support).
+        - Do not try to answer technical questions yourself; just guide them.
+        """),
+        HumanMessage(content=query)
+    ]
     
 
 # --- 2. ROUTING LOGIC ---
-def route_query(state: TelecomAssistantState) -> str:
-    """Returns the name of the next node to visit"""
-    return state["classification"]
+def route_query(state: TelecomAssistantState) -> List[str]:
+    """
+    Returns the names of the next nodes to visit. A compound classification
+    ('billing+network') runs each specialist as a parallel branch, so the
+    request takes as long as the slowest one rather than all of them in turn.
+    """
+    if state.get("cache_hit"):
+        return ["cached"]
+    return split_intents(state["classification"]) or ["general"]
 
-# --- 3. SPECIALIST NODES (MOCKS) ---
-# We will replace these with real AI Agents in the next phase.
+# --- 3. SPECIALIST NODES ---
+# Each returns only its own intermediate_responses entry: parallel branches of a
+# compound query merge through the state's reducer (orchestration/state.py).
+# Agents get the question with what the conversation established (orchestration/memory.py).
 
 def billing_node(state: TelecomAssistantState) -> TelecomAssistantState:
     print("--> Entering Billing Node (CrewAI)")
     
-    query = state["query"]
-    # We simulate a logged-in user (CUST_001) for this demo
-    # In the real app, this comes from state["customer_info"]
-    customer_id = "CUST_001" 
+    query = contextual_query(state)
+    
+    # Get the Customer ID from state, default to CUST_001 if missing
+    customer_info = state.get("customer_info", {})
+    customer_id = customer_info.get("id", "CUST_001")
     
     # CALL THE REAL CREW
     response = process_billing_query(query, customer_id)
     
-    return {**state, "intermediate_responses": {"billing": response}}
+    return {"intermediate_responses": {"billing": response}}
 
 def network_node(state: TelecomAssistantState) -> TelecomAssistantState:
     print("--> Entering Network Node (AutoGen)")
     
-    query = state["query"]
+    query = contextual_query(state)
     # CALL THE REAL AGENT
     response = process_network_query(query)
     
-    return {**state, "intermediate_responses": {"network": response}}
+    return {"intermediate_responses": {"network": response}}
 
 def service_node(state: TelecomAssistantState) -> TelecomAssistantState:
     print("--> Entering Service Node (LangChain)")
     
-    query = state["query"]
+    query = contextual_query(state)
     
     # Get the Customer ID from state, default to CUST_001 if missing
     customer_info = state.get("customer_info", {})
@@ -118,56 +175,110 @@ def service_node(state: TelecomAssistantState) -> TelecomAssistantState:
     # CALL THE REAL AGENT WITH THE ID
     response = process_service_query(query, customer_id)
     
-    return {**state, "intermediate_responses": {"service": response}}
+    return {"intermediate_responses": {"service": response}}
 
 def knowledge_node(state: TelecomAssistantState) -> TelecomAssistantState:
     print("--> Entering Knowledge Node (LlamaIndex)")
     
-    query = state["query"]
+    query = contextual_query(state)
     # CALL THE REAL AGENT
     response = process_knowledge_query(query)
     
-    return {**state, "intermediate_responses": {"knowledge": response}}
+    return {"intermediate_responses": {"knowledge": response}}
+
+# Async twins: same agents, awaited, so one event loop can serve many conversations.
+# Blocking frameworks (CrewAI crew, AutoGen chat) run in worker threads inside their agent modules.
+
+async def abilling_node(state: TelecomAssistantState) -> TelecomAssistantState:
+    print("--> Entering Billing Node (async)")
+    customer_id = state.get("customer_info", {}).get("id", "CUST_001")
+    response = await aprocess_billing_query(contextual_query(state), customer_id)
+    return {"intermediate_responses": {"billing": response}}
+
+async def anetwork_node(state: TelecomAssistantState) -> TelecomAssistantState:
+    print("--> Entering Network Node (async)")
+    response = await aprocess_network_query(contextual_query(state))
+    return {"intermediate_responses": {"network": response}}
+
+async def aservice_node(state: TelecomAssistantState) -> TelecomAssistantState:
+    print("--> Entering Service Node (async)")
+    customer_id = state.get("customer_info", {}).get("id", "CUST_001")
+    response = await aprocess_service_query(contextual_query(state), customer_id)
+    return {"intermediate_responses": {"service": response}}
+
+async def aknowledge_node(state: TelecomAssistantState) -> TelecomAssistantState:
+    print("--> Entering Knowledge Node (async)")
+    response = await aprocess_knowledge_query(contextual_query(state))
+    return {"intermediate_responses": {"knowledge": response}}
 
 
 # --- 4. RESPONSE FORMULATION ---
 def formulate_response(state: TelecomAssistantState) -> TelecomAssistantState:
     """Combines intermediate outputs into a final string"""
-    # Grab the last added response
+    # 1. Cached answers are already final
+    if state.get("cache_hit"):
+        return state
+
+    # 2. One answer per intent, in the router's order
     responses = state["intermediate_responses"]
-    final_text = list(responses.values())[-1]
+    order = split_intents(state.get("classification", ""))
+    parts = [(intent, responses[intent]) for intent in order if intent in responses]
+    parts += [(intent, text) for intent, text in responses.items() if intent not in order]
+    final_text = merge_answers(parts)
+
+    # 3. Remember it for the next customer asking the same thing
+    key = state.get("cache_key")
+    if key is not None and all(is_cacheable_answer(text) for _, text in parts):
+        get_answer_cache().put(key, final_text)
     return {**state, "final_response": final_text}
 
+INTENT_TITLES = {"billing": "Billing", "network": "Network", "service": "Plans & Services", "knowledge": "How-to"}
+
+def merge_answers(parts) -> str:
+    """A single answer as is; several under one heading per department."""
+    if len(parts) == 1:
+        return parts[0][1]
+    return "\n\n".join(f"**{INTENT_TITLES.get(intent, intent.title())}**\n{text}" for intent, text in parts)
+
 # --- 5. GRAPH CONSTRUCTION ---
 def create_graph():
     workflow = StateGraph(TelecomAssistantState)
 
-    # Add Nodes
-    workflow.add_node("classify_query", classify_query)
-    workflow.add_node("billing", billing_node)
-    workflow.add_node("network", network_node)
-    workflow.add_node("service", service_node)
-    workflow.add_node("knowledge", knowledge_node)
-    workflow.add_node("general", general_node)
-    workflow.add_node("formulate_response", formulate_response)
+    # Add Nodes (graph.invoke/stream use the sync functions, ainvoke/astream the async twins),
+    # each timed as a tracing span
+    def node(name, func, afunc=None):
+        func = traced_node(name, func)
+        workflow.add_node(name, RunnableLambda(func, afunc=atraced_node(name, afunc), name=name) if afunc else func)
+
+    node("classify_query", classify_query, aclassify_query)
+    node("check_answer_cache", check_answer_cache)
+    node("billing", billing_node, abilling_node)
+    node("network", network_node, anetwork_node)
+    node("service", service_node, aservice_node)
+    node("knowledge", knowledge_node, aknowledge_node)
+    node("general", general_node, ageneral_node)
+    node("formulate_response", formulate_response)
 
     # Set Entry Point
     workflow.set_entry_point("classify_query")
 
     # Add Conditional Routing
+    workflow.add_edge("classify_query", "check_answer_cache")
+    # route_query may return several specialists: they run as parallel branches
     workflow.add_conditional_edges(
-        "classify_query",
+        "check_answer_cache",
         route_query,
         {
             "billing": "billing",
             "network": "network",
             "service": "service",
             "knowledge": "knowledge",
-            "general": "general"
+            "general": "general",
+            "cached": "formulate_response"
         }
     )
 
-    # All nodes go to response formulation
+    # All nodes go to response formulation (which waits for every branch of a compound query)
     workflow.add_edge("billing", "formulate_response")
     workflow.add_edge("network", "formulate_response")
     workflow.add_edge("service", "formulate_response")
@@ -0,0 +1,220 @@
+# orchestration/intent_classifier.py
+import csv
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config.config import Config
+
+INTENTS = ("billing", "network", "service", "knowledge", "general")
+# Intents with a specialist node; a compound query runs several of them in parallel
+SPECIALIST_INTENTS = ("billing", "network", "service", "knowledge")
+MULTI_INTENT_SEPARATOR = "+"
+
+# Phrases for the multi-pattern matcher (up to three words each). Multi-word
+# phrases carry more weight than single words, so "my plan" outweighs a stray
+# "speed".
+INTENT_PHRASES = {
+    "billing": [
+        "bill", "bills", "billing", "billed", "charge", "charges", "charged", "invoice",
+        "payment", "pay", "balance", "top-up", "top up", "owe", "overage", "refund",
+        "usage", "used", "double charged", "i owe", "billing period", "have i used",
+        "sms left", "total amount",
+    ],
+    "network": [
+        "internet", "slow", "slowly", "down", "signal", "coverage", "no service", "latency",
+        "outage", "call drop", "call drops", "calls drop", "dropping", "disconnecting",
+        "connection", "congestion", "tower", "no network", "not working", "speed test",
+        "mobile data", "freezing", "weak signal", "network problem", "network down",
+    ],
+    "service": [
+        "plan", "plans", "recommend", "suggest", "buy", "purchase", "upgrade", "downgrade",
+        "new connection", "sim card", "prepaid", "postpaid", "my plan", "current plan",
+        "which plan", "family plan", "business plan", "unlimited data plan", "cheaper",
+        "add another line", "contract", "termination fee",
+    ],
+    "knowledge": [
+        "how to", "how do i", "set up", "setup", "configure", "apn", "manual", "guide",
+        "what is", "volte", "activate", "enable", "promo", "promo code", "offer", "offers",
+        "esim", "wifi calling", "hotspot", "voicemail", "imei", "port my number", "steps",
+        "settings", "difference between",
+    ],
+    "general": [
+        "hello", "hi", "hey", "good morning", "good evening", "joke", "thank you",
+        "thanks", "bye", "goodbye", "who are you", "can you do", "human",
+    ],
+}
+
+# Weight of one phrase vote relative to the TF-IDF term, and the mass an
+# unseen unigram/bigram adds to the denominator (lowering confidence).
+PHRASE_WEIGHT = 1.0
+UNSEEN_WEIGHT = 0.1
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+_ZEROS = (0.0,) * len(INTENTS)
+
+
+class IntentPrediction(NamedTuple):
+    intent: str
+    confidence: float
+    scores: Dict[str, float]
+
+
+def _features(tokens: List[str]) -> List[str]:
+    """Unigram and bigram features of a tokenised query."""
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class IntentClassifier:
+    """
+    One-pass local router: a phrase lexicon and a nearest-centroid TF-IDF
+    model (trained from a labelled query file) compiled into a single n-gram
+    weight table, so scoring is one lookup per n-gram.
+    """
+
+    def __init__(self, examples: List[Tuple[str, str]], phrases: Dict[str, List[str]] = INTENT_PHRASES):
+        index = {intent: i for i, intent in enumerate(INTENTS)}
+
+        # 1. Phrase matcher: n-gram -> per-intent vote weights
+        phrase_weights: Dict[str, List[float]] = {}
+        for intent, words in phrases.items():
+            for phrase in words:
+                key = " ".join(_TOKEN_RE.findall(phrase))
+                if key.count(" ") > 2:
+                    raise ValueError(f"Phrase '{phrase}' is longer than three words")
+                vector = phrase_weights.setdefault(key, [0.0] * len(INTENTS))
+                vector[index[intent]] += 1.0 + 0.5 * key.count(" ")
+
+        # 2. TF-IDF centroids over unigrams and bigrams
+        docs = [(Counter(_features(_TOKEN_RE.findall(q.lower()))), intent) for q, intent in examples]
+        doc_freq = Counter(feature for counts, _ in docs for feature in counts)
+        n_docs = len(docs)
+        idf = {f: math.log((n_docs + 1) / (df + 1)) + 1.0 for f, df in doc_freq.items()}
+
+        centroids = [Counter() for _ in INTENTS]
+        for counts, intent in docs:
+            vector = {f: tf * idf[f] for f, tf in counts.items()}
+            norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+            for f, v in vector.items():
+                centroids[index[intent]][f] += v / norm
+        norms = [math.sqrt(sum(v * v for v in c.values())) or 1.0 for c in centroids]
+
+        # 3. Fold both into one linear model: n-gram -> per-intent weight
+        self._weights: Dict[str, Tuple[float, ...]] = {}
+        for f in set(idf) | set(phrase_weights):
+            votes = phrase_weights.get(f, _ZEROS)
+            self._weights[f] = tuple(
+                idf.get(f, 0.0) * c.get(f, 0.0) / n + PHRASE_WEIGHT * v
+                for c, n, v in zip(centroids, norms, votes)
+            )
+        self._vocabulary = set(idf)
+        self._trigrams = {p for p in phrase_weights if p.count(" ") == 2}
+
+    def classify(self, query: str) -> IntentPrediction:
+        """Score every intent for `query`; confidence is the winning share."""
+        tokens = _TOKEN_RE.findall(query.lower())
+        features = _features(tokens)
+        unseen = len(features) - len(self._vocabulary.intersection(features))
+        if self._trigrams and len(tokens) > 2:
+            features += self._trigrams.intersection(map(" ".join, zip(tokens, tokens[1:], tokens[2:])))
+
+        # One table lookup per n-gram and a column-wise sum, all in C
+        raw = [sum(col) for col in zip(*filter(None, map(self._weights.get, features)))]
+        total = sum(raw)
+        if total <= 0:
+            return IntentPrediction("general", 0.0, dict.fromkeys(INTENTS, 0.0))
+
+        total += UNSEEN_WEIGHT * unseen
+        scores = {intent: r / total for intent, r in zip(INTENTS, raw)}
+        best = max(scores, key=scores.get)
+        return IntentPrediction(best, scores[best], scores)
+
+
+def specialist_intents(prediction: IntentPrediction) -> List[str]:
+    """
+    Every specialist the query is about, best first: the winner plus any
+    intent close behind it. 'general' never fans out.
+    """
+    if prediction.intent == "general":
+        return ["general"]
+    floor = max(Config.MULTI_INTENT_MIN_SCORE, Config.MULTI_INTENT_RATIO * prediction.confidence)
+    ranked = sorted((i for i in SPECIALIST_INTENTS if prediction.scores.get(i, 0.0) >= floor),
+                    key=prediction.scores.get, reverse=True)
+    return ranked[:Config.MAX_PARALLEL_INTENTS] or [prediction.intent]
+
+
+def join_intents(intents: List[str]) -> str:
+    """The classification of a compound query: 'billing+network'."""
+    return MULTI_INTENT_SEPARATOR.join(intents)
+
+
+def split_intents(classification: str) -> List[str]:
+    return [i for i in classification.split(MULTI_INTENT_SEPARATOR) if i]
+
+
+def load_labelled_queries(path: Optional[str] = None) -> List[Tuple[str, str]]:
+    """Read (query, intent) pairs from the labelled CSV."""
+    with open(path or Config.INTENT_TRAINING_PATH, newline="", encoding="utf-8") as f:
+        return [(row["query"], row["intent"]) for row in csv.DictReader(f) if row["intent"] in INTENTS]
+
+
+_classifier: Optional[IntentClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> IntentClassifier:
+    """Train the classifier once per process and reuse it."""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier(load_labelled_queries())
+    return _classifier
+
+
+def _classification_messages(query: str):
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [
+        SystemMessage(content=(
+            "Classify the telecom customer query into exactly one of: "
+            f"{', '.join(INTENTS)}. Reply with the label only."
+        )),
+        HumanMessage(content=query),
+    ]
+
+
+def _parse_label(answer: str, default: str) -> str:
+    answer = answer.strip().lower()
+    for intent in INTENTS:
+        if intent in answer:
+            return intent
+    return default
+
+
+def llm_classify(query: str, default: str = "general") -> str:
+    """Ask the fast LLM for a label when the local model is unsure."""
+    try:
+        from utils.registry import get_llm
+
+        llm = get_llm(Config.FAST_LLM_MODEL, temperature=0)
+        answer = llm.invoke(_classification_messages(query)).content
+    except Exception as e:
+        print(f"LLM classification failed, keeping '{default}': {e}")
+        return default
+    return _parse_label(answer, default)
+
+
+async def allm_classify(query: str, default: str = "general") -> str:
+    """Async twin of llm_classify."""
+    try:
+        from utils.registry import get_llm
+
+        llm = get_llm(Config.FAST_LLM_MODEL, temperature=0)
+        answer = (await llm.ainvoke(_classification_messages(query))).content
+    except Exception as e:
+        print(f"LLM classification failed, keeping '{default}': {e}")
+        return default
+    return _parse_label(answer, default)
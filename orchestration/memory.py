@@ -0,0 +1,294 @@
+# orchestration/memory.py
+"""
+Bounded conversation memory, one per chat session.
+
+The full chat history is kept by the UI for display only; what reaches the
+graph (state["memory"]) is a compact snapshot that stays within
+MEMORY_TOKEN_BUDGET however long the conversation gets:
+
+    entities  what the conversation has established: region, device, the plan
+              being discussed (and the customer's own plan), last intent
+    summary   older turns, rolled up incrementally, a line per turn
+              ('extractive', no LLM call) or rewritten by the fast LLM ('llm')
+    recent    the last turns verbatim
+
+A follow-up ("what about last month?", "is it fixed yet?") that the local
+classifier cannot route on its own keeps the previous turn's intent instead
+of asking the LLM router, and its specialist gets the memory in front of the
+question. Other questions only carry the entities.
+
+    memory = ConversationMemory.for_customer("CUST001")
+    state["memory"] = memory.snapshot()
+    ...
+    memory.add_turn(query, answer)
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from config.config import Config
+from orchestration.intent_classifier import get_intent_classifier
+
+# Shares of the token budget: verbatim turns, summary; entities take the rest
+RECENT_SHARE = 0.6
+SUMMARY_SHARE = 0.3
+# One turn never takes more than this share of the budget verbatim
+TURN_SHARE = 0.25
+# Entities shown to the specialists, in this order
+CONTEXT_ENTITIES = ("region", "device", "plan")
+
+# Opens by referring back ("and ...", "is it ...", "that ..."); a pronoun later in the
+# question ("Is there an outage in Mumbai?", "Why is my bill still high?") does not count
+FOLLOW_UP_RE = re.compile(
+    r"^\s*(?:and|but|also|so|then|what about|how about|what if|same|ok(?:ay)?"
+    r"|(?:is|was|does|did|will|can|has)\s+(?:it|that|this|they)|it|that|this|those|they|them)\b"
+    r"|\b(?:again|last month|previous|the other one)\b",
+    re.IGNORECASE,
+)
+FOLLOW_UP_MAX_WORDS = 8
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s")
+
+
+def estimate_tokens(text: str) -> int:
+    """About four characters per token (no tokenizer download needed)."""
+    return len(text) // 4 + 1
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    max_chars = max(max_tokens, 1) * 4
+    return text if len(text) <= max_chars else text[:max_chars - 1].rstrip() + "…"
+
+
+def is_follow_up(query: str) -> bool:
+    """Short and referring back: 'what about last month?', 'is it fixed yet?'."""
+    return len(query.split()) <= FOLLOW_UP_MAX_WORDS and bool(FOLLOW_UP_RE.search(query))
+
+
+# --- 1. Entities ---
+
+_vocabularies: Dict[str, Dict[str, Dict[str, str]]] = {}
+_vocabulary_lock = threading.Lock()
+
+
+def _vocabulary() -> Dict[str, Dict[str, str]]:
+    """{entity: {lower-case phrase: canonical name}} from the database, loaded once per DB."""
+    vocabulary = _vocabularies.get(Config.DB_PATH)
+    if vocabulary is None:
+        from utils.database import get_known_locations, query_all
+
+        with _vocabulary_lock:
+            devices = {}
+            for make, model in query_all("SELECT DISTINCT device_make, device_model FROM device_compatibility"):
+                devices[f"{make} {model}".lower()] = f"{make} {model}"
+                if len(model) > 4:
+                    devices[model.lower()] = f"{make} {model}"
+            vocabulary = {
+                "region": {name.lower(): name for name in get_known_locations()},
+                "device": devices,
+                "plan": {name.lower(): name for (name,) in query_all("SELECT name FROM service_plans")},
+            }
+            _vocabularies[Config.DB_PATH] = vocabulary
+    return vocabulary
+
+
+def extract_entities(text: str) -> Dict[str, str]:
+    """Region, device and plan named in `text` (the longest match of each)."""
+    lowered = text.lower()
+    found = {}
+    for entity, phrases in _vocabulary().items():
+        for phrase in sorted(phrases, key=len, reverse=True):
+            if re.search(rf"\b{re.escape(phrase)}\b", lowered):
+                found[entity] = phrases[phrase]
+                break
+    return found
+
+
+# --- 2. Summaries ---
+
+def extractive_summary(previous: str, turns: List[Dict[str, str]], max_tokens: int) -> str:
+    """Append one line per rolled-off turn (its first sentence); drop the oldest lines past the budget."""
+    lines = previous.splitlines() if previous else []
+    for turn in turns:
+        first = _SENTENCE_RE.split(turn["content"].strip(), maxsplit=1)[0]
+        lines.append(f"{turn['role']}: {_clip(first, 40)}")
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return _clip("\n".join(lines), max_tokens)
+
+
+def llm_summary(previous: str, turns: List[Dict[str, str]], max_tokens: int) -> str:
+    """Fold the rolled-off turns into the running summary with the fast LLM (extractive on failure)."""
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from utils.registry import get_llm
+
+    transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+    try:
+        llm = get_llm(Config.FAST_LLM_MODEL, temperature=0)
+        summary = llm.invoke([
+            SystemMessage(content=(
+                f"Update the summary of a telecom support chat in at most {max_tokens * 3 // 4} words. "
+                "Keep facts the customer gave (location, device, plan, amounts, dates) and what was resolved."
+            )),
+            HumanMessage(content=f"Summary so far:\n{previous or '(none)'}\n\nNew turns:\n{transcript}"),
+        ]).content
+    except Exception as e:
+        print(f"   [Memory] LLM summary failed, summarising extractively: {e}")
+        return extractive_summary(previous, turns, max_tokens)
+    return _clip(summary.strip(), max_tokens)
+
+
+SUMMARIZERS = {"extractive": extractive_summary, "llm": llm_summary}
+
+
+# --- 3. Memory ---
+
+class ConversationMemory:
+    """Recent turns verbatim, older ones summarised, entities on the side; bounded by a token budget."""
+
+    def __init__(self, budget_tokens: Optional[int] = None, summary_mode: Optional[str] = None):
+        self.budget_tokens = budget_tokens or Config.MEMORY_TOKEN_BUDGET
+        self.summary_mode = summary_mode or Config.MEMORY_SUMMARY_MODE
+        if self.summary_mode not in SUMMARIZERS:
+            raise ValueError(f"Unknown summary mode '{self.summary_mode}', expected one of {tuple(SUMMARIZERS)}")
+        self.recent: List[Dict[str, str]] = []
+        self.summary = ""
+        self.entities: Dict[str, str] = {}
+        self.turns = 0
+
+    @classmethod
+    def for_customer(cls, customer_id: Optional[str], **kwargs) -> "ConversationMemory":
+        """A new session's memory, with the customer's own plan resolved up front."""
+        memory = cls(**kwargs)
+        if customer_id:
+            from utils.database import get_customer_summary
+            try:
+                summary = get_customer_summary(customer_id)
+            except Exception as e:
+                print(f"   [Memory] Customer plan unavailable: {e}")
+                summary = None
+            if summary is not None and summary.plan_name:
+                memory.entities["customer_plan"] = summary.plan_name
+        return memory
+
+    @classmethod
+    def from_history(cls, history: List[Dict[str, str]], **kwargs) -> "ConversationMemory":
+        """Rebuild from a full chat history ([{role, content}, ...], as sent by older API clients)."""
+        memory = cls(**kwargs)
+        for message in history:
+            memory.add(message.get("role", "user"), message.get("content", ""))
+        return memory
+
+    # Recording turns
+
+    def add_turn(self, query: str, answer: str):
+        self.add("user", query)
+        self.add("assistant", answer)
+
+    def add(self, role: str, content: str):
+        content = _clip(content.strip(), int(self.budget_tokens * TURN_SHARE))
+        if not content:
+            return
+        if role == "user":
+            self.entities.update(extract_entities(content))
+            prediction = get_intent_classifier().classify(content)
+            if prediction.confidence >= Config.INTENT_CONFIDENCE_THRESHOLD and prediction.intent != "general":
+                self.entities["intent"] = prediction.intent
+        self.recent.append({"role": role, "content": content})
+        self.turns += 1
+        self._roll_up()
+
+    def _roll_up(self):
+        """Move the oldest turns into the summary until the verbatim ones fit their share."""
+        recent_budget = int(self.budget_tokens * RECENT_SHARE)
+        rolled = []
+        while len(self.recent) > 1 and sum(estimate_tokens(t["content"]) for t in self.recent) > recent_budget:
+            rolled.append(self.recent.pop(0))
+        if rolled:
+            self.summary = SUMMARIZERS[self.summary_mode](self.summary, rolled,
+                                                          int(self.budget_tokens * SUMMARY_SHARE))
+
+    # Reading
+
+    @property
+    def last_intent(self) -> Optional[str]:
+        return self.entities.get("intent")
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.render())
+
+    def render(self, entities_only: bool = False, skip: Sequence[str] = ()) -> str:
+        """
+        The memory as prompt text: entities (except the `skip` types), then (unless
+        entities_only) summary and recent turns.
+        """
+        known = "; ".join(f"{name} {self.entities[name]}" for name in CONTEXT_ENTITIES
+                          if name in self.entities and name not in skip)
+        if entities_only:
+            return known
+        parts = [f"Known: {known}"] if known else []
+        if self.summary:
+            parts.append(f"Earlier in this conversation:\n{self.summary}")
+        if self.recent:
+            parts.append("Recent turns:\n" + "\n".join(f"{t['role']}: {t['content']}" for t in self.recent))
+        return "\n".join(parts)
+
+    # Compact per-session representation (graph state, API round trips)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"recent": list(self.recent), "summary": self.summary, "entities": dict(self.entities),
+                "turns": self.turns, "budget_tokens": self.budget_tokens}
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Optional[Dict[str, Any]], **kwargs) -> "ConversationMemory":
+        kwargs.setdefault("budget_tokens", (snapshot or {}).get("budget_tokens"))
+        memory = cls(**kwargs)
+        if snapshot:
+            memory.recent = [dict(t) for t in snapshot.get("recent", [])]
+            memory.summary = snapshot.get("summary", "")
+            memory.entities = dict(snapshot.get("entities", {}))
+            memory.turns = snapshot.get("turns", len(memory.recent))
+            memory._roll_up()
+        return memory
+
+
+# --- 4. What the graph reads ---
+
+def memory_of(state: dict) -> Optional[ConversationMemory]:
+    snapshot = state.get("memory")
+    return ConversationMemory.from_snapshot(snapshot) if snapshot else None
+
+
+def follow_up_intent(state: dict) -> Optional[str]:
+    """
+    The previous turn's intent if this query is a follow-up to it, else None.
+    Only asked when the query alone does not classify (see graph.classify_query).
+    """
+    memory = memory_of(state)
+    if memory is None or memory.last_intent is None or not is_follow_up(state["query"]):
+        return None
+    return memory.last_intent
+
+
+def memory_context(state: dict) -> Optional[str]:
+    """
+    What a specialist should know besides the question: the whole memory for a
+    follow-up, only the established entities otherwise. An entity the question
+    names itself ("Is there an outage in Delhi?") replaces the remembered one, so
+    the remembered one is left out. Part of the answer-cache key, since the same
+    words can mean different things in two conversations.
+    """
+    memory = memory_of(state)
+    if memory is None:
+        return None
+    named = extract_entities(state["query"])
+    return memory.render(entities_only=not state.get("follow_up"), skip=tuple(named)) or None
+
+
+def contextual_query(state: dict) -> str:
+    """The question as the specialist agents receive it."""
+    context = memory_context(state)
+    if not context:
+        return state["query"]
+    if state.get("follow_up"):
+        return f"{context}\n\nCurrent question: {state['query']}"
+    return f"{state['query']} ({context})"
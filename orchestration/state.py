@@ -1,5 +1,9 @@
 # orchestration/state.py
-from typing import TypedDict, Dict, Any, List, Optional
+from typing import Annotated, TypedDict, Dict, Any, List, Optional, Tuple
+
+def merge_responses(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Reducer for intermediate_responses: specialists running in parallel each add their own key."""
+    return {**(left or {}), **(right or {})}
 
 class TelecomAssistantState(TypedDict):
     """
@@ -8,7 +12,13 @@ class TelecomAssistantState(TypedDict):
     """
     query: str                          # The user's original question
     customer_info: Dict[str, Any]       # Email, ID, etc.
-    classification: str                 # 'billing', 'network', 'service', 'general'
-    intermediate_responses: Dict[str, Any] # Storage for agent outputs
+    classification: str                 # 'billing', 'network', 'service', 'general', or compound: 'billing+network'
+    intent_scores: Dict[str, float]     # Per-intent confidence from the local classifier
+    intermediate_responses: Annotated[Dict[str, Any], merge_responses] # Storage for agent outputs, one per intent
     final_response: str                 # The answer shown to the user
-    chat_history: List[Dict[str, str]]  # Previous conversation context
\ No newline at end of file
+    cache_key: Optional[Tuple]          # Answer-cache key (None if this answer is not cacheable)
+    cache_hit: bool                     # True when final_response came from the answer cache
+    chat_history: List[Dict[str, str]]  # Previous conversation context (unbounded; prefer memory)
+    memory: Dict[str, Any]              # Bounded conversation memory snapshot (orchestration/memory.py)
+    follow_up: bool                     # True when the query refers back to the conversation
+    request_id: Optional[str]           # Ties this request's tracing spans together (utils/tracing.py)
\ No newline at end of file
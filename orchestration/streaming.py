@@ -0,0 +1,136 @@
+# orchestration/streaming.py
+"""
+Streaming execution of the graph.
+
+Nodes report progress ("Routed to billing", "Checking outages in Mumbai") and
+non-LangChain tokens (LlamaIndex synthesis) through LangGraph's custom stream;
+LangChain chat models inside the specialist nodes stream their tokens through
+LangGraph's "messages" mode. stream_graph / astream_graph turn both into one
+sequence of StreamEvents and record time-to-first-token and total latency.
+"""
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Iterator, NamedTuple, Optional
+
+from langgraph.config import get_stream_writer
+
+from orchestration.intent_classifier import split_intents
+
+# Nodes whose model tokens belong to the answer (the router's LLM fallback does not)
+ANSWER_NODES = ("billing", "network", "service", "knowledge", "general")
+
+# Recent streamed runs, newest last: ttft_ms, total_ms, tokens, classification
+STREAM_LOG = deque(maxlen=1000)
+_log_lock = threading.Lock()
+
+
+class StreamEvent(NamedTuple):
+    kind: str            # 'progress', 'token' or 'done'
+    text: str
+    node: Optional[str] = None
+
+
+# --- Emitting from inside nodes and tools ---
+
+def _write(payload: dict):
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # Called outside a graph run (scripts, tests): nothing is listening
+        return
+    writer(payload)
+
+
+def emit_progress(text: str):
+    """Show a progress step in the UI while the graph is streaming; no-op otherwise."""
+    _write({"kind": "progress", "text": text})
+
+
+def emit_token(node: str, text: str):
+    """Stream answer text produced outside LangChain chat models (e.g. LlamaIndex)."""
+    if text:
+        _write({"kind": "token", "node": node, "text": text})
+
+
+# --- Consuming the graph stream ---
+
+STREAM_MODES = ["custom", "messages", "updates"]
+
+
+class _RunTracker:
+    """Turns raw (mode, payload) stream parts into StreamEvents and times the run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first_token_at = None
+        self.tokens = 0
+        self.final_response = ""
+        self.classification = None
+        self.compound = False  # several specialists answering at once: their tokens would interleave
+
+    def translate(self, mode: str, payload) -> Iterator[StreamEvent]:
+        if mode == "custom":
+            if payload.get("kind") == "token":
+                if not self.compound:
+                    yield self._token(payload["text"], payload.get("node"))
+            elif payload.get("kind") == "progress":
+                yield StreamEvent("progress", payload["text"])
+
+        elif mode == "messages":
+            chunk, metadata = payload
+            node = metadata.get("langgraph_node")
+            content = getattr(chunk, "content", None)
+            if node in ANSWER_NODES and isinstance(content, str) and content and not self.compound:
+                yield self._token(content, node)
+
+        elif mode == "updates":
+            for node, update in payload.items():
+                if not isinstance(update, dict):
+                    continue
+                if node == "classify_query":
+                    self.classification = update.get("classification")
+                    self.compound = len(split_intents(self.classification or "")) > 1
+                if node == "formulate_response":
+                    self.final_response = update.get("final_response", "")
+                    # Agents that cannot stream (CrewAI crew, AutoGen chat, cache hits) and
+                    # merged answers to compound queries arrive whole
+                    if self.tokens == 0 and self.final_response:
+                        yield self._token(self.final_response, self.classification)
+
+    def _token(self, text: str, node: Optional[str]) -> StreamEvent:
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.tokens += 1
+        return StreamEvent("token", text, node)
+
+    def finish(self) -> StreamEvent:
+        end = time.perf_counter()
+        record = {
+            "classification": self.classification,
+            "ttft_ms": round(((self.first_token_at or end) - self.started) * 1000, 1),
+            "total_ms": round((end - self.started) * 1000, 1),
+            "tokens": self.tokens,
+        }
+        with _log_lock:
+            STREAM_LOG.append(record)
+        print(f"   [Streaming] {record['classification']}: ttft={record['ttft_ms']}ms "
+              f"total={record['total_ms']}ms chunks={record['tokens']}")
+        return StreamEvent("done", self.final_response)
+
+
+def stream_graph(graph, state: dict) -> Iterator[StreamEvent]:
+    """Run the graph with graph.stream, yielding progress, answer tokens and a final 'done' event."""
+    tracker = _RunTracker()
+    for mode, payload in graph.stream(state, stream_mode=STREAM_MODES):
+        yield from tracker.translate(mode, payload)
+    yield tracker.finish()
+
+
+async def astream_graph(graph, state: dict) -> AsyncIterator[StreamEvent]:
+    """Async twin of stream_graph, over graph.astream."""
+    tracker = _RunTracker()
+    async for mode, payload in graph.astream(state, stream_mode=STREAM_MODES):
+        for event in tracker.translate(mode, payload):
+            yield event
+    yield tracker.finish()
@@ -0,0 +1,68 @@
+# test_ann_index.py
+import os
+
+import numpy as np
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+from utils.ann_index import IVFIndex
+from utils.vector_store import SIMPLE_STORE_NAME, NumpyVectorStore
+
+
+def clustered(count, dim=32, topics=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim))
+    return centers[rng.integers(0, topics, count)] + 0.6 * rng.normal(size=(count, dim))
+
+
+def top_ids(store, vector, k=5, **kwargs):
+    return store.query(VectorStoreQuery(query_embedding=list(vector), similarity_top_k=k), **kwargs).ids
+
+
+def test_probing_every_cell_is_exact_and_fewer_cells_scan_less():
+    vectors = clustered(3000)
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    ivf = IVFIndex.train(unit, nlist=30)
+    order = ivf.lay_out(ivf.assign(unit))
+    laid_out = unit[order].astype(np.float32)
+
+    for query in unit[:20]:
+        rows, scores = ivf.search(laid_out, query, nprobe=30)
+        assert sorted(rows.tolist()) == list(range(3000))
+        assert np.allclose(scores, laid_out[rows] @ query, atol=1e-5)
+        rows, _ = ivf.search(laid_out, query, nprobe=3)
+        assert len(rows) < 3000 / 3
+        assert np.argmax(laid_out @ query) in rows  # the query's own row sits in its nearest cell
+
+
+def test_store_persists_the_ivf_layout_and_inserts_incrementally(tmp_path):
+    vectors = clustered(4000, seed=1)
+    ids = [f"chunk-{i}" for i in range(4000)]
+    exact = NumpyVectorStore(ann_index="off")
+    exact.add_vectors(ids, vectors)
+    store = NumpyVectorStore(ann_index="ivf", ann_min_vectors=1000)
+    store.add_vectors(ids, vectors)
+    store.persist(str(tmp_path / SIMPLE_STORE_NAME))
+    assert store._ivf is not None and any(name.startswith("ivf-") for name in os.listdir(tmp_path))
+
+    queries = clustered(50, seed=2)
+    recall = np.mean([len(set(top_ids(store, q, nprobe=store._ivf.nlist)) & set(top_ids(exact, q))) / 5
+                      for q in queries])
+    assert recall == 1.0
+    assert np.mean([len(set(top_ids(store, q, nprobe=8)) & set(top_ids(exact, q))) / 5 for q in queries]) > 0.8
+
+    # Inserted after the layout: searchable at once, in its nearest cell
+    new = clustered(5, seed=3)
+    store.add_vectors([f"new-{i}" for i in range(5)], new)
+    assert [top_ids(store, v, k=1, nprobe=1)[0] for v in new] == [f"new-{i}" for i in range(5)]
+    store.delete_nodes(["new-0"])
+    assert "new-0" not in top_ids(store, new[0], nprobe=4)
+    # Restricted queries stay exact
+    restricted = VectorStoreQuery(query_embedding=list(new[1]), similarity_top_k=5, node_ids=["chunk-7", "new-1"])
+    assert store.query(restricted).ids == ["new-1", "chunk-7"]
+
+    store.persist(str(tmp_path / SIMPLE_STORE_NAME))
+    reloaded = NumpyVectorStore.from_persist_dir(str(tmp_path), ann_index="ivf")
+    assert reloaded._ivf.nlist == store._ivf.nlist and reloaded._ivf.offsets[-1] == 4004
+    assert top_ids(reloaded, new[2], k=1, nprobe=1) == ["new-2"]
+    assert NumpyVectorStore.from_persist_dir(str(tmp_path), ann_index="off")._ivf is None
+    assert len([n for n in os.listdir(tmp_path) if n.startswith(("ivf-", "vectors-"))]) == 2
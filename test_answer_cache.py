@@ -0,0 +1,62 @@
+# test_answer_cache.py
+import pytest
+
+from orchestration import graph
+from orchestration.answer_cache import AnswerCache, answer_key, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_keys_normalise_query_and_scope_by_customer():
+    assert normalize_query("  Is the internet DOWN in Mumbai?? ") == "is the internet down in mumbai"
+    # Generic intents share one entry across customers, personal ones do not
+    assert answer_key("Is the internet down?", "network", "CUST001") == answer_key("is the internet down", "network", "CUST002")
+    assert answer_key("Why is my bill high?", "billing", "CUST001") != answer_key("Why is my bill high?", "billing", "CUST002")
+    assert answer_key("tell me a joke", "general", "CUST001") is None
+
+
+def test_lru_and_ttl_eviction_with_counters():
+    clock = FakeClock()
+    cache = AnswerCache(max_entries=2, ttl_seconds=60, clock=clock)
+    cache.put(("a",), "A")
+    cache.put(("b",), "B")
+    assert cache.get(("a",)) == "A"       # 'a' is now most recent
+    cache.put(("c",), "C")                # evicts 'b'
+    assert cache.get(("b",)) is None
+
+    clock.now = 61
+    assert cache.get(("a",)) is None      # expired
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.expirations, stats.size) == (1, 2, 1, 1, 1)
+
+
+def test_near_duplicate_match_stays_within_intent_scope_and_version():
+    vectors = {"is the internet down in mumbai": [1.0, 0.0], "is mumbai internet down": [0.98, 0.2],
+               "why is my bill high": [0.0, 1.0]}
+    cache = AnswerCache(similarity_threshold=0.9, embed=vectors.__getitem__)
+    cache.put(("is the internet down in mumbai", "network", None, "v1"), "Outage in Mumbai")
+
+    assert cache.get(("is mumbai internet down", "network", None, "v1")) == "Outage in Mumbai"
+    assert cache.get(("is mumbai internet down", "network", None, "v2")) is None
+    assert cache.get(("why is my bill high", "network", None, "v1")) is None
+    assert cache.stats().near_hits == 1
+
+
+def test_repeated_question_skips_the_specialist(monkeypatch):
+    calls = []
+    monkeypatch.setattr(graph, "process_network_query", lambda q: calls.append(q) or "Outage in Mumbai, ETA 2h.")
+    monkeypatch.setattr(graph, "get_answer_cache", lambda cache=AnswerCache(): cache)
+
+    app = graph.create_graph()
+    for customer in ("CUST001", "CUST002"):
+        result = app.invoke({"query": "Is the internet down in Mumbai?", "customer_info": {"id": customer},
+                             "intermediate_responses": {}, "chat_history": []})
+        assert result["final_response"] == "Outage in Mumbai, ETA 2h."
+    assert len(calls) == 1 and result["cache_hit"]
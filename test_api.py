@@ -0,0 +1,79 @@
+# test_api.py
+import asyncio
+import time
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from api.server import create_app
+from orchestration import graph
+
+DELAY = 0.2
+
+
+# New conversations look up the customer's plan for their memory
+pytestmark = pytest.mark.usefixtures("telecom_db")
+
+
+class SlowEchoModel(BaseChatModel):
+    """Local stand-in LLM: echoes the question after a fixed 'network' delay."""
+    delay: float = DELAY
+
+    @property
+    def _llm_type(self):
+        return "slow-echo"
+
+    def _result(self, messages):
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"echo: {messages[-1].content}"))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.delay)
+        return self._result(messages)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self._result(messages)
+
+
+def ask_concurrently(monkeypatch, n, max_concurrency):
+    monkeypatch.setattr(graph, "get_llm", lambda *args, **kwargs: SlowEchoModel())
+
+    async def scenario():
+        async with TestClient(TestServer(create_app(graph.create_graph(), max_concurrency))) as client:
+            async def ask(i):
+                resp = await client.post("/query", json={"query": f"hello there {i}", "customer_id": "CUST001"})
+                return resp.status, await resp.json()
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(ask(i) for i in range(n)))
+            return results, time.perf_counter() - started
+    return asyncio.run(scenario())
+
+
+def test_concurrent_conversations_overlap_while_waiting_on_the_llm(monkeypatch):
+    results, elapsed = ask_concurrently(monkeypatch, n=6, max_concurrency=6)
+    assert all(status == 200 for status, _ in results)
+    assert [body["response"] for _, body in results] == [f"echo: hello there {i}" for i in range(6)]
+    assert results[0][1]["classification"] == "general"
+    assert results[0][1]["memory"]["recent"][-1] == {"role": "assistant", "content": "echo: hello there 0"}
+    assert elapsed < 3 * DELAY
+
+
+def test_concurrency_limit_queues_excess_requests(monkeypatch):
+    _, elapsed = ask_concurrently(monkeypatch, n=3, max_concurrency=1)
+    assert elapsed >= 3 * DELAY
+
+
+def test_rejects_invalid_requests():
+    async def scenario():
+        async with TestClient(TestServer(create_app(graph=object(), max_concurrency=2))) as client:
+            bad_json = await client.post("/query", data="not json")
+            empty = await client.post("/query", json={"query": "  "})
+            health = await (await client.get("/health")).json()
+            return bad_json.status, empty.status, health
+    bad_json, empty, health = asyncio.run(scenario())
+    assert (bad_json, empty) == (400, 400)
+    assert health == {"status": "ok", "in_flight": 0, "served": 0, "max_concurrency": 2}
@@ -0,0 +1,73 @@
+# test_batch_triage.py
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from orchestration.batch_triage import run_triage
+
+
+class StandInGraph:
+    """Answers instantly with a canned reply; fails for one chosen ticket text."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.queries = []
+        self._lock = threading.Lock()
+
+    def invoke(self, state):
+        with self._lock:
+            self.queries.append((state["query"], state["customer_info"]["id"]))
+        time.sleep(0.01)
+        if state["query"] == self.fail_on:
+            raise RuntimeError("LLM timeout")
+        return {**state, "classification": "general", "final_response": f"Draft for: {state['query']}"}
+
+
+@pytest.fixture
+def ticket_db(telecom_db):
+    conn = sqlite3.connect(telecom_db)
+    conn.executemany(
+        "INSERT INTO support_tickets (ticket_id, customer_id, issue_category, issue_description, "
+        "creation_time, status, priority) VALUES (?, 'CUST001', 'Network', ?, '2024-01-01', 'Open', 'High')",
+        [(f"TKT1{i:02d}", f"Issue number {i}") for i in range(20)],
+    )
+    conn.commit()
+    conn.close()
+    return telecom_db
+
+
+def results(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT ticket_id, status, draft_reply, latency_ms FROM ticket_triage ORDER BY ticket_id").fetchall()
+    conn.close()
+    return rows
+
+
+def test_triages_only_open_tickets_and_records_timings(ticket_db):
+    graph = StandInGraph()
+    report = run_triage(graph, workers=4, chunk_size=7)
+
+    # 20 new open tickets + TKT004 (In Progress) + TKT005 (Assigned); resolved ones are skipped
+    assert report.succeeded == 22 and report.failed == 0
+    assert report.tickets_per_minute > 0
+    rows = results(ticket_db)
+    assert len(rows) == 22 and all(status == "done" and latency >= 0 for _, status, _, latency in rows)
+    assert ("Request to reactivate suspended account", "CUST004") in graph.queries
+
+
+def test_resumes_after_interruption_without_redoing_work(ticket_db):
+    first = StandInGraph(fail_on="Issue number 3")
+    report = run_triage(first, workers=3, chunk_size=5, limit=10)
+    assert report.processed == 10 and report.failed == 1
+
+    second = StandInGraph()
+    report = run_triage(second, workers=3, chunk_size=5)
+    assert report.processed == 12
+    assert not {q for q, _ in first.queries} & {q for q, _ in second.queries}
+
+    retry = StandInGraph()
+    report = run_triage(retry, retry_errors=True)
+    assert retry.queries == [("Issue number 3", "CUST001")] and report.succeeded == 1
+    assert all(status == "done" for _, status, _, _ in results(ticket_db))
@@ -0,0 +1,87 @@
+# test_billing.py
+import asyncio
+import sqlite3
+import threading
+
+from config.config import Config
+from utils import tracing
+from utils.database import aget_bill_breakdown, get_bill_breakdown
+from utils.migrations import LATEST_VERSION, schema_version
+from utils.registry import clear_registry
+
+
+def test_bill_breakdown_matches_plan_and_usage(telecom_db):
+    breakdown = get_bill_breakdown("CUST002")
+
+    assert breakdown["plan_name"] == "Basic Plan"
+    assert breakdown["base_cost"] == 499
+    assert breakdown["estimated_total"] == 499
+    data = breakdown["allowances"]["data"]
+    assert data["limit"] == 1 and data["over_by"] == 0 and data["percent_used"] == 80.0
+
+
+def test_bill_breakdown_uses_latest_period_and_flags_overage(telecom_db):
+    conn = sqlite3.connect(telecom_db)
+    conn.execute(
+        "INSERT INTO customer_usage VALUES ('USG999', 'CUST002', '2023-06-01', '2023-06-30', 2.5, 90, 40, 150, 649)"
+    )
+    conn.commit()
+    conn.close()
+
+    breakdown = get_bill_breakdown("CUST002")
+    assert breakdown["billing_period_end"] == "2023-06-30"
+    assert breakdown["allowances"]["data"]["over_by"] == 1.5
+    assert breakdown["estimated_total"] == 649
+
+
+def test_bill_breakdown_unlimited_plan_has_no_limits(telecom_db):
+    breakdown = get_bill_breakdown("CUST004")
+    assert all(a["unlimited"] and a["over_by"] == 0 for a in breakdown["allowances"].values())
+
+
+def test_bill_breakdown_unknown_customer(telecom_db):
+    assert get_bill_breakdown("NOPE") is None
+
+
+def test_async_bill_breakdown_matches_sync(telecom_db):
+    for customer_id in ("CUST001", "CUST002", "NOPE"):
+        assert asyncio.run(aget_bill_breakdown(customer_id)) == get_bill_breakdown(customer_id)
+
+
+def test_async_bill_breakdown_migrates_and_is_traced_like_the_pool(telecom_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "TRACING_ENABLED", True)
+    monkeypatch.setattr(Config, "TRACE_PATH", str(tmp_path / "spans.jsonl"))
+    tracing.reset_tracing()
+    try:
+        assert asyncio.run(aget_bill_breakdown("CUST002"))["plan_name"] == "Basic Plan"
+        [sql] = [s for s in tracing.read_spans() if s["kind"] == "sql"]
+    finally:
+        tracing.reset_tracing()
+    assert (sql["name"], sql["attrs"]["rows"]) == ("SELECT customers", 1)
+    with sqlite3.connect(telecom_db) as conn:
+        assert schema_version(conn) == LATEST_VERSION
+
+
+def test_billing_agents_are_reused_across_threads(monkeypatch):
+    from agents import billing_agents
+
+    builds = []
+    monkeypatch.setattr(billing_agents, "_build_billing_agents", lambda: builds.append(1) or (object(), object()))
+    clear_registry()
+    used = []
+
+    def request():
+        # Streamlit runs every rerun (chat message) on a new thread
+        with billing_agents.get_billing_agents() as agents:
+            used.append(agents)
+
+    for _ in range(2):
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+    assert len(builds) == 1 and used[0] is used[1]
+
+    # Overlapping requests never share a pair
+    with billing_agents.get_billing_agents() as first, billing_agents.get_billing_agents() as second:
+        assert first is not second and len(builds) == 2
+    clear_registry()
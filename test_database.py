@@ -0,0 +1,87 @@
+# test_database.py
+import sqlite3
+import subprocess
+import sys
+import threading
+
+from config.config import Config
+from utils import db_pool
+from utils.database import (
+    Customer, get_active_incidents, get_all_support_tickets, get_customer_by_email,
+    get_customer_dashboard_data, get_customer_summary,
+)
+
+
+def test_point_lookups_return_slotted_records(telecom_db):
+    user = get_customer_by_email(" siva@example.com ")
+    assert isinstance(user, Customer) and not hasattr(user, "__dict__")
+    assert user.customer_id.startswith("CUST")
+
+    usage = get_customer_dashboard_data(user.customer_id)
+    assert usage.plan_name != "Unknown" and usage.data_used >= 0
+    assert get_customer_dashboard_data("NOPE") is None
+
+
+def test_queries_are_parameterised(telecom_db):
+    assert get_customer_by_email("' OR '1'='1") is None
+    assert get_active_incidents("%' OR status != 'Active") == []
+
+
+def test_active_incident_filter_matches_location_substring(telecom_db):
+    conn = sqlite3.connect(telecom_db)
+    conn.execute("UPDATE network_incidents SET status = 'Active' WHERE incident_id = 'INC001'")
+    conn.commit()
+    conn.close()
+
+    assert [i.incident_id for i in get_active_incidents("Mumbai")] == ["INC001"]
+    assert "INC001" in {i.incident_id for i in get_active_incidents()}
+    assert get_active_incidents("Atlantis") == []
+
+
+def test_customer_summary_reads_plan_limits(telecom_db):
+    summary = get_customer_summary("CUST002")
+    assert (summary.plan_name, summary.data_limit_gb, summary.data_used) == ("Basic Plan", 1, 0.8)
+    assert summary.data_percent_used == 80.0 and summary.billing_period_end == "2023-05-31"
+
+
+def test_customer_summary_refreshes_incrementally_on_writes(telecom_db):
+    get_customer_summary("CUST002")  # materialise
+    conn = sqlite3.connect(telecom_db)
+    conn.execute("INSERT INTO customer_usage VALUES ('USG999', 'CUST002', '2023-06-01', '2023-06-30', 2.5, 90, 40, 150, 649)")
+    conn.execute("INSERT INTO support_tickets (ticket_id, customer_id, issue_category, issue_description, "
+                 "creation_time, status, priority) VALUES ('TKT999', 'CUST002', 'Billing', 'x', '2023-06-02', 'Open', 'Low')")
+    conn.execute("UPDATE service_plans SET data_limit_gb = 5 WHERE plan_id = 'BASIC_100'")
+    conn.commit()
+    conn.close()
+
+    summary = get_customer_summary("CUST002")
+    assert summary.billing_period_end == "2023-06-30" and summary.data_used == 2.5
+    assert summary.data_limit_gb == 5 and summary.data_percent_used == 50.0
+    assert summary.open_tickets == 1
+
+
+def test_pool_reuses_tuned_connections_across_threads(telecom_db):
+    pool = db_pool.get_pool()
+    with pool.connection() as conn:
+        first = conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    seen = []
+    worker = threading.Thread(target=lambda: seen.append(get_customer_by_email("siva@example.com")))
+    worker.start()
+    worker.join()
+    assert seen[0] is not None
+    with pool.connection() as conn:
+        assert conn is first
+    assert pool._created == 1
+
+
+def test_ui_tables_still_come_back_as_dataframes(telecom_db):
+    tickets = get_all_support_tickets()
+    assert list(tickets.columns)[:2] == ["ticket_id", "customer_name"] and not tickets.empty
+
+
+def test_login_path_does_not_import_pandas():
+    code = "import sys; import utils.database; print('pandas' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=Config.BASE_DIR)
+    assert out.stdout.strip().splitlines()[-1] == "False", out.stderr
@@ -0,0 +1,58 @@
+# test_document_loader.py
+import os
+import shutil
+
+import pytest
+
+from config.config import Config
+from utils import document_loader
+
+
+@pytest.fixture
+def knowledge_dirs(tmp_path, monkeypatch, fresh_loader):
+    """Copies of the persisted store and documents, with an empty index cache."""
+    store = tmp_path / "vector_store"
+    docs = tmp_path / "documents"
+    shutil.copytree(Config.VECTOR_STORE_DIR, store)
+    shutil.copytree(Config.DOCS_DIR, docs)
+    monkeypatch.setattr(Config, "VECTOR_STORE_DIR", str(store))
+    monkeypatch.setattr(Config, "DOCS_DIR", str(docs))
+    return store, docs
+
+
+def test_index_is_loaded_once_while_unchanged(knowledge_dirs):
+    first = document_loader.get_knowledge_index()
+    assert document_loader.get_knowledge_index() is first
+    assert document_loader.get_query_engine(5) is document_loader.get_query_engine(5)
+
+
+def test_index_reloads_when_store_changes(knowledge_dirs):
+    store, _ = knowledge_dirs
+    first = document_loader.get_knowledge_index()
+    engine = document_loader.get_query_engine(5)
+    version = document_loader.get_index_version()
+
+    docstore = store / "docstore.json"
+    stats = os.stat(docstore)
+    os.utime(docstore, ns=(stats.st_atime_ns, stats.st_mtime_ns + 1_000_000_000))
+
+    assert document_loader.get_index_version() != version
+    assert document_loader.get_knowledge_index() is not first
+    assert document_loader.get_query_engine(5) is not engine
+
+
+def test_new_documents_are_indexed_by_reconcile_not_the_version_stamp(knowledge_base):
+    docs, _ = knowledge_base
+    (docs / "apn.txt").write_text("To set up APN on Android open Settings, Mobile Network, Access Point Names.")
+    index = document_loader.get_knowledge_index()
+    version = document_loader.get_index_version()
+
+    # Dropping a file in does not make the unsynced store look fresh
+    (docs / "new_policy.txt").write_text("Roaming packs now include 5G.")
+    assert document_loader.get_index_version() == version
+    assert document_loader.get_knowledge_index() is index
+
+    report = document_loader.reconcile_knowledge_base()
+    assert report.files_added == 1 and document_loader.get_index_version() != version
+    files = {n.metadata["file_name"] for n in document_loader.get_knowledge_index().docstore.docs.values()}
+    assert files == {"apn.txt", "new_policy.txt"}
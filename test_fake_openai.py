@@ -0,0 +1,58 @@
+# test_fake_openai.py
+import pytest
+from openai import OpenAI
+
+from utils.fake_openai import FakeOpenAI, FakeOpenAIServer
+from utils.registry import clear_registry
+
+LOOKUP_TOOL = {"type": "function", "function": {
+    "name": "check_network_status", "description": "Check for network outages in a region",
+    "parameters": {"type": "object", "properties": {"region": {"type": "string"}}, "required": ["region"]},
+}}
+
+
+@pytest.fixture
+def server():
+    with FakeOpenAIServer(FakeOpenAI(latency_ms=20, ms_per_token=1)) as running:
+        yield running
+
+
+def test_tool_call_round_trip(server):
+    client = OpenAI(base_url=server.base_url, api_key="sk-fake")
+    messages = [{"role": "user", "content": "Is there an outage in Pune?"}]
+
+    first = client.chat.completions.create(model="gpt-4o", messages=messages, tools=[LOOKUP_TOOL])
+    call = first.choices[0].message.tool_calls[0]
+    assert first.choices[0].finish_reason == "tool_calls"
+    assert call.function.name == "check_network_status" and call.function.arguments == '{"region": "Pune"}'
+
+    messages += [first.choices[0].message.model_dump(exclude_none=True),
+                 {"role": "tool", "tool_call_id": call.id, "content": "No active incidents in Pune."}]
+    second = client.chat.completions.create(model="gpt-4o", messages=messages, tools=[LOOKUP_TOOL])
+    assert second.choices[0].message.content == "Here is what I found: No active incidents in Pune."
+
+
+def test_streaming_matches_plain_reply_and_counts_simulated_time(server):
+    client = OpenAI(base_url=server.base_url, api_key="sk-fake")
+    messages = [{"role": "user", "content": "Tell me a joke"}]
+
+    plain = client.chat.completions.create(model="gpt-4o", messages=messages).choices[0].message.content
+    chunks = client.chat.completions.create(model="gpt-4o", messages=messages, stream=True)
+    streamed = "".join(c.choices[0].delta.content or "" for c in chunks if c.choices)
+    assert streamed == plain
+
+    words = len(plain.split())
+    assert server.fake.stats.snapshot() == {"completions": 2, "embeddings": 0, "simulated_ms": 2 * (20 + words)}
+
+
+def test_sql_agent_runs_end_to_end_offline(server, telecom_db, monkeypatch):
+    monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+    clear_registry()
+    try:
+        from agents.service_agents import process_service_query
+
+        answer = process_service_query("What is my current plan?", "CUST001")
+    finally:
+        clear_registry()
+    assert answer.startswith("Here is what I found") and "Standard Plan" in answer
+    assert server.fake.stats.completions == 2
@@ -0,0 +1,73 @@
+# test_geo_index.py
+import random
+import sqlite3
+
+import pytest
+
+from utils.geo_index import GeoIndex, haversine_km, prune_geo_changes
+from utils.migrations import migrate
+from utils.synthetic_data import generate_database
+
+
+@pytest.fixture
+def geo_db(telecom_db):
+    conn = sqlite3.connect(telecom_db)
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def test_nearest_towers_match_a_full_scan(tmp_path):
+    path = tmp_path / "synthetic.db"
+    generate_database(str(path), customers=20_000, months=1)
+    with sqlite3.connect(path) as conn:
+        index = GeoIndex().load(conn)
+    rng = random.Random(3)
+    towers = list(index.towers.values())
+    for _ in range(200):
+        lat, lon = rng.uniform(8, 30), rng.uniform(70, 90)
+        nearest = index.nearest_towers(lat, lon, k=3)
+        by_distance = sorted(towers, key=lambda t: haversine_km(lat, lon, t.latitude, t.longitude))
+        assert [n.tower.tower_id for n in nearest] == [t.tower_id for t in by_distance[:3]]
+
+    active = index.nearest_towers(19.07, 72.88, k=5, status="Active")
+    assert len(active) == 5 and all(n.tower.operational_status == "Active" for n in active)
+
+
+def test_places_resolve_by_name_postal_code_and_free_text(geo_db):
+    index = GeoIndex().load(geo_db)
+    assert [a.name for a in index.resolve("Mumbai-West")] == ["Mumbai West"]
+    assert [a.name for a in index.resolve("west mumbai")] == ["Mumbai West"]
+    assert [a.name for a in index.resolve("400050")] == ["Mumbai West"]
+    assert [a.name for a in index.resolve("no signal near 400050 since today")] == ["Mumbai West"]
+    assert {a.city for a in index.resolve("calls drop in mumbai")} == {"Mumbai"}
+    assert index.resolve("Atlantis") == []
+
+    status = index.coverage_at(19.0760, 72.8777)
+    assert status.area.name == "Mumbai West" and {c.technology for c in status.coverage} == {"4G", "5G"}
+
+
+def test_refresh_applies_only_the_changed_rows(geo_db):
+    index = GeoIndex().load(geo_db)
+    assert index.refresh(geo_db) == 0
+    assert all(s.area.name != "Mumbai West" for s in index.affected_areas())
+
+    geo_db.execute("UPDATE cell_towers SET operational_status = 'Offline' WHERE tower_id = 'TWR001'")
+    geo_db.execute("UPDATE network_incidents SET status = 'Active' WHERE location = 'Delhi West'")
+    geo_db.commit()
+    assert index.refresh(geo_db) == 2
+    (mumbai,) = index.status_of("Mumbai West")
+    assert [t.tower_id for t in mumbai.towers_down] == ["TWR001"]
+    (delhi,) = index.status_of("Delhi West")
+    assert [i.location for i in delhi.incidents] == ["Delhi West"]
+    assert index.nearest_towers(19.0760, 72.8777, k=1, status="Active")[0].tower.tower_id != "TWR001"
+
+    # Falling behind a pruned change log means a full reload, not a stale index
+    stale = GeoIndex().load(geo_db)
+    geo_db.execute("UPDATE network_incidents SET status = 'Resolved' WHERE location = 'Delhi West'")
+    geo_db.execute("UPDATE cell_towers SET operational_status = 'Active' WHERE tower_id = 'TWR001'")
+    prune_geo_changes(geo_db, keep=1)
+    geo_db.commit()
+    stale.refresh(geo_db)
+    assert stale.affected_areas() == GeoIndex().load(geo_db).affected_areas()
+    assert not stale.status_of("Delhi West")[0].incidents
@@ -0,0 +1,76 @@
+# test_ingestion.py
+import io
+import math
+
+from config.config import Config
+from utils import document_loader
+from utils.ingestion import IngestStats, parse_documents, save_upload
+from utils.knowledge_sync import NodeIds, load_manifest, plan_parse_tasks
+
+MANUAL_LINE = "Step {i}: on the {model} router, open Advanced, WAN and set the MTU to {mtu} before rebooting.\n"
+
+
+def write_manual(path, lines=3000):
+    path.write_text("".join(MANUAL_LINE.format(i=i, model=f"HX{i % 7}", mtu=1400 + i % 100) for i in range(lines)))
+    return path
+
+
+def test_upload_is_written_a_chunk_at_a_time(tmp_path):
+    data = bytes(range(256)) * 4000
+    upload = io.BytesIO(data)
+    upload.name = "../vendor_manual.pdf"
+    upload.size = len(data)
+    seen = []
+    stats = IngestStats(lambda stage, done, total: seen.append((stage, done, total)))
+
+    path = save_upload(upload, str(tmp_path / "documents"), chunk_bytes=64 * 1024, stats=stats)
+    assert path == str(tmp_path / "documents" / "vendor_manual.pdf")
+    assert open(path, "rb").read() == data
+    assert [p.name for p in (tmp_path / "documents").iterdir()] == ["vendor_manual.pdf"]
+
+    (upload_stage,) = stats.stages()
+    assert (upload_stage.items, upload_stage.units) == (math.ceil(len(data) / (64 * 1024)), len(data))
+    assert seen[-1] == ("upload", len(data), len(data)) and len(seen) == upload_stage.items
+
+
+def test_pool_parses_segments_like_a_single_process(tmp_path):
+    manual = write_manual(tmp_path / "router_manual.txt")
+    tasks = plan_parse_tasks(str(manual), segment_bytes=64 * 1024)
+    assert len(tasks) > 3 and tasks[0].start == 0 and tasks[-1].stop == manual.stat().st_size
+    assert all(a.stop == b.start for a, b in zip(tasks, tasks[1:]))
+
+    def parse(workers):
+        ids = NodeIds(str(manual))
+        return [(node.node_id, node.get_content()) for _, nodes in parse_documents(tasks, workers)
+                for node in ids.assign(nodes)]
+
+    in_process, pooled = parse(1), parse(2)
+    assert pooled == in_process
+    assert "".join(text for _, text in in_process).count("Step 2999:") == 1
+
+
+def test_sync_embeds_and_inserts_in_batches(knowledge_base, monkeypatch):
+    docs, _ = knowledge_base
+    monkeypatch.setattr(Config, "INGEST_SEGMENT_BYTES", 64 * 1024)
+    monkeypatch.setattr(Config, "INGEST_EMBED_BATCH", 16)
+    (docs / "faq.txt").write_text("Reset the router by holding the pin for ten seconds.")
+    document_loader.get_knowledge_index()
+
+    manual = write_manual(docs / "router_manual.txt")
+    stats = IngestStats()
+    report = document_loader.reconcile_knowledge_base(stats=stats)
+    chunks = report.nodes_inserted
+    by_stage = {s.stage: s for s in report.stages.stages()}
+    assert report.stages is stats and chunks > 16
+    assert by_stage["parse"].items == len(plan_parse_tasks(str(manual))) and by_stage["parse"].units == chunks
+    assert (by_stage["embed"].items, by_stage["index"].units) == (math.ceil(chunks / 16), chunks)
+    assert len(load_manifest(Config.VECTOR_STORE_DIR)["files"]["router_manual.txt"]["nodes"]) == chunks
+    assert len(document_loader.get_knowledge_index().docstore.docs) == chunks + 1
+
+    # Appending to a long manual re-parses it, but only the chunks of its last part change
+    with open(manual, "a") as f:
+        f.write("Appendix: factory defaults are restored from the Maintenance page.\n")
+    report = document_loader.reconcile_knowledge_base()
+    assert report.files_changed == 1 and 0 < report.nodes_inserted < chunks / 4
+    assert report.embeddings_computed == report.nodes_inserted
+    assert len(document_loader.get_knowledge_index().docstore.docs) == chunks + 1 + report.nodes_inserted - report.nodes_deleted
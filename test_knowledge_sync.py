@@ -0,0 +1,53 @@
+# test_knowledge_sync.py
+import pytest
+
+from utils import document_loader
+
+
+@pytest.fixture
+def knowledge_base(knowledge_base):
+    docs, _ = knowledge_base
+    (docs / "apn.txt").write_text("To set up APN on Android open Settings, Mobile Network, Access Point Names.")
+    (docs / "volte.txt").write_text("VoLTE can be enabled from Settings, Mobile Network, 4G Calling.")
+    return knowledge_base
+
+
+def test_reconcile_without_changes_is_a_no_op(knowledge_base):
+    _, embed_model = knowledge_base
+    index = document_loader.get_knowledge_index()
+    assert len(index.docstore.docs) == 2 and embed_model.calls == 2
+
+    report = document_loader.reconcile_knowledge_base()
+    assert not report.changed
+    assert embed_model.calls == 2
+
+
+def test_add_change_and_delete_touch_only_affected_nodes(knowledge_base):
+    docs, embed_model = knowledge_base
+    document_loader.get_knowledge_index()
+
+    (docs / "esim.txt").write_text("Activate an eSIM by scanning the QR code from your welcome email.")
+    report = document_loader.reconcile_knowledge_base()
+    assert (report.files_added, report.nodes_inserted, report.embeddings_computed) == (1, 1, 1)
+
+    (docs / "volte.txt").write_text("VoLTE is enabled by default on all 5G plans.")
+    report = document_loader.reconcile_knowledge_base()
+    assert (report.files_changed, report.nodes_inserted, report.nodes_deleted) == (1, 1, 1)
+
+    (docs / "apn.txt").unlink()
+    report = document_loader.reconcile_knowledge_base()
+    assert (report.files_removed, report.nodes_deleted, report.nodes_inserted) == (1, 1, 0)
+
+    index = document_loader.get_knowledge_index()
+    assert sorted(n.metadata["file_name"] for n in index.docstore.docs.values()) == ["esim.txt", "volte.txt"]
+    assert embed_model.calls == 4
+
+
+def test_rebuild_reuses_cached_embeddings(knowledge_base):
+    _, embed_model = knowledge_base
+    document_loader.get_knowledge_index()
+    assert embed_model.calls == 2
+
+    index = document_loader.get_knowledge_index(rebuild=True)
+    assert len(index.docstore.docs) == 2
+    assert embed_model.calls == 2
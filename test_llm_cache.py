@@ -0,0 +1,74 @@
+# test_llm_cache.py
+import json
+
+import httpx
+import openai
+import pytest
+from langchain_openai import ChatOpenAI
+
+from utils.llm_cache import CachingTransport, LLMCallCache
+
+
+def completion(content):
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+    }
+
+
+@pytest.fixture
+def api():
+    """Stand-in for the OpenAI endpoint that counts the calls reaching it."""
+    calls = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        calls.append(body)
+        return httpx.Response(200, json=completion(f"answer {len(calls)}"))
+
+    return httpx.MockTransport(handler), calls
+
+
+def chat(transport, temperature=0):
+    return ChatOpenAI(model="gpt-4o", temperature=temperature, api_key="sk-test", max_retries=0,
+                      http_client=httpx.Client(transport=transport))
+
+
+def test_record_then_replay_offline(tmp_path, api):
+    inner, calls = api
+    cache = LLMCallCache(str(tmp_path / "llm.db"))
+
+    recorded = chat(CachingTransport(cache, "record", inner)).invoke("Why is my bill high?").content
+    assert recorded == "answer 1" and len(calls) == 1
+
+    offline = httpx.MockTransport(lambda request: pytest.fail("replay must not reach the network"))
+    replay = chat(CachingTransport(cache, "replay", offline))
+    assert replay.invoke("Why is my bill high?").content == "answer 1"
+
+    with pytest.raises(openai.APIStatusError, match="cache miss"):
+        replay.invoke("Is the internet down?")
+
+
+def test_read_through_deduplicates_only_deterministic_calls(tmp_path, api):
+    inner, calls = api
+    transport = CachingTransport(LLMCallCache(str(tmp_path / "llm.db")), "read-through", inner)
+
+    llm = chat(transport)
+    assert llm.invoke("Plan options?").content == llm.invoke("Plan options?").content
+    assert len(calls) == 1
+
+    creative = chat(transport, temperature=0.7)
+    creative.invoke("Tell me a joke")
+    creative.invoke("Tell me a joke")
+    assert len(calls) == 3
+
+
+def test_key_covers_model_messages_and_temperature(tmp_path, api):
+    inner, calls = api
+    transport = CachingTransport(LLMCallCache(str(tmp_path / "llm.db")), "read-through", inner)
+    chat(transport).invoke("Plan options?")
+    chat(transport).invoke("Plan options for roaming?")
+    ChatOpenAI(model="gpt-3.5-turbo", temperature=0, api_key="sk-test",
+               http_client=httpx.Client(transport=transport)).invoke("Plan options?")
+    assert len(calls) == 3
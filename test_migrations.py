@@ -0,0 +1,73 @@
+# test_migrations.py
+import re
+import sqlite3
+
+import pytest
+
+from utils import database
+from utils.migrations import LATEST_VERSION, migrate, schema_version
+from utils.schema_cards import user_tables
+
+
+@pytest.fixture
+def migrated_db(telecom_db):
+    conn = sqlite3.connect(telecom_db)
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+# Every query path the app and agents run, with sample parameters
+QUERY_PATHS = {
+    "login": ("SELECT customer_id, name FROM customers WHERE email = ?", ("siva@example.com",)),
+    "summary": (f"SELECT {database.SUMMARY_COLUMNS} FROM customer_summary WHERE customer_id = ?", ("CUST001",)),
+    "bill_breakdown": (database.BILL_BREAKDOWN_QUERY, ("CUST001",)),
+    "active_incidents": (database.ACTIVE_INCIDENTS_QUERY, ()),
+    "incidents_at": (database.ACTIVE_INCIDENTS_AT_QUERY, (database.location_match_expression("Mumbai"),)),
+    "admin_tickets": (database.UNCLOSED_TICKETS_QUERY, ()),
+}
+
+
+def plan(conn, sql, params):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def test_migrations_are_versioned_and_idempotent(migrated_db):
+    assert schema_version(migrated_db) == LATEST_VERSION
+    assert migrate(migrated_db) == []
+    assert migrated_db.execute("SELECT COUNT(*) FROM customer_summary").fetchone()[0] == 5
+    tables = {name for (name,) in migrated_db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"geo_changes", "ticket_triage"} <= tables
+    assert not {"geo_changes", "ticket_triage"} & set(user_tables(migrated_db))
+
+
+@pytest.mark.parametrize("name", QUERY_PATHS)
+def test_query_paths_never_scan_a_whole_table(migrated_db, name):
+    steps = plan(migrated_db, *QUERY_PATHS[name])
+    # "SCAN t" alone is a full table scan; index and FTS5 scans name what they use
+    assert not [s for s in steps if re.fullmatch(r"SCAN \w+", s)], steps
+    assert not any("TEMP B-TREE" in s for s in steps), steps
+
+
+def test_admin_tickets_read_only_the_partial_index(migrated_db):
+    steps = plan(migrated_db, *QUERY_PATHS["admin_tickets"])
+    assert steps[0] == "SCAN t USING INDEX idx_support_tickets_unclosed_created"
+
+
+def test_fts_index_follows_incident_writes(migrated_db):
+    migrated_db.execute(
+        "INSERT INTO network_incidents (incident_id, incident_type, location, affected_services, start_time, "
+        "status, severity, description) VALUES ('INC900', 'Fiber Cut', 'Pune Camp', 'Data', "
+        "'2023-07-01 09:00:00', 'Active', 'High', 'Backhaul fiber cut')"
+    )
+    migrated_db.execute("UPDATE network_incidents SET status = 'Active', location = 'Navi Mumbai' "
+                        "WHERE incident_id = 'INC002'")
+    migrated_db.commit()
+
+    assert [i.incident_id for i in database.get_active_incidents("pune")] == ["INC900"]
+    assert [i.incident_id for i in database.get_active_incidents("Mumbai")] == ["INC002"]
+    assert database.get_active_incidents("Bangalore") == []
+
+    migrated_db.execute("DELETE FROM network_incidents WHERE incident_id = 'INC900'")
+    migrated_db.commit()
+    assert database.get_active_incidents("Pune") == []
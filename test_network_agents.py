@@ -0,0 +1,67 @@
+# test_network_agents.py
+import sqlite3
+
+import pytest
+
+from config.config import Config
+from utils.fake_openai import FakeOpenAI, FakeOpenAIServer
+from utils.registry import clear_registry
+
+
+@pytest.fixture
+def offline_network(telecom_db, monkeypatch):
+    """A fake LLM and a database copy where the Delhi West incident is active."""
+    with sqlite3.connect(telecom_db) as conn:
+        conn.execute("UPDATE network_incidents SET status = 'Active' WHERE location = 'Delhi West'")
+    monkeypatch.setenv("CREWAI_DISABLE_TELEMETRY", "true")
+    monkeypatch.setenv("OTEL_SDK_DISABLED", "true")
+    with FakeOpenAIServer(FakeOpenAI(latency_ms=0)) as server:
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        clear_registry()
+        yield server.fake
+        clear_registry()
+
+
+def test_region_is_the_most_specific_known_location(offline_network):
+    from agents.network_agents import extract_region
+
+    assert extract_region("internet is down in delhi west again") == "Delhi West"
+    assert extract_region("No signal at home in Mumbai") == "Mumbai"
+    assert extract_region("Calls drop near Pune station") == "Pune"
+    assert extract_region("my phone keeps losing signal") is None
+
+
+def test_active_outage_is_answered_without_any_llm_call(offline_network):
+    from agents.network_agents import process_network_query
+
+    answer = process_network_query("My internet is down in Delhi West", mode="pipeline")
+    assert "known network incident in Delhi West" in answer
+    assert offline_network.stats.completions == 0
+
+
+def test_pipeline_runs_engineer_then_support_without_speaker_selection(offline_network, monkeypatch):
+    from agents import network_agents
+    from agents.network_agents import get_network_agents, process_network_query
+
+    monkeypatch.setattr(network_agents, "search_documents", lambda *args, **kwargs: ("Restart the router.", None))
+    answer = process_network_query("My internet is very slow in Mumbai", mode="pipeline")
+    with get_network_agents("pipeline") as (_, groupchat, _):
+        pass  # the team that answered, back in the free list
+    speakers = [m["name"] for m in groupchat.messages]
+    assert speakers == ["User_Proxy", "Network_Engineer", "User_Proxy", "Network_Engineer",
+                        "Support_Specialist", "User_Proxy", "Support_Specialist"]
+    assert answer == groupchat.messages[-1]["content"]
+    # A tool call and a reply per agent; no "select the next role" calls
+    assert offline_network.stats.completions == 4
+
+
+def test_troubleshooting_search_reads_the_retrieval_mode_per_call(monkeypatch):
+    from agents import network_agents
+
+    modes = []
+    monkeypatch.setattr(network_agents, "search_documents",
+                        lambda query, similarity_top_k, mode: modes.append(mode) or ("Restart the router.", None))
+    monkeypatch.setattr(Config, "RETRIEVAL_MODE", "bm25")
+    network_agents.search_troubleshooting_guide("APN error")
+    network_agents.search_troubleshooting_guide("APN error", mode="vector")
+    assert modes == ["bm25", "vector"]
@@ -0,0 +1,44 @@
+# test_retrieval.py
+import pytest
+
+from utils import document_loader
+from utils.retrieval import BM25Index
+
+TEXTS = {
+    "apn": "To configure APN settings on Android open Settings, Mobile Network, Access Point Names.",
+    "volte": "VoLTE calling can be enabled from Settings, Mobile Network, 4G Calling.",
+    "billing": "How do I pay my bill? You can pay your bill online, and how late fees apply is explained here.",
+}
+
+
+def test_bm25_ranks_exact_terms_above_function_words():
+    bm25 = BM25Index.from_texts(TEXTS)
+    assert bm25.search("How do I configure APN settings", top_k=1)[0][0] == "apn"
+    assert bm25.search("error E-403 volte", top_k=1)[0][0] == "volte"
+    assert bm25.search("what is it") == []
+
+
+def test_bm25_round_trips_through_disk(tmp_path):
+    bm25 = BM25Index.from_texts(TEXTS)
+    path = str(tmp_path / "bm25.json")
+    bm25.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.signature == bm25.signature
+    assert loaded.search("late fees") == bm25.search("late fees")
+
+
+def test_bm25_mode_retrieves_without_embedding_the_query(knowledge_base, monkeypatch):
+    docs, embed_model = knowledge_base
+    for name, text in TEXTS.items():
+        (docs / f"{name}.txt").write_text(text)
+
+    engine = document_loader.get_query_engine(similarity_top_k=1, mode="bm25")
+    # Any query embedding would fail loudly
+    monkeypatch.setattr(type(embed_model), "_get_query_embedding", lambda self, q: pytest.fail("embedded"))
+    nodes = engine.retrieve("VoLTE 4G calling")
+    assert [n.node.metadata["file_name"] for n in nodes] == ["volte.txt"]
+
+    (docs / "esim.txt").write_text("Activate an eSIM by scanning the QR code.")
+    document_loader.reconcile_knowledge_base()
+    nodes = document_loader.get_query_engine(similarity_top_k=1, mode="bm25").retrieve("eSIM QR code")
+    assert [n.node.metadata["file_name"] for n in nodes] == ["esim.txt"]
@@ -0,0 +1,33 @@
+# test_schema_cards.py
+import sqlite3
+
+from utils.schema_cards import get_schema_cards, schema_context, tables_for
+
+
+def test_questions_are_scoped_to_their_tables():
+    assert tables_for("Which plan includes international roaming?")[0] == "service_plans"
+    assert tables_for("Is the Galaxy S21 compatible with 5G?") == ["device_compatibility"]
+    assert set(tables_for("How much data have I used on my plan?")) == {
+        "service_plans", "customer_summary", "customers", "customer_usage"}
+    assert tables_for("Hello") == ["customer_summary", "service_plans"]
+
+
+def test_cards_describe_keys_and_categories_but_not_fts_tables(telecom_db):
+    cards = get_schema_cards()
+    assert "network_incidents" in cards and not any("_fts" in table for table in cards)
+    assert "service_plan_id VARCHAR(50) -> service_plans.plan_id" in cards["customers"]
+    assert "account_status VARCHAR(20) [Active, Suspended]" in cards["customers"]
+
+    context = schema_context("Is the Galaxy S21 compatible with 5G?")
+    assert context.count("\n- ") == 1 and "device_compatibility(" in context
+
+
+def test_cards_are_cached_until_the_schema_changes(telecom_db):
+    first = get_schema_cards()
+    assert get_schema_cards() is first
+
+    conn = sqlite3.connect(telecom_db)
+    conn.execute("ALTER TABLE service_plans ADD COLUMN hotspot_gb INT")
+    conn.close()
+    rebuilt = get_schema_cards()
+    assert rebuilt is not first and "hotspot_gb INT" in rebuilt["service_plans"]
@@ -0,0 +1,97 @@
+# test_streaming.py
+import asyncio
+import time
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from orchestration import graph
+from orchestration.answer_cache import AnswerCache
+from orchestration.streaming import STREAM_LOG, emit_progress, emit_token, stream_graph
+
+
+def run(query, monkeypatch):
+    monkeypatch.setattr(graph, "get_answer_cache", lambda cache=AnswerCache(): cache)
+    state = {"query": query, "customer_info": {"id": "CUST001"}, "intermediate_responses": {}, "chat_history": []}
+    return list(stream_graph(graph.create_graph(), state))
+
+
+def tokens(events):
+    return [e.text for e in events if e.kind == "token"]
+
+
+def test_chat_model_tokens_stream_before_the_answer_completes(monkeypatch):
+    fake = GenericFakeChatModel(messages=iter([AIMessage(content="Hello! I can help with billing and plans.")]))
+    monkeypatch.setattr(graph, "get_llm", lambda *args, **kwargs: fake)
+
+    events = run("hello there", monkeypatch)
+    assert events[0] == ("progress", "Routed to general", None)
+    assert len(tokens(events)) > 1
+    assert "".join(tokens(events)) == events[-1].text == "Hello! I can help with billing and plans."
+    assert events[-1].kind == "done"
+
+
+def test_custom_tokens_and_progress_from_non_langchain_agents(monkeypatch):
+    def knowledge(query):
+        emit_progress("Searching the knowledge base")
+        for token in ("Restart ", "the ", "router."):
+            emit_token("knowledge", token)
+        return "Restart the router."
+    monkeypatch.setattr(graph, "process_knowledge_query", knowledge)
+
+    events = run("how do I configure APN settings according to the manual", monkeypatch)
+    assert ("progress", "Searching the knowledge base", None) in events
+    assert tokens(events) == ["Restart ", "the ", "router."]
+
+
+def test_blocking_agents_arrive_whole_and_latency_is_recorded(monkeypatch):
+    monkeypatch.setattr(graph, "process_network_query", lambda q: "Outage in Mumbai, ETA 2h.")
+
+    events = run("Is the internet down in Mumbai?", monkeypatch)
+    assert tokens(events) == ["Outage in Mumbai, ETA 2h."]
+    record = STREAM_LOG[-1]
+    assert record["classification"] == "network" and 0 <= record["ttft_ms"] <= record["total_ms"]
+
+
+def test_emitting_outside_a_graph_run_is_a_no_op():
+    emit_progress("nobody is listening")
+    emit_token("knowledge", "nor here")
+
+
+def test_compound_query_runs_specialists_in_parallel_and_merges_their_answers(monkeypatch):
+    def slow(answer):
+        def agent(*args):
+            time.sleep(0.5)
+            return answer
+        return agent
+    monkeypatch.setattr(graph, "process_billing_query", slow("Your bill includes a roaming charge."))
+    monkeypatch.setattr(graph, "process_network_query", slow("There is an outage in Mumbai."))
+
+    start = time.perf_counter()
+    events = run("my bill went up and my internet is slow", monkeypatch)
+    elapsed = time.perf_counter() - start
+    assert events[0] == ("progress", "Routed to network+billing", None)
+    assert events[-1].text == ("**Network**\nThere is an outage in Mumbai.\n\n"
+                               "**Billing**\nYour bill includes a roaming charge.")
+    assert tokens(events) == [events[-1].text]
+    assert elapsed < 0.9  # the slower branch, not the sum of both
+
+
+def test_async_graph_fans_out_too(monkeypatch):
+    async def billing(query, customer_id):
+        await asyncio.sleep(0.3)
+        return "Billing answer."
+    async def network(query):
+        await asyncio.sleep(0.3)
+        return "Network answer."
+    monkeypatch.setattr(graph, "aprocess_billing_query", billing)
+    monkeypatch.setattr(graph, "aprocess_network_query", network)
+    monkeypatch.setattr(graph, "get_answer_cache", lambda cache=AnswerCache(): cache)
+
+    state = {"query": "I was double charged and my calls keep dropping", "customer_info": {"id": "CUST001"},
+             "intermediate_responses": {}, "chat_history": []}
+    start = time.perf_counter()
+    result = asyncio.run(graph.create_graph().ainvoke(state))
+    assert time.perf_counter() - start < 0.55
+    assert result["intermediate_responses"] == {"billing": "Billing answer.", "network": "Network answer."}
+    assert result["final_response"].startswith("**Billing**\nBilling answer.")
@@ -0,0 +1,96 @@
+# test_tracing.py
+import asyncio
+import os
+
+import httpx
+import pytest
+from openai import OpenAI
+
+from config.config import Config
+from utils import tracing
+from utils.fake_openai import FakeOpenAI, FakeOpenAIServer
+
+
+@pytest.fixture(autouse=True)
+def trace_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "TRACING_ENABLED", True)
+    monkeypatch.setattr(Config, "TRACE_PATH", str(tmp_path / "traces" / "spans.jsonl"))
+    tracing.reset_tracing()
+    yield Config.TRACE_PATH
+    tracing.reset_tracing()
+
+
+def classify(state):
+    with tracing.span("sql", "SELECT customer_summary") as attrs:
+        attrs["rows"] = 1
+    return {**state, "classification": "billing"}
+
+
+async def abilling(state):
+    await asyncio.to_thread(tracing.record, "tool", "Search Telecom Database", 12.5)
+    return {**state, "final_response": "done"}
+
+
+def test_node_spans_share_a_request_id_and_nest_their_children():
+    state = tracing.traced_node("classify_query", classify)({"query": "Why is my bill high?", "customer_info": {}})
+    state = asyncio.run(tracing.atraced_node("billing", abilling)(state))
+
+    spans = {s["name"]: s for s in tracing.read_spans()}
+    assert {s["request_id"] for s in spans.values()} == {state["request_id"]}
+    assert spans["SELECT customer_summary"]["parent_id"] == spans["classify_query"]["span_id"]
+    assert spans["Search Telecom Database"]["parent_id"] == spans["billing"]["span_id"]
+    assert spans["classify_query"]["attrs"] == {"query": "Why is my bill high?", "customer_id": None,
+                                                "classification": "billing"}
+
+    [request] = tracing.slowest_requests(list(spans.values()))
+    assert request["route"] == "billing" and request["query"] == "Why is my bill high?"
+    summary = {(r["kind"], r["name"]): r for r in tracing.latency_summary(list(spans.values()))}
+    assert summary[("tool", "Search Telecom Database")]["p95_ms"] == 12.5
+
+
+def test_llm_calls_are_timed_with_token_counts_streamed_or_not():
+    with FakeOpenAIServer(FakeOpenAI(latency_ms=5)) as server:
+        http_client = httpx.Client(transport=tracing.TracingTransport())
+        client = OpenAI(base_url=server.base_url, api_key="sk-fake", http_client=http_client)
+        messages = [{"role": "user", "content": "Tell me a joke"}]
+        with tracing.request_scope("req-1"):
+            client.chat.completions.create(model="gpt-4o", messages=messages)
+            stream = client.chat.completions.create(model="gpt-4o", messages=messages, stream=True,
+                                                    stream_options={"include_usage": True})
+            for _ in stream:
+                pass
+
+    plain, streamed = tracing.read_spans()
+    for s in (plain, streamed):
+        assert (s["kind"], s["name"], s["request_id"], s["status"]) == ("llm", "chat.completions", "req-1", "ok")
+        assert s["attrs"]["total_tokens"] == s["attrs"]["prompt_tokens"] + s["attrs"]["completion_tokens"] > 0
+    assert streamed["attrs"]["stream"] and "ttfb_ms" in streamed["attrs"]
+    assert streamed["attrs"]["completion_tokens"] == plain["attrs"]["completion_tokens"]
+
+
+def test_rotated_files_are_read_back_in_order(trace_file, monkeypatch):
+    monkeypatch.setattr(Config, "TRACE_MAX_BYTES", 2000)
+    for i in range(60):
+        tracing.record("sql", f"q{i}", float(i))
+
+    assert os.path.exists(f"{trace_file}.1")
+    names = [s["name"] for s in tracing.read_spans()]
+    assert names == [f"q{i}" for i in range(60 - len(names), 60)] and len(names) > 20
+
+
+def test_disabled_tracing_writes_nothing(trace_file, monkeypatch):
+    monkeypatch.setattr(Config, "TRACING_ENABLED", False)
+    with tracing.span("node", "general"):
+        tracing.record("llm", "chat.completions", 5.0)
+    assert not os.path.exists(trace_file)
+
+
+def test_summaries_of_a_trace_without_node_spans_are_empty():
+    # A fresh admin session: the Support Tickets tab has written SQL spans, no chat has run yet
+    tracing.record("sql", "SELECT support_tickets", 3.0)
+    spans = tracing.read_spans()
+
+    assert tracing.latency_summary(spans, kinds=("node",)) == []
+    assert tracing.slowest_requests(spans) == []
+    [sql] = tracing.latency_summary(spans, kinds=("llm", "tool", "sql", "retrieval"))
+    assert (sql["kind"], sql["count"]) == ("sql", 1)
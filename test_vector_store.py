@@ -0,0 +1,100 @@
+# test_vector_store.py
+import os
+import shutil
+
+import numpy as np
+import pytest
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.simple import SimpleVectorStore
+from llama_index.core.vector_stores.types import (
+    ExactMatchFilter, MetadataFilters, VectorStoreQuery,
+)
+
+from config.config import Config
+from utils import document_loader
+from utils.vector_store import SIMPLE_STORE_NAME, TABLE_NAME, NumpyVectorStore
+
+
+def make_nodes(count, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return [TextNode(text=f"chunk {i}", id_=f"node-{i}", embedding=rng.normal(size=dim).tolist(),
+                     metadata={"file_name": f"doc{i % 4}.txt"}) for i in range(count)]
+
+
+def queries(count, dim=16, seed=1, **kwargs):
+    rng = np.random.default_rng(seed)
+    return [VectorStoreQuery(query_embedding=rng.normal(size=dim).tolist(), **kwargs) for _ in range(count)]
+
+
+def assert_same_results(store, reference, query_list):
+    for query in query_list:
+        ours, expected = store.query(query), reference.query(query)
+        assert ours.ids == expected.ids
+        assert np.allclose(ours.similarities, expected.similarities, atol=1e-5)
+
+
+def test_top_k_matches_the_simple_store():
+    nodes = make_nodes(500)
+    store, reference = NumpyVectorStore(), SimpleVectorStore()
+    for i in range(0, 500, 128):
+        store.add(nodes[i:i + 128])
+        reference.add(nodes[i:i + 128])
+    for target in (store, reference):
+        target.delete_nodes([f"node-{i}" for i in range(0, 500, 7)])
+        target.add(make_nodes(3, seed=9))  # node-0..2 again: replaced, not duplicated
+
+    assert store.count() == len(reference.data.embedding_dict)
+    assert_same_results(store, reference, queries(20, similarity_top_k=5))
+    assert_same_results(store, reference, queries(5, similarity_top_k=3, node_ids=[f"node-{i}" for i in range(50)]))
+    filters = MetadataFilters(filters=[ExactMatchFilter(key="file_name", value="doc1.txt")])
+    assert_same_results(store, reference, queries(5, similarity_top_k=4, filters=filters))
+
+
+def test_persisted_store_is_memory_mapped_and_compacted(tmp_path):
+    nodes = make_nodes(300)
+    store, reference = NumpyVectorStore(), SimpleVectorStore()
+    store.add(nodes)
+    reference.add(nodes)
+    store.delete_nodes(["node-5", "node-6"])
+    reference.delete_nodes(["node-5", "node-6"])
+    store.persist(str(tmp_path / SIMPLE_STORE_NAME))
+
+    loaded = NumpyVectorStore.from_persist_dir(str(tmp_path))
+    assert isinstance(loaded._vectors, np.memmap) and loaded._vectors.shape == (298, 16)
+    assert loaded._ids is None  # ids are read for the top-k rows only
+    assert_same_results(loaded, reference, queries(10, similarity_top_k=5))
+
+    # Nodes are rebuilt from the side table, without their text
+    [node] = loaded.get_nodes(["node-7"])
+    expected = np.array(nodes[7].embedding) / np.linalg.norm(nodes[7].embedding)
+    assert node.metadata == {"file_name": "doc3.txt"} and np.allclose(node.embedding, expected, atol=1e-6)
+    doc1 = MetadataFilters(filters=[ExactMatchFilter(key="file_name", value="doc1.txt")])
+    assert len(loaded.get_nodes(filters=doc1)) == 74  # node-5 was deleted
+
+    # A second generation replaces the first; the old vectors file is removed
+    loaded.add(make_nodes(1, seed=4)[:1])
+    reference.add(make_nodes(1, seed=4)[:1])
+    loaded.persist(str(tmp_path / SIMPLE_STORE_NAME))
+    assert sorted(n for n in os.listdir(tmp_path) if n.endswith(".npy")) == [os.path.basename(loaded._vectors.filename)]
+    assert_same_results(NumpyVectorStore.from_persist_dir(str(tmp_path)), reference, queries(10, similarity_top_k=5))
+
+
+def test_json_store_is_converted_on_first_load(tmp_path, monkeypatch, fresh_loader):
+    store_dir = tmp_path / "vector_store"
+    shutil.copytree(Config.VECTOR_STORE_DIR, store_dir)
+    for name in os.listdir(store_dir):
+        if name.endswith(".npy") or name == TABLE_NAME:
+            os.remove(store_dir / name)
+    monkeypatch.setattr(Config, "VECTOR_STORE_DIR", str(store_dir))
+    monkeypatch.setattr(Config, "VECTOR_STORE_BACKEND", "numpy")
+
+    index = document_loader.get_knowledge_index()
+    assert isinstance(index.vector_store, NumpyVectorStore) and (store_dir / TABLE_NAME).exists()
+    assert document_loader.get_knowledge_index() is index
+
+    reference = SimpleVectorStore.from_persist_path(str(store_dir / SIMPLE_STORE_NAME))
+    assert index.vector_store.count() == len(reference.data.embedding_dict) == len(index.docstore.docs)
+    query_list = [VectorStoreQuery(query_embedding=embedding, similarity_top_k=3)
+                  for embedding in reference.data.embedding_dict.values()]
+    assert_same_results(index.vector_store, reference, query_list)
+    assert [index.vector_store.query(q).ids[0] for q in query_list] == list(reference.data.embedding_dict)
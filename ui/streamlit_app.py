@@ -8,6 +8,8 @@ from utils.document_loader import list_documents
 sys.path.append(str(Path(__file__).parent.parent))
 
 from orchestration.graph import create_graph
+from orchestration.memory import ConversationMemory
+from orchestration.streaming import stream_graph
 from utils.database import (
     get_customer_dashboard_data, 
     get_network_dashboard_data, 
@@ -15,30 +17,55 @@ from utils.database import (
     get_all_support_tickets
 )
 from utils.document_loader import add_document_to_knowledge_base
+from utils.geo_index import get_affected_areas_data, get_tower_map_data
+from utils.tracing import latency_summary, read_spans, slowest_requests
 
 # Page Config
 st.set_page_config(page_title="Telecom Super-Agent", page_icon="📡", layout="wide")
 
+@st.cache_resource
+def get_graph():
+    """One compiled graph (and its agent registry) shared by every session"""
+    return create_graph()
+
 # State Management
 if "authenticated" not in st.session_state: st.session_state.authenticated = False
 if "user_role" not in st.session_state: st.session_state.user_role = None # 'customer' or 'admin'
-if "chat_history" not in st.session_state: st.session_state.chat_history = []
-if "graph" not in st.session_state: st.session_state.graph = create_graph()
+if "chat_history" not in st.session_state: st.session_state.chat_history = [] # display only
+if "memory" not in st.session_state: st.session_state.memory = None # bounded, what the graph sees
 
 # --- HELPER FUNCTIONS ---
-def process_query(query: str):
+def build_initial_state(query: str):
     user_id = st.session_state.get("customer_id", "CUST_001")
-    initial_state = {
+    return {
         "query": query,
         "customer_info": {"id": user_id},
         "classification": "",
         "intermediate_responses": {},
         "final_response": "",
-        "chat_history": st.session_state.chat_history
+        "chat_history": [],
+        "memory": get_memory().snapshot(),
     }
-    result = st.session_state.graph.invoke(initial_state)
+
+def get_memory() -> ConversationMemory:
+    if st.session_state.memory is None:
+        st.session_state.memory = ConversationMemory.for_customer(st.session_state.get("customer_id"))
+    return st.session_state.memory
+
+def process_query(query: str):
+    result = get_graph().invoke(build_initial_state(query))
     return result["final_response"]
 
+def stream_query(query: str, status):
+    """Yields answer tokens for st.write_stream, showing progress steps in `status`."""
+    for event in stream_graph(get_graph(), build_initial_state(query)):
+        if event.kind == "progress":
+            status.update(label=event.text)
+            status.write(event.text)
+        elif event.kind == "token":
+            yield event.text
+    status.update(label="Done", state="complete")
+
 # --- SIDEBAR (Dual Login) ---
 with st.sidebar:
     st.title("📡 Teleserve AI")
@@ -54,8 +81,8 @@ with st.sidebar:
                 if user:
                     st.session_state.authenticated = True
                     st.session_state.user_role = "customer"
-                    st.session_state.customer_id = user['customer_id']
-                    st.session_state.customer_name = user['name']
+                    st.session_state.customer_id = user.customer_id
+                    st.session_state.customer_name = user.name
                     st.rerun()
                 else:
                     st.error("Email not found.")
@@ -81,6 +108,7 @@ with st.sidebar:
             st.session_state.authenticated = False
             st.session_state.user_role = None
             st.session_state.chat_history = []
+            st.session_state.memory = None
             st.rerun()
 
 # --- MAIN APP ---
@@ -98,20 +126,32 @@ if st.session_state.authenticated:
                 st.session_state.chat_history.append({"role": "user", "content": prompt})
                 st.chat_message("user").write(prompt)
                 with st.chat_message("assistant"):
-                    with st.spinner("Processing..."):
-                        response = process_query(prompt)
-                        st.write(response)
+                    status = st.status("Processing...", expanded=False)
+                    response = st.write_stream(stream_query(prompt, status))
                 st.session_state.chat_history.append({"role": "assistant", "content": response})
+                get_memory().add_turn(prompt, response)
 
         with tab2:
             st.subheader("Real-Time Usage")
             data = get_customer_dashboard_data(st.session_state.customer_id)
             if data:
                 col1, col2, col3 = st.columns(3)
-                col1.metric("Data Used", f"{data['data_used']} GB", "Limit: 100 GB")
-                col2.metric("Voice", f"{data['voice_used']} Mins")
-                col3.metric("SMS", f"{data['sms_used']}")
-                st.info(f"Current Plan: **{data['plan_name']}**")
+                data_limit = f"Limit: {data.data_limit_gb} GB" if data.data_limit_gb is not None else "Unlimited"
+                col1.metric("Data Used", f"{data.data_used} GB", data_limit, delta_color="off")
+                col2.metric("Voice", f"{data.voice_used} Mins",
+                            f"of {data.voice_minutes}" if data.voice_minutes is not None else "Unlimited",
+                            delta_color="off")
+                col3.metric("SMS", f"{data.sms_used}",
+                            f"of {data.sms_count}" if data.sms_count is not None else "Unlimited",
+                            delta_color="off")
+                if data.data_percent_used is not None:
+                    st.progress(min(data.data_percent_used, 100) / 100,
+                                text=f"{data.data_percent_used}% of data allowance used")
+                if data.billing_period_end:
+                    st.caption(f"Billing period {data.billing_period_start} to {data.billing_period_end}")
+                st.info(f"Current Plan: **{data.plan_name or 'Unknown'}**")
+                if data.open_tickets:
+                    st.warning(f"You have {data.open_tickets} open support ticket(s).")
 
         with tab3:
             st.subheader("Network Status Map")
@@ -126,7 +166,7 @@ if st.session_state.authenticated:
         st.title("🛡️ Admin Dashboard")
         
         # ADDED "Network Monitoring" to tabs
-        tab1, tab2, tab3 = st.tabs(["📚 Knowledge Base", "🎫 Support Tickets", "📡 Network Monitoring"])
+        tab1, tab2, tab3, tab4 = st.tabs(["📚 Knowledge Base", "🎫 Support Tickets", "📡 Network Monitoring", "⏱️ Latency"])
         
         # --- TAB 1: KNOWLEDGE BASE ---
         with tab1:
@@ -152,7 +192,16 @@ if st.session_state.authenticated:
                 if uploaded_file is not None:
                     if st.button("Process & Add", type="primary"):
                         with st.spinner("Indexing document..."):
-                            success, msg = add_document_to_knowledge_base(uploaded_file)
+                            bar = st.progress(0.0, text="Uploading...")
+
+                            def show_progress(stage, done, total):
+                                if total:
+                                    bar.progress(min(done / total, 1.0), text=f"{stage.title()}: {done:,}/{total:,}")
+                                else:
+                                    bar.progress(1.0, text=f"{stage.title()}: {done:,} chunks")
+
+                            success, msg = add_document_to_knowledge_base(uploaded_file, progress=show_progress)
+                            bar.empty()
                             if success:
                                 st.success(msg)
                                 st.rerun() # Refresh to show the new file in the list
@@ -223,6 +272,53 @@ if st.session_state.authenticated:
                 )
             else:
                 st.success("✅ All Network Systems Operational. No records in 'network_incidents' table with status='Active'.")
+
+            # 5. Towers and affected areas (in-memory geo index, see utils/geo_index.py)
+            st.markdown("### 🗼 Towers & Affected Areas")
+            map_col, areas_col = st.columns([3, 2])
+            with map_col:
+                st.map(get_tower_map_data(), latitude="latitude", longitude="longitude", color="color")
+            with areas_col:
+                areas = get_affected_areas_data()
+                if not areas.empty:
+                    st.dataframe(areas, use_container_width=True, hide_index=True)
+                else:
+                    st.success("Every tower is active and no area has an incident.")
+
+        # --- TAB 4: LATENCY (tracing spans, see utils/tracing.py) ---
+        with tab4:
+            st.subheader("Where Requests Spend Their Time")
+            spans = read_spans()
+
+            if spans:
+                # 1. Per-node latency
+                nodes = pd.DataFrame(latency_summary(spans, kinds=("node",)))
+                requests = slowest_requests(spans, n=20)
+                m1, m2, m3 = st.columns(3)
+                m1.metric("Traced Requests", len({s["request_id"] for s in spans if s["kind"] == "node"}))
+                m2.metric("LLM Calls", sum(s["kind"] == "llm" for s in spans))
+                m3.metric("Slowest Request", f"{requests[0]['total_ms'] / 1000:.1f} s" if requests else "-")
+
+                st.markdown("### Graph Nodes (p50 / p95)")
+                if not nodes.empty:
+                    st.bar_chart(nodes.set_index("name")[["p50_ms", "p95_ms"]])
+                    st.dataframe(nodes, use_container_width=True, hide_index=True)
+                else:
+                    st.info("No graph-node spans yet. They are written once a chat query runs.")
+
+                # 2. LLM calls, tools, SQL and retrieval
+                st.markdown("### LLM Calls, Tools, SQL & Retrieval")
+                calls = pd.DataFrame(latency_summary(spans, kinds=("llm", "tool", "sql", "retrieval")))
+                if not calls.empty:
+                    st.dataframe(calls, use_container_width=True, hide_index=True)
+                else:
+                    st.info("No LLM, tool, SQL or retrieval spans yet.")
+
+                # 3. Slowest recent requests
+                st.markdown("### 🐢 Slowest Recent Requests")
+                st.dataframe(pd.DataFrame(requests), use_container_width=True, hide_index=True)
+            else:
+                st.info("No traces yet. Spans are written while TRACING_ENABLED is on.")
             
 else:
     st.title("Telecom Service Assistant")
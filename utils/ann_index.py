@@ -0,0 +1,151 @@
+# utils/ann_index.py
+"""
+IVF (inverted file) approximate nearest-neighbour index, pure NumPy.
+
+Spherical k-means splits the unit vectors into `nlist` cells. A query scores
+the cell centroids, then only the rows of its `nprobe` best cells:
+
+    nlist   more cells = fewer rows per probe (faster), more chance the true
+            neighbour sits in a cell that was not probed (lower recall)
+    nprobe  cells searched per query: recall rises towards exact search,
+            latency rises linearly
+
+The vector store (utils/vector_store.py) writes persisted rows grouped by
+cell, so each probed cell is one contiguous slice of the memory-mapped
+matrix (`offsets`). Rows inserted since the last persist are assigned to
+their nearest cell on insert and kept in per-cell `pending` lists until the
+next persist lays them out too. Centroids are kept across persists and
+retrained once the corpus has grown RETRAIN_GROWTH times.
+
+benchmarks/ann_recall.py measures recall against latency to pick the settings.
+"""
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Rows scored against the centroids per step (bounds the temporary score matrix)
+ASSIGN_BLOCK_ROWS = 8192
+KMEANS_ITERATIONS = 10
+# Training uses at most this many rows per cell (k-means cost is sample x nlist x dim per iteration)
+TRAIN_ROWS_PER_CELL = 64
+RETRAIN_GROWTH = 2.0
+
+
+def auto_nlist(rows: int) -> int:
+    """About sqrt(n) cells: a few hundred rows per cell, and k-means that trains in seconds on one core."""
+    return max(1, min(rows, int(math.sqrt(rows))))
+
+
+class IVFIndex:
+    """Cell centroids, the persisted layout (cell -> row range) and rows added since."""
+
+    def __init__(self, centroids: np.ndarray, trained_rows: int, offsets: Optional[np.ndarray] = None):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.trained_rows = trained_rows
+        self.offsets = offsets if offsets is not None else np.zeros(self.nlist + 1, dtype=np.int64)
+        self.pending: List[List[int]] = [[] for _ in range(self.nlist)]
+
+    @property
+    def nlist(self) -> int:
+        return self.centroids.shape[0]
+
+    # --- Training and assignment ---
+
+    @classmethod
+    def train(cls, vectors: np.ndarray, rows: Optional[np.ndarray] = None, nlist: Optional[int] = None,
+              seed: int = 0) -> "IVFIndex":
+        """Spherical k-means on a sample of `vectors[rows]` (unit rows; all of them by default)."""
+        rows = np.arange(vectors.shape[0]) if rows is None else rows
+        nlist = min(nlist or auto_nlist(len(rows)), len(rows))
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(rows), nlist * TRAIN_ROWS_PER_CELL)
+        sample = np.asarray(vectors[np.sort(rng.choice(rows, sample_size, replace=False))], dtype=np.float32)
+
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = cls._nearest(sample, centroids)
+            counts = np.bincount(assignment, minlength=nlist)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            sums = np.zeros_like(centroids)
+            sums[counts > 0] = np.add.reduceat(sample[np.argsort(assignment, kind="stable")],
+                                               starts[counts > 0], axis=0)
+            empty = counts == 0
+            if empty.any():  # reseed empty cells from random points
+                sums[empty] = sample[rng.choice(sample_size, int(empty.sum()), replace=False)]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+        return cls(centroids, trained_rows=len(rows))
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        cells = np.empty(vectors.shape[0], dtype=np.int64)
+        for start in range(0, vectors.shape[0], ASSIGN_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+            cells[start:start + ASSIGN_BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+        return cells
+
+    def assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Nearest cell of every row."""
+        return self._nearest(vectors, self.centroids)
+
+    def cells_of(self, rows: np.ndarray) -> np.ndarray:
+        """Cells the index already holds `rows` under (laid out or pending), without rescoring them."""
+        cells = np.empty(len(rows), dtype=np.int64)
+        laid_out = rows < self.offsets[-1]
+        cells[laid_out] = np.searchsorted(self.offsets, rows[laid_out], side="right") - 1
+        if not laid_out.all():
+            pending = {row: cell for cell, cell_rows in enumerate(self.pending) for row in cell_rows}
+            cells[~laid_out] = [pending[row] for row in rows[~laid_out].tolist()]
+        return cells
+
+    def needs_retraining(self, rows: int, nlist: Optional[int] = None) -> bool:
+        return (nlist is not None and nlist != self.nlist) or rows > RETRAIN_GROWTH * self.trained_rows
+
+    # --- Layout ---
+
+    def lay_out(self, cells: np.ndarray) -> np.ndarray:
+        """
+        Order in which to write rows whose cells are `cells` so every cell is one
+        contiguous range; records those ranges and clears `pending`.
+        """
+        order = np.argsort(cells, kind="stable")
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(cells, minlength=self.nlist)))).astype(np.int64)
+        self.pending = [[] for _ in range(self.nlist)]
+        return order
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray):
+        """Incremental insert: file new rows under their nearest cell."""
+        for row, cell in zip(rows.tolist(), self.assign(vectors).tolist()):
+            self.pending[cell].append(row)
+
+    # --- Search ---
+
+    def search(self, matrix: np.ndarray, query: np.ndarray, nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(rows, scores) of every row in the `nprobe` cells closest to `query` (a unit vector)."""
+        nprobe = max(1, min(nprobe, self.nlist))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows, scores = [], []
+        for cell in probe.tolist():
+            start, stop = int(self.offsets[cell]), int(self.offsets[cell + 1])
+            if stop > start:
+                rows.append(np.arange(start, stop))
+                scores.append(matrix[start:stop] @ query)
+            if self.pending[cell]:
+                extra = np.asarray(self.pending[cell], dtype=np.int64)
+                rows.append(extra)
+                scores.append(matrix[extra] @ query)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        return np.concatenate(rows), np.concatenate(scores)
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            np.savez(f, centroids=self.centroids, offsets=self.offsets, trained_rows=np.int64(self.trained_rows))
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(path) as data:
+            return cls(data["centroids"], int(data["trained_rows"]), data["offsets"])
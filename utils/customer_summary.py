@@ -0,0 +1,113 @@
+# utils/customer_summary.py
+"""
+Materialised per-customer summary for the "My Usage" dashboard and the agents.
+
+customer_summary holds one row per customer: plan, allowances, the latest
+billing period's usage, percentage of data used and open ticket count. The
+dashboard reads it with a single primary-key lookup.
+
+The table is kept current by triggers on customers, customer_usage,
+support_tickets and service_plans. Each trigger re-derives only the rows of
+the customers it touched, so a new usage row costs one small refresh instead
+of a recomputation on every dashboard rerun. The table, indexes and triggers
+are created by migration 1 in utils/migrations.py.
+"""
+import sqlite3
+
+SUMMARY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customer_summary (
+    customer_id VARCHAR(50) PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    account_status VARCHAR(20),
+    plan_id VARCHAR(50),
+    plan_name VARCHAR(100),
+    monthly_cost DECIMAL(10,2),
+    data_limit_gb INT,                 -- NULL when unlimited
+    voice_minutes INT,                 -- NULL when unlimited
+    sms_count INT,                     -- NULL when unlimited
+    billing_period_start DATE,         -- latest period (NULL if no usage yet)
+    billing_period_end DATE,
+    data_used_gb DECIMAL(10,2) NOT NULL,
+    voice_minutes_used INT NOT NULL,
+    sms_count_used INT NOT NULL,
+    data_percent_used REAL,            -- NULL when unlimited
+    open_tickets INT NOT NULL,
+    refreshed_at TIMESTAMP NOT NULL
+) WITHOUT ROWID
+"""
+
+# Support the per-customer lookups every refresh makes
+SUPPORT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_customer_usage_customer_period "
+    "ON customer_usage (customer_id, billing_period_end)",
+    "CREATE INDEX IF NOT EXISTS idx_support_tickets_customer_status "
+    "ON support_tickets (customer_id, status)",
+)
+
+# {where} picks the customers to refresh: a parameter, a trigger's NEW/OLD
+# row, or every customer on a plan
+REFRESH_TEMPLATE = """
+INSERT OR REPLACE INTO customer_summary
+SELECT c.customer_id, c.name, c.account_status,
+       p.plan_id, p.name, p.monthly_cost,
+       CASE WHEN p.unlimited_data THEN NULL ELSE p.data_limit_gb END,
+       CASE WHEN p.unlimited_voice THEN NULL ELSE p.voice_minutes END,
+       CASE WHEN p.unlimited_sms THEN NULL ELSE p.sms_count END,
+       u.billing_period_start, u.billing_period_end,
+       COALESCE(u.data_used_gb, 0), COALESCE(u.voice_minutes_used, 0), COALESCE(u.sms_count_used, 0),
+       CASE WHEN p.unlimited_data OR NOT p.data_limit_gb THEN NULL
+            ELSE ROUND(100.0 * COALESCE(u.data_used_gb, 0) / p.data_limit_gb, 1) END,
+       (SELECT COUNT(*) FROM support_tickets t
+        WHERE t.customer_id = c.customer_id AND t.status NOT IN ('Resolved', 'Closed')),
+       CURRENT_TIMESTAMP
+FROM customers c
+LEFT JOIN service_plans p ON p.plan_id = c.service_plan_id
+LEFT JOIN customer_usage u ON u.usage_id = (
+    SELECT usage_id FROM customer_usage
+    WHERE customer_id = c.customer_id
+    ORDER BY billing_period_end DESC LIMIT 1
+)
+WHERE {where};
+"""
+
+
+def _refresh(where: str) -> str:
+    return REFRESH_TEMPLATE.format(where=where)
+
+
+def _trigger(name: str, event: str, body: str) -> str:
+    return f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} BEGIN {body} END"
+
+
+TRIGGERS = (
+    _trigger("trg_summary_usage_insert", "INSERT ON customer_usage",
+             _refresh("c.customer_id = NEW.customer_id")),
+    _trigger("trg_summary_usage_update", "UPDATE ON customer_usage",
+             _refresh("c.customer_id IN (NEW.customer_id, OLD.customer_id)")),
+    _trigger("trg_summary_usage_delete", "DELETE ON customer_usage",
+             _refresh("c.customer_id = OLD.customer_id")),
+    _trigger("trg_summary_ticket_insert", "INSERT ON support_tickets",
+             _refresh("c.customer_id = NEW.customer_id")),
+    _trigger("trg_summary_ticket_update", "UPDATE OF status, customer_id ON support_tickets",
+             _refresh("c.customer_id IN (NEW.customer_id, OLD.customer_id)")),
+    _trigger("trg_summary_ticket_delete", "DELETE ON support_tickets",
+             _refresh("c.customer_id = OLD.customer_id")),
+    _trigger("trg_summary_customer_insert", "INSERT ON customers",
+             _refresh("c.customer_id = NEW.customer_id")),
+    _trigger("trg_summary_customer_update", "UPDATE ON customers",
+             "DELETE FROM customer_summary WHERE customer_id = OLD.customer_id; "
+             + _refresh("c.customer_id = NEW.customer_id")),
+    _trigger("trg_summary_customer_delete", "DELETE ON customers",
+             "DELETE FROM customer_summary WHERE customer_id = OLD.customer_id;"),
+    _trigger("trg_summary_plan_update", "UPDATE ON service_plans",
+             _refresh("c.service_plan_id IN (NEW.plan_id, OLD.plan_id)")),
+)
+
+
+def refresh_customer_summary(conn: sqlite3.Connection, customer_id: str = None):
+    """Re-derive one customer's row, or every row (e.g. after a bulk import with triggers off)."""
+    if customer_id is None:
+        conn.execute("DELETE FROM customer_summary")
+        conn.execute(_refresh("1"))
+    else:
+        conn.execute(_refresh("c.customer_id = ?"), (customer_id,))
@@ -1,10 +1,113 @@
 # utils/database.py
+"""
+Data access for the app and agents.
+
+Queries are parameterised and run on pooled, pre-tuned connections (see
+utils/db_pool.py). Point lookups return small typed __slots__ records;
+DataFrames are only built for the tables the UI renders.
+"""
+import asyncio
+import re
 import sqlite3
-import pandas as pd
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
 from config.config import Config
+from utils.db_pool import PRAGMAS, STATEMENT_CACHE_SIZE, get_pool
+from utils.migrations import migrate
+from utils.tracing import span
+
+# --- Row records ---
+
+@dataclass(frozen=True, slots=True)
+class Customer:
+    customer_id: str
+    name: str
+
+@dataclass(frozen=True, slots=True)
+class CustomerSummary:
+    customer_id: str
+    name: str
+    account_status: Optional[str]
+    plan_id: Optional[str]
+    plan_name: Optional[str]
+    monthly_cost: Optional[float]
+    data_limit_gb: Optional[int]       # None = unlimited
+    voice_minutes: Optional[int]
+    sms_count: Optional[int]
+    billing_period_start: Optional[str]
+    billing_period_end: Optional[str]
+    data_used: float
+    voice_used: int
+    sms_used: int
+    data_percent_used: Optional[float]
+    open_tickets: int
+
+@dataclass(frozen=True, slots=True)
+class Incident:
+    incident_id: str
+    incident_type: str
+    location: str
+    affected_services: str
+    start_time: str
+    severity: str
+    description: str
+
+# --- Query helpers ---
+
+_migrated = set()
+
+def prepare_database():
+    """Bring Config.DB_PATH to the latest schema version, once per database per process."""
+    path = Config.DB_PATH
+    if path not in _migrated:
+        with get_pool(path).connection() as conn:
+            for name in migrate(conn):
+                print(f"   [DB] Applied migration: {name}")
+        _migrated.add(path)
+
+@contextmanager
+def db_connection() -> Iterator[sqlite3.Connection]:
+    """A pooled connection to the (migrated) database."""
+    prepare_database()
+    with get_pool().connection() as conn:
+        yield conn
+
+def _statement_name(sql: str) -> str:
+    """Short span name for a statement: its verb and first table, e.g. 'SELECT customer_summary'."""
+    words = sql.split()
+    table = next((words[i + 1] for i, w in enumerate(words[:-1]) if w.upper() in ("FROM", "INTO", "UPDATE")), "")
+    return f"{words[0].upper()} {table}".strip() if words else "sql"
+
+def query_one(sql: str, params: Sequence[Any] = (), record: Optional[Callable] = None):
+    """First row of a parameterised query (as `record(*row)` if given), or None."""
+    with span("sql", _statement_name(sql)) as attrs, db_connection() as conn:
+        row = conn.execute(sql, params).fetchone()
+        attrs["rows"] = int(row is not None)
+    if row is None or record is None:
+        return row
+    return record(*row)
+
+def query_all(sql: str, params: Sequence[Any] = (), record: Optional[Callable] = None) -> List:
+    with span("sql", _statement_name(sql)) as attrs, db_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+        attrs["rows"] = len(rows)
+    return [record(*row) for row in rows] if record else rows
+
+def query_df(sql: str, params: Sequence[Any] = ()):
+    """DataFrame for UI tables; pandas is only imported when one is actually needed."""
+    import pandas as pd
+
+    with span("sql", _statement_name(sql)) as attrs, db_connection() as conn:
+        cursor = conn.execute(sql, params)
+        columns = [c[0] for c in cursor.description]
+        rows = cursor.fetchall()
+        attrs["rows"] = len(rows)
+    return pd.DataFrame.from_records(rows, columns=columns)
 
 def get_db_connection():
-    """Create a connection to the SQLite database"""
+    """Create a standalone connection to the SQLite database (the caller closes it)"""
     try:
         conn = sqlite3.connect(Config.DB_PATH)
         return conn
@@ -14,120 +117,196 @@ def get_db_connection():
 
 def inspect_database():
     """Helper to print table names and schema for debugging"""
-    conn = get_db_connection()
-    if conn:
-        print("\n=== Database Inspection ===")
-        cursor = conn.cursor()
-        
-        # Get all table names
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
-        
-        for table in tables:
-            table_name = table[0]
-            print(f"\nTable: {table_name}")
-            
-            # Get columns for this table
-            df = pd.read_sql_query(f"SELECT * FROM {table_name} LIMIT 1", conn)
-            print(f"Columns: {list(df.columns)}")
-        
-        conn.close()
-        print("\n===========================")
-
-
-# ... existing imports and code ...
-def get_customer_dashboard_data(customer_id="CUST_001"):
-    """Fetch live usage and plan details for the dashboard"""
-    conn = get_db_connection()
-    if not conn: return None
-    
-    # 1. Get Usage
-    usage_df = pd.read_sql(
-        f"SELECT * FROM customer_usage WHERE customer_id = '{customer_id}'", conn
-    )
-    
-    # 2. Get Customer's Plan ID (CORRECTED COLUMN NAME HERE)
-    cust_df = pd.read_sql(
-        f"SELECT service_plan_id FROM customers WHERE customer_id = '{customer_id}'", conn
+    print("\n=== Database Inspection ===")
+    tables = query_all("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
+    for (table_name,) in tables:
+        print(f"\nTable: {table_name}")
+        columns = query_all("SELECT name FROM pragma_table_info(?)", (table_name,))
+        print(f"Columns: {[c[0] for c in columns]}")
+    print("\n===========================")
+
+
+SUMMARY_COLUMNS = (
+    "customer_id, name, account_status, plan_id, plan_name, monthly_cost, "
+    "data_limit_gb, voice_minutes, sms_count, billing_period_start, billing_period_end, "
+    "data_used_gb, voice_minutes_used, sms_count_used, data_percent_used, open_tickets"
+)
+
+def get_customer_summary(customer_id: str) -> Optional[CustomerSummary]:
+    """Plan, allowances, latest-period usage and open tickets in one primary-key read."""
+    return query_one(
+        f"SELECT {SUMMARY_COLUMNS} FROM customer_summary WHERE customer_id = ?",
+        (customer_id,),
+        record=CustomerSummary,
     )
-    
-    # Extract the ID safely
-    plan_id = cust_df.iloc[0]['service_plan_id'] if not cust_df.empty else None
-    
-    # 3. Get Plan Name
-    plan_name = "Unknown"
-    if plan_id:
-        plan_df = pd.read_sql(
-            f"SELECT name FROM service_plans WHERE plan_id = '{plan_id}'", conn
-        )
-        if not plan_df.empty:
-            plan_name = plan_df.iloc[0]['name']
-
-    conn.close()
-    
-    if usage_df.empty: return None
-    
-    row = usage_df.iloc[0]
+
+def get_customer_dashboard_data(customer_id="CUST_001") -> Optional[CustomerSummary]:
+    """Fetch live usage and plan details for the dashboard"""
+    return get_customer_summary(customer_id)
+
+BILL_BREAKDOWN_QUERY = """
+SELECT c.customer_id, c.name AS customer_name,
+       p.plan_id, p.name AS plan_name, p.monthly_cost,
+       p.data_limit_gb, p.unlimited_data, p.voice_minutes, p.unlimited_voice,
+       p.sms_count, p.unlimited_sms,
+       u.billing_period_start, u.billing_period_end,
+       u.data_used_gb, u.voice_minutes_used, u.sms_count_used,
+       u.additional_charges, u.total_bill_amount
+FROM customers c
+JOIN service_plans p ON p.plan_id = c.service_plan_id
+LEFT JOIN customer_usage u ON u.usage_id = (
+    SELECT usage_id FROM customer_usage
+    WHERE customer_id = c.customer_id
+    ORDER BY billing_period_end DESC LIMIT 1
+)
+WHERE c.customer_id = ?
+"""
+
+def get_bill_breakdown(customer_id: str):
+    """
+    Precompute the customer's bill in one query: plan base cost, latest
+    billing-period usage against the plan allowances, and additional charges.
+    Returns None if the customer or their plan is unknown.
+    """
+    with span("sql", _statement_name(BILL_BREAKDOWN_QUERY)) as attrs, db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        row = cursor.execute(BILL_BREAKDOWN_QUERY, (customer_id,)).fetchone()
+        attrs["rows"] = int(row is not None)
+    return _bill_breakdown_from_row(row)
+
+async def aget_bill_breakdown(customer_id: str):
+    """
+    Async twin of get_bill_breakdown (aiosqlite), for the async service: the
+    same migrations (in a worker thread), connection PRAGMAs and sql span as
+    the pooled path.
+    """
+    import aiosqlite
+
+    await asyncio.to_thread(prepare_database)
+    with span("sql", _statement_name(BILL_BREAKDOWN_QUERY)) as attrs:
+        async with aiosqlite.connect(Config.DB_PATH, cached_statements=STATEMENT_CACHE_SIZE) as conn:
+            for pragma in PRAGMAS:
+                await conn.execute(pragma)
+            conn.row_factory = sqlite3.Row
+            async with conn.execute(BILL_BREAKDOWN_QUERY, (customer_id,)) as cursor:
+                row = await cursor.fetchone()
+        attrs["rows"] = int(row is not None)
+    return _bill_breakdown_from_row(row)
+
+def _bill_breakdown_from_row(row):
+    if row is None:
+        return None
+
+    def allowance(used, limit, unlimited, unit):
+        used = used or 0
+        limited = not unlimited and limit is not None
+        return {
+            "used": used,
+            "limit": limit if limited else None,
+            "unit": unit,
+            "unlimited": not limited,
+            "over_by": max(used - limit, 0) if limited else 0,
+            "percent_used": round(100 * used / limit, 1) if limited and limit else None,
+        }
+
+    base_cost = row["monthly_cost"] or 0
+    additional = row["additional_charges"] or 0
     return {
-        "plan_name": plan_name,
-        "data_used": row.get('data_used_gb', 0),
-        "voice_used": row.get('voice_minutes_used', 0), # Corrected based on your schema
-        "sms_used": row.get('sms_count_used', 0)        # Corrected based on your schema
+        "customer_id": row["customer_id"],
+        "customer_name": row["customer_name"],
+        "plan_id": row["plan_id"],
+        "plan_name": row["plan_name"],
+        "base_cost": base_cost,
+        "billing_period_start": row["billing_period_start"],
+        "billing_period_end": row["billing_period_end"],
+        "allowances": {
+            "data": allowance(row["data_used_gb"], row["data_limit_gb"], row["unlimited_data"], "GB"),
+            "voice": allowance(row["voice_minutes_used"], row["voice_minutes"], row["unlimited_voice"], "minutes"),
+            "sms": allowance(row["sms_count_used"], row["sms_count"], row["unlimited_sms"], "SMS"),
+        },
+        "additional_charges": additional,
+        "estimated_total": base_cost + additional,
+        "billed_total": row["total_bill_amount"],
     }
 
+INCIDENT_COLUMNS = "incident_id, incident_type, location, affected_services, start_time, severity, description"
+
+ACTIVE_INCIDENTS_QUERY = f"""
+SELECT {INCIDENT_COLUMNS} FROM network_incidents
+WHERE status = 'Active'
+ORDER BY start_time DESC
+"""
+
+# Location words go through the FTS5 index instead of LIKE '%...%' (a full scan)
+ACTIVE_INCIDENTS_AT_QUERY = f"""
+SELECT {INCIDENT_COLUMNS} FROM network_incidents
+WHERE rowid IN (SELECT rowid FROM network_incidents_fts WHERE network_incidents_fts MATCH ?)
+  AND status = 'Active'
+ORDER BY start_time DESC
+"""
+
 def get_network_dashboard_data():
-    """Fetch all active incidents"""
-    conn = get_db_connection()
-    if not conn: return pd.DataFrame()
-    
-    df = pd.read_sql("SELECT * FROM network_incidents WHERE status = 'Active'", conn)
-    conn.close()
-    return df
-
-def get_customer_by_email(email: str):
+    """Fetch all active incidents, newest first (DataFrame for the dashboard tables)"""
+    return query_df("SELECT * FROM network_incidents WHERE status = 'Active' ORDER BY start_time DESC")
+
+def location_match_expression(location: str) -> Optional[str]:
+    """
+    FTS5 query matching incidents whose location contains every word of `location`
+    as a word prefix ("mumbai cent" -> Mumbai Central). None if there are no words.
+    """
+    words = re.findall(r"\w+", location.lower())
+    if not words:
+        return None
+    return "location : (" + " ".join(f'"{w}"*' for w in words) + ")"
+
+def get_active_incidents(location: Optional[str] = None) -> List[Incident]:
+    """Active incidents, optionally only those whose location matches `location` (full-text)."""
+    if location is None:
+        return query_all(ACTIVE_INCIDENTS_QUERY, record=Incident)
+    match = location_match_expression(location)
+    if match is None:
+        return []
+    return query_all(ACTIVE_INCIDENTS_AT_QUERY, (match,), record=Incident)
+
+# Places a customer might name: cities, "city district" and incident locations
+KNOWN_LOCATIONS_QUERY = """
+SELECT city FROM service_areas
+UNION SELECT city || ' ' || district FROM service_areas
+UNION SELECT location FROM network_incidents WHERE location IS NOT NULL
+"""
+
+def get_known_locations() -> List[str]:
+    """Every known place name, longest first (so 'Delhi West' wins over 'Delhi')."""
+    names = [row[0] for row in query_all(KNOWN_LOCATIONS_QUERY) if row[0]]
+    return sorted(names, key=lambda name: (-len(name), name))
+
+def get_customer_by_email(email: str) -> Optional[Customer]:
     """
     Validate email and return customer details.
     """
-    conn = get_db_connection()
-    if not conn: return None
-    
     try:
-        # Sanitize and query
-        clean_email = email.strip()
-        query = f"SELECT customer_id, name FROM customers WHERE email = '{clean_email}'"
-        df = pd.read_sql(query, conn)
-        conn.close()
-        
-        if df.empty:
-            return None
-            
-        return df.iloc[0].to_dict() # Returns {'customer_id': '...', 'name': '...'}
-        
-    except Exception as e:
+        return query_one("SELECT customer_id, name FROM customers WHERE email = ?", (email.strip(),), Customer)
+    except sqlite3.Error as e:
         print(f"Login Error: {e}")
         return None
 
-# ... existing imports ...
+# Served in order straight off the partial index idx_support_tickets_unclosed_created
+UNCLOSED_TICKETS_QUERY = """
+SELECT t.ticket_id, c.name as customer_name, t.issue_category, 
+       t.status, t.priority, t.creation_time
+FROM support_tickets t
+JOIN customers c ON t.customer_id = c.customer_id
+WHERE t.status != 'Closed'
+ORDER BY t.creation_time DESC
+"""
 
 def get_all_support_tickets():
     """Fetch all open tickets for the Admin Dashboard"""
-    conn = get_db_connection()
-    if not conn: return pd.DataFrame()
-    
     # Get tickets joined with customer names
-    query = """
-    SELECT t.ticket_id, c.name as customer_name, t.issue_category, 
-           t.status, t.priority, t.creation_time
-    FROM support_tickets t
-    JOIN customers c ON t.customer_id = c.customer_id
-    WHERE t.status != 'Closed'
-    ORDER BY t.creation_time DESC
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
+    return query_df(UNCLOSED_TICKETS_QUERY)
 
 
 if __name__ == "__main__":
     # If run directly, inspect the DB
-    inspect_database()
\ No newline at end of file
+    inspect_database()
@@ -1,15 +1,130 @@
 # utils/document_loader.py
+import hashlib
 import os
 import shutil
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, StorageContext, load_index_from_storage
+import threading
+from llama_index.core import VectorStoreIndex, StorageContext, load_index_from_storage
+from llama_index.core.query_engine import RetrieverQueryEngine
 from config.config import Config
+from utils.registry import get_llm_http_clients
+from utils.ingestion import IngestStats, save_upload
+from utils.knowledge_sync import load_manifest, manifest_path, sync_index
+from utils.retrieval import BM25_INDEX_NAME, BM25Index, build_retriever, nodes_signature
+from utils.vector_store import TABLE_NAME as VECTOR_TABLE_NAME, load_vector_store, new_vector_store
 
 # Ensure OpenAI key is loaded
 os.environ["OPENAI_API_KEY"] = Config.OPENAI_API_KEY
 
+# --- In-process cache ---
+# One loaded index per process, plus its query engines keyed by top_k and
+# retrieval mode. The cache is keyed by a cheap version stamp (a few os.stat
+# calls), so it is only reloaded when the persisted store actually changes.
+# Files dropped into the documents folder are not part of the stamp: they are
+# indexed by reconcile_knowledge_base (the upload path, python -m utils.ingestion),
+# which persists the store and so moves the stamp.
+_index_lock = threading.RLock()
+_cached_index = None
+_cached_version = None
+_query_engines = {}
+_cached_bm25 = None  # (index, BM25Index) built from that index's nodes
+
+# Files rewritten by every persist() (the JSON vector store or the NumPy store's
+# side table, whichever backend is in use)
+_VERSIONED_STORE_FILES = ("docstore.json", "index_store.json", "default__vector_store.json", VECTOR_TABLE_NAME)
+
+
+def get_index_version():
+    """Short stamp that changes whenever the persisted index changes."""
+    paths = [os.path.join(Config.VECTOR_STORE_DIR, f) for f in _VERSIONED_STORE_FILES]
+    parts = []
+    for path in paths:
+        try:
+            stats = os.stat(path)
+            parts.append(f"{stats.st_mtime_ns}:{stats.st_size}")
+        except FileNotFoundError:
+            parts.append("-")
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
 def get_knowledge_index(rebuild=False):
     """
-    Build or Load the Vector Index.
+    Return the process-wide Vector Index, loading it from disk only on first
+    use or after the persisted store changes. rebuild=True forces a fresh build.
+    New or edited documents are picked up by reconcile_knowledge_base, not here.
+    """
+    global _cached_index, _cached_version
+
+    with _index_lock:
+        version = get_index_version()
+        if not rebuild and _cached_index is not None and version == _cached_version:
+            return _cached_index
+
+        index = _load_or_build_index(rebuild)
+        _cached_index = index
+        # Re-stamp: loading or building may have just written the store
+        _cached_version = get_index_version() if index is not None else None
+        _query_engines.clear()
+        return index
+
+
+def get_bm25_index():
+    """
+    BM25 inverted index over the current index's nodes. Loaded from disk when
+    its node signature still matches, otherwise rebuilt (no embeddings needed).
+    """
+    global _cached_bm25
+
+    index = get_knowledge_index()
+    if index is None:
+        return None
+    with _index_lock:
+        if _cached_bm25 is not None and _cached_bm25[0] is index:
+            return _cached_bm25[1]
+
+        path = os.path.join(Config.VECTOR_STORE_DIR, BM25_INDEX_NAME)
+        bm25 = BM25Index.load(path)
+        if bm25 is None or bm25.signature != nodes_signature(index.docstore.docs):
+            bm25 = BM25Index.from_nodes(index.docstore.docs.values())
+            bm25.save(path)
+        _cached_bm25 = (index, bm25)
+        return bm25
+
+
+def get_query_engine(similarity_top_k=2, mode=None):
+    """
+    Cached query engine over the current index (None if the index is unavailable).
+    mode: 'vector', 'bm25' (no embedding call) or 'hybrid'; defaults to Config.RETRIEVAL_MODE.
+    """
+    mode = mode or Config.RETRIEVAL_MODE
+    index = get_knowledge_index()
+    if index is None:
+        return None
+    bm25 = get_bm25_index() if mode != "vector" else None
+    with _index_lock:
+        key = (id(index), similarity_top_k, mode)
+        if key not in _query_engines:
+            retriever = build_retriever(index, bm25, mode, similarity_top_k)
+            # Streaming synthesis: callers can forward tokens as they arrive
+            _query_engines[key] = RetrieverQueryEngine.from_args(retriever, llm=_synthesis_llm(), streaming=True)
+        return _query_engines[key]
+
+
+def _synthesis_llm():
+    """Settings.llm, rebuilt on the shared HTTP clients when the LLM cache or tracing is on."""
+    http_client, async_http_client = get_llm_http_clients()
+    if http_client is None:
+        return None
+    from llama_index.core import Settings
+    from llama_index.llms.openai import OpenAI
+
+    default = Settings.llm
+    return OpenAI(model=default.model, temperature=default.temperature,
+                  http_client=http_client, async_http_client=async_http_client)
+
+
+def _load_or_build_index(rebuild=False):
+    """
+    Build or Load the Vector Index from disk.
     If rebuild=True, it deletes the existing index and creates a fresh one.
     """
    
@@ -21,12 +136,13 @@ def get_knowledge_index(rebuild=False):
     # 2. Try to load existing index (Fast Path)
     if os.path.exists(Config.VECTOR_STORE_DIR):
         try:
-            storage_context = StorageContext.from_defaults(persist_dir=Config.VECTOR_STORE_DIR)
+            storage_context = StorageContext.from_defaults(
+                persist_dir=Config.VECTOR_STORE_DIR, vector_store=load_vector_store(Config.VECTOR_STORE_DIR))
             return load_index_from_storage(storage_context)
         except Exception as e:
             print(f"Index corrupt or failed to load. Rebuilding... ({e})")
 
-    # 3. Build new index (Slow Path - reads all .txt files)
+    # 3. Build new index (Slow Path - reads every document, but reuses cached embeddings)
     print(f"Building index from documents in: {Config.DOCS_DIR}")
     if not os.path.exists(Config.DOCS_DIR):
         os.makedirs(Config.DOCS_DIR)
@@ -37,33 +153,69 @@ def get_knowledge_index(rebuild=False):
         print("No documents found to index.")
         return None
 
-    documents = SimpleDirectoryReader(Config.DOCS_DIR).load_data()
-    print(f"Loaded {len(documents)} document chunks.")
-
-    index = VectorStoreIndex.from_documents(documents)
-    
-    # 4. Save to disk
-    index.storage_context.persist(persist_dir=Config.VECTOR_STORE_DIR)
+    index, report = _build_index()
+    print(f"Indexed {report.nodes_inserted} chunks ({report.embeddings_computed} newly embedded).")
     print(f"✅ Index saved to {Config.VECTOR_STORE_DIR}")
     
     return index
 
-def add_document_to_knowledge_base(uploaded_file):
+def _build_index(**sync_options):
+    """Fresh index synced from the documents folder (also writes a new manifest)."""
+    # Any old manifest describes nodes this empty index does not have
+    old_manifest = manifest_path(Config.VECTOR_STORE_DIR)
+    if os.path.exists(old_manifest):
+        os.remove(old_manifest)
+
+    index = VectorStoreIndex(nodes=[], storage_context=StorageContext.from_defaults(vector_store=new_vector_store()))
+    report = sync_index(index, Config.DOCS_DIR, Config.VECTOR_STORE_DIR, **sync_options)
+    return index, report
+
+def reconcile_knowledge_base(stats=None, workers=None):
+    """
+    Sync the persisted index with the documents folder, inserting/deleting
+    only the nodes of files that were added, changed or removed.
+    Returns a SyncReport (None if there is nothing to index).
+    stats: an IngestStats collecting per-stage throughput and progress.
+    """
+    global _cached_index, _cached_version, _cached_bm25
+
+    with _index_lock:
+        index = get_knowledge_index()
+        if index is None:
+            return None
+
+        if load_manifest(Config.VECTOR_STORE_DIR) is None:
+            # Store predates the manifest: rebuild once (cached embeddings still apply)
+            print("No manifest found, rebuilding index once...")
+            index, report = _build_index(stats=stats, workers=workers)
+        else:
+            report = sync_index(index, Config.DOCS_DIR, Config.VECTOR_STORE_DIR, stats=stats, workers=workers)
+
+        _cached_index = index
+        _cached_version = get_index_version()
+        _query_engines.clear()
+        _cached_bm25 = None  # sync mutates the index in place
+        return report
+
+def add_document_to_knowledge_base(uploaded_file, progress=None):
     """
-    Saves a file and forces the index to rebuild.
+    Saves a file and incrementally adds it to the index.
+    progress(stage, done, total) is called as the upload, parse, embed and index stages advance.
     """
     try:
-        # 1. Save the file
-        save_path = os.path.join(Config.DOCS_DIR, uploaded_file.name)
-        with open(save_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-            
+        # 1. Save the file, a chunk at a time
+        stats = IngestStats(progress)
+        save_path = save_upload(uploaded_file, Config.DOCS_DIR, stats=stats)
         print(f"Saved new document: {save_path}")
         
-        # 2. FORCE REBUILD so the AI sees the new file immediately
-        get_knowledge_index(rebuild=True)
+        # 2. Sync only this change so the AI sees the new file immediately
+        report = reconcile_knowledge_base(stats=stats)
+        if report is None:
+            return False, "Document saved, but the Knowledge Base could not be updated."
         
-        return True, "Document added and Knowledge Base rebuilt successfully!"
+        throughput = stats.describe().replace("\n", "; ")
+        return True, (f"Document added to the Knowledge Base ({report.nodes_inserted} new chunks indexed "
+                      f"in {report.seconds:.1f}s). {throughput}")
 
     except Exception as e:
         return False, f"Error adding document: {str(e)}"
@@ -92,4 +244,18 @@ def list_documents():
                 "Last Modified": datetime.fromtimestamp(stats.st_mtime).strftime('%Y-%m-%d %H:%M')
             })
             
-    return pd.DataFrame(files)
\ No newline at end of file
+    return pd.DataFrame(files)
+
+
+if __name__ == "__main__":
+    # python -m utils.document_loader  ->  reconcile the index with data/documents
+    result = reconcile_knowledge_base()
+    if result is None:
+        print("No documents to index.")
+    else:
+        print(
+            f"Reconciled in {result.seconds:.2f}s: "
+            f"+{result.files_added} / ~{result.files_changed} / -{result.files_removed} files, "
+            f"{result.nodes_inserted} nodes inserted, {result.nodes_deleted} deleted, "
+            f"{result.embeddings_cached} embeddings from cache, {result.embeddings_computed} computed."
+        )
@@ -0,0 +1,447 @@
+# utils/fake_openai.py
+"""
+Offline stand-in for the OpenAI API, for benchmarks and local runs without a key.
+
+    python -m utils.fake_openai --port 8765 --latency-ms 400 --ms-per-token 15
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_BASE=http://127.0.0.1:8765/v1 streamlit run ui/streamlit_app.py
+
+Speaks the parts of the protocol LangChain, CrewAI (litellm), AutoGen and
+LlamaIndex use: /v1/chat/completions (plain, streamed SSE, tool calls) and
+/v1/embeddings. Replies are rule-based so every agent loop finishes:
+
+- a request offering tools, with no tool result yet, gets a tool call
+  (arguments derived from the conversation);
+- after a tool result it answers from that result;
+- ReAct-style prompts (CrewAI) get an Action, then a Final Answer;
+- AutoGen's speaker-selection prompt gets a role name;
+- anything else gets a short canned answer, or a scripted one when a
+  `script` regex matches the last user message.
+
+Each completion sleeps latency_ms (+ ms_per_token per output word, + jitter)
+before replying, and the total simulated time is counted in `stats`, so a
+benchmark can tell model time apart from its own overhead.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+
+from aiohttp import web
+
+EMBEDDING_DIMENSIONS = 1536
+
+
+class Reply(NamedTuple):
+    content: Optional[str]
+    tool_calls: List[dict]
+
+
+class FakeStats:
+    """Counters shared by all requests; read them before and after a run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.completions = 0
+        self.embeddings = 0
+        self.simulated_ms = 0.0
+
+    def add(self, kind: str, simulated_ms: float):
+        with self._lock:
+            if kind == "embeddings":
+                self.embeddings += 1
+            else:
+                self.completions += 1
+            self.simulated_ms += simulated_ms
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {"completions": self.completions, "embeddings": self.embeddings,
+                    "simulated_ms": round(self.simulated_ms, 3)}
+
+
+# --- 1. Conversation helpers ---
+
+def _text(content) -> str:
+    """Message content as plain text (strings or lists of content parts)."""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+def _last(messages: List[dict], role: str) -> Optional[dict]:
+    return next((m for m in reversed(messages) if m.get("role") == role), None)
+
+
+def _conversation(messages: List[dict]) -> str:
+    return "\n".join(_text(m.get("content")) for m in messages)
+
+
+def _first_line(text: str, limit: int = 300) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit].rsplit(" ", 1)[0] + "..."
+
+
+# --- 2. Tool arguments ---
+
+def _customer_id(conversation: str) -> Optional[str]:
+    match = re.search(r"customer[_ ]id[:=]?\s*'?\"?(CUST\w+)", conversation)
+    return match.group(1) if match else None
+
+
+def _region(conversation: str) -> str:
+    """A capitalised place name after 'in'/'at'/'near', else a default city."""
+    match = re.search(r"\b(?:in|at|near|around)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)", conversation)
+    return match.group(1) if match else "Mumbai"
+
+
+def _sql(conversation: str) -> str:
+    customer_id = _customer_id(conversation)
+    if customer_id:
+        return ("SELECT plan_name, monthly_cost, data_used_gb, data_limit_gb, open_tickets "
+                f"FROM customer_summary WHERE customer_id = '{customer_id}'")
+    return "SELECT name, monthly_cost, data_limit_gb FROM service_plans ORDER BY monthly_cost"
+
+
+def _tool_arguments(tool: dict, messages: List[dict]) -> dict:
+    conversation = _conversation(messages)
+    # The opening request carries the customer's words (later "user" turns may be other agents)
+    first_user = next((m for m in messages if m.get("role") == "user"), {})
+    user = re.sub(r"^Customer Issue:\s*", "", _text(first_user.get("content")).strip()).split("\n")[0]
+    properties = tool.get("parameters", {}).get("properties", {})
+    arguments = {}
+    for name, schema in properties.items():
+        if schema.get("type", "string") != "string":
+            continue
+        if name == "query" and re.search(r"sql|database", tool.get("name", "") + tool.get("description", ""), re.I):
+            arguments[name] = _sql(conversation)
+        elif name in ("region", "location", "city"):
+            arguments[name] = _region(user)
+        elif name in ("table_names", "tables"):
+            arguments[name] = "customer_summary, service_plans"
+        elif name == "mode":
+            arguments[name] = schema.get("default", "hybrid")
+        else:
+            arguments[name] = _first_line(user, 200)
+    return arguments
+
+
+# Tools worth calling first when several are offered (e.g. the SQL agent's toolkit)
+TOOL_PREFERENCE = ("sql_db_query", "check_network_status", "search_troubleshooting_guide")
+
+
+SQL_EXPLORATION = ("sql_db_list_tables", "sql_db_schema", "sql_db_query")
+
+
+def _sql_exploration_step(messages: List[dict]) -> Optional[str]:
+    """The next SQL toolkit tool the stock agent prompt leads to, or None once it has queried."""
+    called = {c["function"]["name"] for m in messages for c in m.get("tool_calls") or []}
+    return next((name for name in SQL_EXPLORATION if name not in called), None)
+
+
+def _tool_named(tools: List[dict], name: str) -> dict:
+    return next(f for f in (t.get("function", t) for t in tools) if f.get("name") == name)
+
+
+def _tool_call(tool: dict, messages: List[dict]) -> dict:
+    return {
+        "id": f"call_{uuid.uuid4().hex[:24]}",
+        "type": "function",
+        "function": {"name": tool["name"], "arguments": json.dumps(_tool_arguments(tool, messages))},
+    }
+
+
+def _pick_tool(tools: List[dict]) -> dict:
+    functions = [t.get("function", t) for t in tools]
+    for preferred in TOOL_PREFERENCE:
+        for f in functions:
+            if f.get("name") == preferred:
+                return f
+    return functions[0]
+
+
+# --- 3. Rules ---
+
+class FakeOpenAI:
+    def __init__(self, latency_ms: float = 300, ms_per_token: float = 0, jitter_ms: float = 0,
+                 seed: int = 0, script: Sequence[Tuple[str, str]] = ()):
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.jitter_ms = jitter_ms
+        self.script: List[Tuple[Pattern, str]] = [(re.compile(p, re.I), reply) for p, reply in script]
+        self.stats = FakeStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def delay_ms(self, words: int) -> float:
+        with self._rng_lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(self.latency_ms + jitter, 0.0) + self.ms_per_token * words
+
+    def reply(self, body: dict) -> Reply:
+        messages = body.get("messages", [])
+        system = "\n".join(_text(m.get("content")) for m in messages if m.get("role") == "system")
+        conversation = _conversation(messages)
+        last = messages[-1] if messages else {}
+        user = _text((_last(messages, "user") or {}).get("content"))
+        wants_terminate = "TERMINATE" in conversation
+
+        for pattern, scripted in self.script:
+            if pattern.search(user):
+                return Reply(scripted, [])
+
+        # AutoGen group chat: "select the next role from [A, B, C] to play"
+        roles = re.search(r"select the next role from \[([^\]]+)\]", conversation)
+        if roles:
+            return Reply(self._next_speaker([r.strip(" '\"") for r in roles.group(1).split(",")], messages), [])
+
+        # Intent classification fallback: "... exactly one of: billing, network, ... Reply with the label only."
+        labels = re.search(r"exactly one of: ([a-z, ]+)\.", system)
+        if labels:
+            options = [label.strip() for label in labels.group(1).split(",")]
+            return Reply(next((o for o in options if o in user.lower()), options[-1]), [])
+
+        # Function calling: call a tool until there is a result to answer from
+        tools = body.get("tools") or [{"type": "function", "function": f} for f in body.get("functions", [])]
+        offered = {t.get("function", t).get("name") for t in tools}
+        # Answer from a tool result only if it came from one of our own tools; in a group
+        # chat the result may belong to another agent, and then we still make our own call
+        last_call = next((m for m in reversed(messages) if m.get("tool_calls")), None)
+        tool_result = last.get("role") in ("tool", "function") and (
+            not tools or last_call is None
+            or {c["function"]["name"] for c in last_call["tool_calls"]} <= offered
+        )
+        # LangChain's stock SQL agent prompt ("I should look at the tables ...") explores first:
+        # list the tables, fetch their schemas, then query
+        if "sql_db_list_tables" in offered and "I should look at the tables" in conversation:
+            step = _sql_exploration_step(messages)
+            if step is not None:
+                return Reply(None, [_tool_call(_tool_named(tools, step), messages)])
+        if tools and not tool_result and body.get("tool_choice") != "none":
+            return Reply(None, [_tool_call(_pick_tool(tools), messages)])
+        if tool_result:
+            return Reply(f"Here is what I found: {_first_line(_text(last.get('content')))}", [])
+        # AutoGen: once an agent has answered, close the chat with a bare TERMINATE
+        if wants_terminate and last.get("role") == "user" and _text(last.get("content")).startswith("Here is what I found"):
+            return Reply("TERMINATE", [])
+
+        # ReAct text protocol (CrewAI without native tool calling)
+        if "Final Answer:" in conversation and "Action Input:" in system:
+            action = re.search(r"Tool Name: ([^\n]+)", system)
+            if action and "Observation:" not in _text(last.get("content")):
+                query = _sql(conversation)
+                return Reply(f"Thought: I should look this up.\nAction: {action.group(1).strip()}\n"
+                             f"Action Input: {json.dumps({'query': query})}", [])
+            return Reply("Thought: I now know the final answer\n"
+                         f"Final Answer: {self._answer(user, conversation)}", [])
+        if "Final Answer:" in conversation:
+            return Reply(f"Thought: I now know the final answer\nFinal Answer: {self._answer(user, conversation)}", [])
+
+        return Reply(self._answer(user, conversation), [])
+
+    @staticmethod
+    def _answer(user: str, conversation: str) -> str:
+        context = re.search(r"Context information is below\.\s*-+\s*(.+?)\s*-+", conversation, re.S)
+        if context:
+            text = re.sub(r"^\w+: .*$", "", context.group(1), flags=re.M)  # drop metadata lines
+            return f"According to our guides: {_first_line(text, 240)}"
+        question = re.search(r"Customer question: (.+)", user)
+        return f"Thanks for your question about \"{_first_line(question.group(1) if question else user, 120)}\". " \
+               "Here is a short answer."
+
+    @staticmethod
+    def _next_speaker(roles: List[str], messages: List[dict]) -> str:
+        """The n-th worker after n tool results: each specialist uses its tool in turn."""
+        workers = [r for r in roles if "proxy" not in r.lower()] or roles
+        results = sum(m.get("role") in ("tool", "function") for m in messages)
+        return workers[min(results, len(workers) - 1)]
+
+
+# --- 4. Protocol ---
+
+def _usage(body: dict, words: int) -> dict:
+    prompt_tokens = sum(len(_text(m.get("content")).split()) for m in body.get("messages", []))
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": words, "total_tokens": prompt_tokens + words}
+
+
+def _completion(body: dict, reply: Reply, words: int) -> dict:
+    message = {"role": "assistant", "content": reply.content}
+    if reply.tool_calls:
+        message["tool_calls"] = reply.tool_calls
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "message": message, "logprobs": None,
+                     "finish_reason": "tool_calls" if reply.tool_calls else "stop"}],
+        "usage": _usage(body, words),
+    }
+
+
+def _chunk(body: dict, chunk_id: str, delta: dict, finish_reason=None) -> bytes:
+    payload = {
+        "id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+        "model": body.get("model", "fake"),
+        "choices": [{"index": 0, "delta": delta, "logprobs": None, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n".encode()
+
+
+def _embedding(text: str, dimensions: int) -> List[float]:
+    """Deterministic unit vector per text (same text, same vector)."""
+    rng = random.Random(hashlib.sha256(text.encode()).digest())
+    vector = [rng.gauss(0, 1) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def create_app(fake: FakeOpenAI) -> web.Application:
+    async def chat_completions(request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        reply = fake.reply(body)
+        words = len((reply.content or "").split()) + len(reply.tool_calls)
+        first_token_ms = fake.delay_ms(0)
+        total_ms = first_token_ms + fake.ms_per_token * words
+        fake.stats.add("completion", total_ms)
+
+        if not body.get("stream"):
+            await asyncio.sleep(total_ms / 1000)
+            return web.json_response(_completion(body, reply, words))
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        await asyncio.sleep(first_token_ms / 1000)
+        await response.write(_chunk(body, chunk_id, {"role": "assistant", "content": ""}))
+        if reply.tool_calls:
+            await response.write(_chunk(body, chunk_id, {"tool_calls": [
+                {"index": i, **call} for i, call in enumerate(reply.tool_calls)
+            ]}))
+        else:
+            for i, word in enumerate((reply.content or "").split(" ")):
+                await asyncio.sleep(fake.ms_per_token / 1000)
+                await response.write(_chunk(body, chunk_id, {"content": word if i == 0 else " " + word}))
+        await response.write(_chunk(body, chunk_id, {}, "tool_calls" if reply.tool_calls else "stop"))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            usage_chunk = {"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                           "model": body.get("model", "fake"), "choices": [], "usage": _usage(body, words)}
+            await response.write(f"data: {json.dumps(usage_chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def embeddings(request: web.Request) -> web.Response:
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        dimensions = body.get("dimensions") or EMBEDDING_DIMENSIONS
+        delay_ms = fake.delay_ms(0) / 4
+        fake.stats.add("embeddings", delay_ms)
+        await asyncio.sleep(delay_ms / 1000)
+        data = [{"object": "embedding", "index": i, "embedding": _embedding(str(text), dimensions)}
+                for i, text in enumerate(inputs)]
+        tokens = sum(len(str(text).split()) for text in inputs)
+        return web.json_response({"object": "list", "data": data, "model": body.get("model", "fake"),
+                                  "usage": {"prompt_tokens": tokens, "total_tokens": tokens}})
+
+    async def models(request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": [{"id": "gpt-4o", "object": "model"}]})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response(fake.stats.snapshot())
+
+    app = web.Application(client_max_size=32 * 2**20)
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/v1/embeddings", embeddings)
+    app.router.add_get("/v1/models", models)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+# --- 5. Running it ---
+
+class FakeOpenAIServer:
+    """
+    Run the fake API on a background thread (port 0 picks a free one):
+
+        with FakeOpenAIServer(FakeOpenAI(latency_ms=200)) as server:
+            point_clients_at(server.base_url)
+    """
+
+    def __init__(self, fake: Optional[FakeOpenAI] = None, host: str = "127.0.0.1", port: int = 0):
+        self.fake = fake or FakeOpenAI()
+        self.host = host
+        self.port = port
+        self._loop = asyncio.new_event_loop()
+        self._runner: Optional[web.AppRunner] = None
+        self._thread = threading.Thread(target=self._loop.run_forever, name="fake-openai", daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def _start(self):
+        self._runner = web.AppRunner(create_app(self.fake), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def stop(self):
+        if self._runner is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def __enter__(self) -> "FakeOpenAIServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def point_clients_at(base_url: str):
+    """Send OpenAI, LangChain, litellm (CrewAI), AutoGen and LlamaIndex traffic to `base_url`."""
+    os.environ["OPENAI_BASE_URL"] = base_url
+    os.environ["OPENAI_API_BASE"] = base_url
+    os.environ.setdefault("OPENAI_API_KEY", "sk-fake")
+
+
+def load_script(path: str) -> List[Tuple[str, str]]:
+    """A JSON list of [regex, reply] pairs, matched against the last user message."""
+    with open(path, encoding="utf-8") as f:
+        return [tuple(pair) for pair in json.load(f)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300, help="time to first token per completion")
+    parser.add_argument("--ms-per-token", type=float, default=0, help="extra time per output word")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="+/- uniform jitter on latency")
+    parser.add_argument("--script", default=None, help="JSON file of [regex, reply] pairs")
+    args = parser.parse_args()
+
+    fake = FakeOpenAI(args.latency_ms, args.ms_per_token, args.jitter_ms,
+                      script=load_script(args.script) if args.script else ())
+    print(f"Fake OpenAI API on http://{args.host}:{args.port}/v1")
+    web.run_app(create_app(fake), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+# utils/geo_index.py
+"""
+In-memory index of the radio network: towers, service areas, coverage and
+active incidents, for "is there a problem near me" questions.
+
+    python -m utils.geo_index "Mumbai West"      # status of a place
+    python -m utils.geo_index 19.07 72.88        # nearest towers and coverage
+
+Lookups never touch SQLite:
+
+- towers sit in a grid of GRID_CELL_DEGREES latitude/longitude cells, so
+  the nearest towers to a point are found by scanning the rings of cells
+  around it, not every tower;
+- place names and postal codes resolve through a dictionary of normalised
+  keys ("mumbai west", "west mumbai", "400050", "maharashtra");
+- incidents are attached to the areas their location resolves to.
+
+The index is loaded once per database and refreshed incrementally: triggers
+(migration 3) append the key of every changed tower, area, coverage row and
+incident to geo_changes, and refresh() reloads just those rows.
+"""
+import math
+import re
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from config.config import Config
+from utils.database import INCIDENT_COLUMNS, Incident, db_connection
+
+GRID_CELL_DEGREES = 0.05  # about 5.5 km
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Changes kept in geo_changes; an index further behind than this reloads in full
+CHANGE_LOG_KEEP = 10_000
+
+# --- 1. Records ---
+
+@dataclass(frozen=True, slots=True)
+class Tower:
+    tower_id: str
+    area_id: str
+    latitude: float
+    longitude: float
+    tower_type: str
+    operational_status: str
+    technologies: Tuple[str, ...]  # active technologies, e.g. ('4G', '5G')
+
+@dataclass(frozen=True, slots=True)
+class Coverage:
+    technology: str
+    signal_strength: str
+    download_mbps: Optional[float]
+    upload_mbps: Optional[float]
+    latency_ms: Optional[int]
+
+@dataclass(frozen=True, slots=True)
+class Area:
+    area_id: str
+    city: str
+    district: str
+    postal_code: Optional[str]
+    region: Optional[str]
+
+    @property
+    def name(self) -> str:
+        return f"{self.city} {self.district}"
+
+@dataclass(frozen=True, slots=True)
+class AreaStatus:
+    area: Area
+    towers: Tuple[Tower, ...]
+    incidents: Tuple[Incident, ...]
+    coverage: Tuple[Coverage, ...]
+
+    @property
+    def towers_down(self) -> Tuple[Tower, ...]:
+        return tuple(t for t in self.towers if t.operational_status != "Active")
+
+    @property
+    def healthy(self) -> bool:
+        return not self.incidents and not self.towers_down
+
+@dataclass(frozen=True, slots=True)
+class NearbyTower:
+    tower: Tower
+    distance_km: float
+
+
+def normalise_place(text: str) -> str:
+    """'  Mumbai-West, ' -> 'mumbai west'"""
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lon2 - lon1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell(lat: float, lon: float) -> Tuple[int, int]:
+    return int(math.floor(lon / GRID_CELL_DEGREES)), int(math.floor(lat / GRID_CELL_DEGREES))
+
+
+# --- 2. Loading ---
+
+TOWERS_QUERY = """
+SELECT t.tower_id, t.area_id, t.latitude, t.longitude, t.tower_type, t.operational_status,
+       (SELECT GROUP_CONCAT(technology) FROM (SELECT DISTINCT technology FROM tower_technologies tt
+                                               WHERE tt.tower_id = t.tower_id AND tt.active ORDER BY technology))
+FROM cell_towers t
+"""
+AREAS_QUERY = "SELECT area_id, city, district, postal_code, region FROM service_areas"
+COVERAGE_QUERY = """
+SELECT area_id, technology, signal_strength_category, avg_download_speed_mbps, avg_upload_speed_mbps, avg_latency_ms
+FROM coverage_quality
+"""
+ACTIVE_INCIDENTS_ALL = f"SELECT {INCIDENT_COLUMNS} FROM network_incidents WHERE status = 'Active'"
+
+
+def _tower(row) -> Tower:
+    *fields, technologies = row
+    return Tower(*fields, tuple(technologies.split(",")) if technologies else ())
+
+
+class GeoIndex:
+    """Towers, areas, coverage and active incidents of one database, queryable in memory."""
+
+    def __init__(self):
+        # Values are replaced, never mutated in place, so readers need no lock
+        self.towers: Dict[str, Tower] = {}
+        self.areas: Dict[str, Area] = {}
+        self.coverage: Dict[str, Tuple[Coverage, ...]] = {}
+        self.incidents: Dict[str, Incident] = {}  # active only
+        self._grid: Dict[Tuple[int, int], Tuple[str, ...]] = {}
+        self._area_towers: Dict[str, Tuple[str, ...]] = {}
+        self._places: Dict[str, Tuple[str, ...]] = {}
+        self._incident_areas: Dict[str, Tuple[str, ...]] = {}
+        self._place_keys: List[str] = []  # longest first, for matching inside free text
+        self._bounds = (0, 0, 0, 0)
+        self._lock = threading.Lock()
+        self.seq = 0
+
+    # Full load
+
+    def load(self, conn) -> "GeoIndex":
+        with self._lock:
+            self.seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM geo_changes").fetchone()[0]
+            self.areas = {row[0]: Area(*row) for row in conn.execute(AREAS_QUERY)}
+            self.towers = {t.tower_id: t for t in map(_tower, conn.execute(TOWERS_QUERY))}
+            coverage: Dict[str, List[Coverage]] = {}
+            for area_id, *fields in conn.execute(COVERAGE_QUERY):
+                coverage.setdefault(area_id, []).append(Coverage(*fields))
+            self.coverage = {area_id: tuple(rows) for area_id, rows in coverage.items()}
+            self.incidents = {row[0]: Incident(*row) for row in conn.execute(ACTIVE_INCIDENTS_ALL)}
+            self._rebuild()
+        return self
+
+    def _rebuild(self):
+        grid: Dict[Tuple[int, int], List[str]] = {}
+        area_towers: Dict[str, List[str]] = {}
+        for tower in self.towers.values():
+            grid.setdefault(_cell(tower.latitude, tower.longitude), []).append(tower.tower_id)
+            area_towers.setdefault(tower.area_id, []).append(tower.tower_id)
+        self._grid = {cell: tuple(ids) for cell, ids in grid.items()}
+        self._area_towers = {area_id: tuple(ids) for area_id, ids in area_towers.items()}
+        cells = list(self._grid) or [(0, 0)]
+        self._bounds = (min(c[0] for c in cells), max(c[0] for c in cells),
+                        min(c[1] for c in cells), max(c[1] for c in cells))
+
+        places: Dict[str, List[str]] = {}
+        for area in self.areas.values():
+            for key in self._area_keys(area):
+                places.setdefault(key, []).append(area.area_id)
+        self._places = {key: tuple(ids) for key, ids in places.items()}
+        self._place_keys = sorted(self._places, key=len, reverse=True)
+        self._incident_areas = {i.incident_id: self._resolve_ids(i.location or "") for i in self.incidents.values()}
+
+    @staticmethod
+    def _area_keys(area: Area) -> Iterable[str]:
+        city, district = normalise_place(area.city), normalise_place(area.district)
+        keys = [city, f"{city} {district}", f"{district} {city}"]
+        if area.postal_code:
+            keys.append(normalise_place(area.postal_code))
+        if area.region:
+            keys.append(normalise_place(area.region))
+        return [k for k in keys if k]
+
+    # Incremental refresh
+
+    def refresh(self, conn) -> int:
+        """Apply the rows changed since the last load/refresh; returns how many keys were reloaded."""
+        changes = conn.execute("SELECT seq, table_name, row_key FROM geo_changes WHERE seq > ? ORDER BY seq",
+                               (self.seq,)).fetchall()
+        if not changes:
+            return 0
+        oldest = conn.execute("SELECT MIN(seq) FROM geo_changes").fetchone()[0]
+        if oldest > self.seq + 1:
+            # The log was pruned past us: start over
+            self.load(conn)
+            return len(changes)
+
+        touched: Dict[str, set] = {}
+        for _seq, table, key in changes:
+            touched.setdefault(table, set()).add(key)
+        with self._lock:
+            for area_id in touched.get("service_areas", ()):
+                row = conn.execute(AREAS_QUERY + " WHERE area_id = ?", (area_id,)).fetchone()
+                self.areas = self._replace(self.areas, area_id, Area(*row) if row else None)
+            for tower_id in touched.get("cell_towers", set()) | touched.get("tower_technologies", set()):
+                row = conn.execute(TOWERS_QUERY + " WHERE t.tower_id = ?", (tower_id,)).fetchone()
+                self.towers = self._replace(self.towers, tower_id, _tower(row) if row else None)
+            for area_id in touched.get("coverage_quality", ()):
+                rows = conn.execute(COVERAGE_QUERY + " WHERE area_id = ?", (area_id,)).fetchall()
+                self.coverage = self._replace(self.coverage, area_id, tuple(Coverage(*r[1:]) for r in rows) or None)
+            for incident_id in touched.get("network_incidents", ()):
+                row = conn.execute(ACTIVE_INCIDENTS_ALL + " AND incident_id = ?", (incident_id,)).fetchone()
+                self.incidents = self._replace(self.incidents, incident_id, Incident(*row) if row else None)
+            self._rebuild()
+            self.seq = changes[-1][0]
+        return sum(len(keys) for keys in touched.values())
+
+    @staticmethod
+    def _replace(mapping: dict, key: str, value):
+        """Copy-on-write update, so concurrent readers see either the old or the new dict."""
+        updated = dict(mapping)
+        if value is None:
+            updated.pop(key, None)
+        else:
+            updated[key] = value
+        return updated
+
+    # Queries
+
+    def nearest_towers(self, latitude: float, longitude: float, k: int = 3,
+                       status: Optional[str] = None) -> List[NearbyTower]:
+        """The k closest towers (optionally only those with this operational_status), nearest first."""
+        cx, cy = _cell(latitude, longitude)
+        min_x, max_x, min_y, max_y = self._bounds
+        max_ring = max(abs(cx - min_x), abs(cx - max_x), abs(cy - min_y), abs(cy - max_y))
+        # A cell is narrowest (in km) at the latitude furthest from the equator
+        far_lat = max(abs(latitude), abs(min_y * GRID_CELL_DEGREES), abs((max_y + 1) * GRID_CELL_DEGREES))
+        cell_km = GRID_CELL_DEGREES * KM_PER_DEGREE * math.cos(math.radians(min(far_lat, 89.0)))
+        towers, grid = self.towers, self._grid
+        found: List[Tuple[float, Tower]] = []
+        for ring in range(max_ring + 1):
+            if 8 * ring > len(towers):
+                # Far from every tower (or very sparse): the rings now cost more than a full scan
+                found = [(haversine_km(latitude, longitude, t.latitude, t.longitude), t)
+                         for t in towers.values() if not status or t.operational_status == status]
+                break
+            for cell in self._ring(cx, cy, ring):
+                for tower_id in grid.get(cell, ()):
+                    tower = towers.get(tower_id)
+                    if tower is None or (status and tower.operational_status != status):
+                        continue
+                    found.append((haversine_km(latitude, longitude, tower.latitude, tower.longitude), tower))
+            # Anything in an unscanned ring is at least `ring` whole cells away
+            if len(found) >= k:
+                found.sort(key=lambda f: f[0])
+                if found[k - 1][0] <= ring * cell_km:
+                    break
+        found.sort(key=lambda f: f[0])
+        return [NearbyTower(t, round(distance, 3)) for distance, t in found[:k]]
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int) -> Iterable[Tuple[int, int]]:
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+    def _resolve_ids(self, place: str) -> Tuple[str, ...]:
+        text = normalise_place(place)
+        if not text:
+            return ()
+        if text in self._places:
+            return self._places[text]
+        postal = re.search(r"\b\d{6}\b", text)
+        if postal and postal.group(0) in self._places:
+            return self._places[postal.group(0)]
+        padded = f" {text} "
+        for key in self._place_keys:
+            if f" {key} " in padded:
+                return self._places[key]
+        return ()
+
+    def resolve(self, place: str) -> List[Area]:
+        """Areas a place name, postal code or free-text question refers to (most specific match)."""
+        return [self.areas[a] for a in self._resolve_ids(place) if a in self.areas]
+
+    def area_status(self, area_id: str) -> Optional[AreaStatus]:
+        area = self.areas.get(area_id)
+        if area is None:
+            return None
+        incidents = tuple(i for i_id, i in self.incidents.items() if area_id in self._incident_areas.get(i_id, ()))
+        towers = tuple(self.towers[t] for t in self._area_towers.get(area_id, ()) if t in self.towers)
+        return AreaStatus(area, towers, incidents, self.coverage.get(area_id, ()))
+
+    def status_of(self, place: str) -> List[AreaStatus]:
+        """Status of every area `place` resolves to."""
+        return [self.area_status(area.area_id) for area in self.resolve(place)]
+
+    def coverage_at(self, latitude: float, longitude: float) -> Optional[AreaStatus]:
+        """Status (with coverage) of the area served by the nearest tower."""
+        nearest = self.nearest_towers(latitude, longitude, k=1)
+        return self.area_status(nearest[0].tower.area_id) if nearest else None
+
+    def affected_areas(self) -> List[AreaStatus]:
+        """Areas with an active incident or a tower that is not Active."""
+        statuses = (self.area_status(area_id) for area_id in self.areas)
+        return [s for s in statuses if not s.healthy]
+
+
+# --- 3. Shared instance ---
+
+_indexes: Dict[str, Tuple[GeoIndex, float]] = {}  # db path -> (index, last refresh check)
+_indexes_lock = threading.Lock()
+
+
+def get_geo_index() -> GeoIndex:
+    """
+    The index for Config.DB_PATH: loaded on first use, then brought up to date
+    from geo_changes at most every GEO_REFRESH_SECONDS (one indexed read).
+    """
+    path = Config.DB_PATH
+    entry = _indexes.get(path)
+    now = time.monotonic()
+    if entry is not None and now - entry[1] < Config.GEO_REFRESH_SECONDS:
+        return entry[0]
+    with _indexes_lock:
+        entry = _indexes.get(path)
+        with db_connection() as conn:
+            if entry is None:
+                index = GeoIndex().load(conn)
+                print(f"   [Geo] Indexed {len(index.towers)} towers in {len(index.areas)} areas")
+            else:
+                index = entry[0]
+                index.refresh(conn)
+        _indexes[path] = (index, now)
+    return index
+
+
+def prune_geo_changes(conn, keep: int = CHANGE_LOG_KEEP) -> int:
+    """Drop all but the newest `keep` change-log rows (indexes further behind reload in full)."""
+    return conn.execute("DELETE FROM geo_changes WHERE seq <= (SELECT MAX(seq) FROM geo_changes) - ?",
+                        (keep,)).rowcount
+
+
+# --- 4. Dashboard data ---
+
+TOWER_STATUS_COLOURS = {"Active": "#2e7d32", "Maintenance": "#f9a825"}  # anything else is red
+
+
+def get_tower_map_data() -> pd.DataFrame:
+    """One row per tower with latitude/longitude/color columns, ready for st.map."""
+    towers = list(get_geo_index().towers.values())
+    return pd.DataFrame({
+        "tower_id": [t.tower_id for t in towers],
+        "area_id": [t.area_id for t in towers],
+        "latitude": [t.latitude for t in towers],
+        "longitude": [t.longitude for t in towers],
+        "operational_status": [t.operational_status for t in towers],
+        "color": [TOWER_STATUS_COLOURS.get(t.operational_status, "#c62828") for t in towers],
+    })
+
+
+def get_affected_areas_data() -> pd.DataFrame:
+    """Areas with an active incident or a tower down (DataFrame for the dashboard tables)."""
+    rows = [{
+        "area": s.area.name,
+        "postal_code": s.area.postal_code,
+        "region": s.area.region,
+        "towers_down": len(s.towers_down),
+        "towers": len(s.towers),
+        "active_incidents": ", ".join(i.incident_id for i in s.incidents),
+        "best_coverage": max((c.technology for c in s.coverage), default=None),
+    } for s in get_geo_index().affected_areas()]
+    return pd.DataFrame(rows, columns=["area", "postal_code", "region", "towers_down", "towers",
+                                       "active_incidents", "best_coverage"])
+
+
+# --- 5. Text for agents ---
+
+def describe_status(status: AreaStatus) -> str:
+    area = status.area
+    lines = [f"{area.name} ({area.region or 'unknown region'}, PIN {area.postal_code or '-'}): "
+             f"{len(status.towers) - len(status.towers_down)}/{len(status.towers)} towers active"]
+    for tower in status.towers_down:
+        lines.append(f"  - tower {tower.tower_id} ({tower.tower_type}) is {tower.operational_status}")
+    for incident in status.incidents:
+        lines.append(f"  - ACTIVE INCIDENT {incident.incident_id}: {incident.incident_type}, {incident.severity} "
+                     f"severity, affects {incident.affected_services}, since {incident.start_time}")
+    for c in status.coverage:
+        lines.append(f"  - {c.technology} coverage {c.signal_strength}: {c.download_mbps} Mbps down, "
+                     f"{c.latency_ms} ms latency")
+    return "\n".join(lines)
+
+
+def describe_location(location: str) -> str:
+    """Network status for a place name, postal code or 'lat, lon' (the network agent's tool)."""
+    index = get_geo_index()
+    point = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*", location)
+    if point:
+        latitude, longitude = float(point.group(1)), float(point.group(2))
+        nearby = index.nearest_towers(latitude, longitude, k=3)
+        if not nearby:
+            return "No towers are indexed."
+        towers = "; ".join(f"{n.tower.tower_id} {n.tower.operational_status} {n.distance_km:.1f} km "
+                           f"({'/'.join(n.tower.technologies) or 'no active radio'})" for n in nearby)
+        return f"Nearest towers: {towers}\n" + describe_status(index.area_status(nearby[0].tower.area_id))
+    statuses = index.status_of(location)
+    if not statuses:
+        return f"'{location}' is not a service area we know."
+    return "\n".join(describe_status(s) for s in statuses)
+
+
+if __name__ == "__main__":
+    index = get_geo_index()
+    started = time.perf_counter()
+    if len(sys.argv) == 3:
+        print(describe_location(f"{sys.argv[1]}, {sys.argv[2]}"))
+    else:
+        print(describe_location(" ".join(sys.argv[1:]) or "Mumbai"))
+    print(f"\n({(time.perf_counter() - started) * 1e6:.0f} us)")
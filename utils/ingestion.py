@@ -0,0 +1,218 @@
+# utils/ingestion.py
+"""
+Document ingestion with bounded memory, for uploads of any size.
+
+    upload  the uploaded file is copied to data/documents INGEST_UPLOAD_CHUNK_BYTES
+            at a time (through a hidden .part file, so a half-written upload is
+            never indexed)
+    parse   each changed file is planned into parts (PDF page ranges, text byte
+            ranges; utils/knowledge_sync.py) and the parts are parsed and chunked
+            in a process pool, at most two per worker in flight, in order
+    embed   chunks are embedded INGEST_EMBED_BATCH at a time (cached ones skipped)
+    index   and inserted into the vector index as each batch completes
+
+IngestStats counts items, units and seconds per stage and forwards progress
+to a callback, progress(stage, done, total), e.g. a Streamlit progress bar.
+
+    python -m utils.ingestion manual.pdf other_manual.pdf
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from llama_index.core import Settings
+from llama_index.core.schema import BaseNode
+
+from config.config import Config
+from utils.knowledge_sync import ParseTask, parse_task
+
+ProgressCallback = Callable[[str, int, Optional[int]], None]
+
+STAGES = ("upload", "parse", "embed", "index")
+STAGE_UNITS = {"upload": "bytes", "parse": "chunks", "embed": "chunks", "index": "chunks"}
+
+
+# --- 1. Stats ---
+
+class StageThroughput(NamedTuple):
+    stage: str
+    items: int      # upload reads, parsed parts, embedding batches, insert batches
+    units: int      # bytes for the upload, chunks for the rest
+    unit: str
+    seconds: float  # time spent in the stage (summed over workers for parse)
+
+    @property
+    def per_second(self) -> float:
+        return self.units / self.seconds if self.seconds else 0.0
+
+
+class IngestStats:
+    """Thread-safe per-stage counters, plus the progress callback."""
+
+    def __init__(self, progress: Optional[ProgressCallback] = None):
+        self._progress = progress
+        self._lock = threading.Lock()
+        self._stages: Dict[str, List[float]] = {stage: [0, 0, 0.0] for stage in STAGES}
+
+    def record(self, stage: str, items: int, units: int, seconds: float):
+        with self._lock:
+            counters = self._stages[stage]
+            counters[0] += items
+            counters[1] += units
+            counters[2] += seconds
+
+    def progress(self, stage: str, done: int, total: Optional[int]):
+        if self._progress is not None:
+            self._progress(stage, done, total)
+
+    def stages(self) -> List[StageThroughput]:
+        with self._lock:
+            return [StageThroughput(stage, int(items), int(units), STAGE_UNITS[stage], seconds)
+                    for stage, (items, units, seconds) in self._stages.items() if items]
+
+    def describe(self) -> str:
+        """One line per stage that did any work: '<stage>: <units> in <s> (<rate>/s)'."""
+        lines = []
+        for s in self.stages():
+            if s.unit == "bytes":
+                amount, rate = f"{s.units / 1e6:.1f} MB", f"{s.per_second / 1e6:.1f} MB/s"
+            else:
+                amount, rate = f"{s.units:,} {s.unit}", f"{s.per_second:,.0f} {s.unit}/s"
+            lines.append(f"{s.stage}: {amount} in {s.seconds:.2f}s ({rate})")
+        return "\n".join(lines)
+
+
+# --- 2. Upload ---
+
+def save_upload(uploaded_file, dest_dir: str, chunk_bytes: Optional[int] = None,
+                stats: Optional[IngestStats] = None) -> str:
+    """
+    Copy a file-like upload (read(n) and .name, e.g. Streamlit's UploadedFile)
+    into dest_dir a chunk at a time. Returns the saved path.
+    """
+    chunk_bytes = chunk_bytes or Config.INGEST_UPLOAD_CHUNK_BYTES
+    stats = stats or IngestStats()
+    name = os.path.basename(uploaded_file.name)
+    if not name or name.startswith("."):
+        raise ValueError(f"Invalid document name: {uploaded_file.name!r}")
+
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, name)
+    tmp_path = os.path.join(dest_dir, f".{name}.part")  # hidden: never picked up by a sync
+    total = getattr(uploaded_file, "size", None)
+    if hasattr(uploaded_file, "seek"):
+        uploaded_file.seek(0)
+
+    written = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            while True:
+                started = time.perf_counter()
+                block = uploaded_file.read(chunk_bytes)
+                if not block:
+                    break
+                f.write(block)
+                written += len(block)
+                stats.record("upload", 1, len(block), time.perf_counter() - started)
+                stats.progress("upload", written, total)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+# --- 3. Parsing pool ---
+
+def _init_worker(chunk_size: int, chunk_overlap: int):
+    # Workers are spawned fresh, so they need the parent's chunking settings
+    Settings.chunk_size = chunk_size
+    Settings.chunk_overlap = chunk_overlap
+
+
+def _timed_parse(task: ParseTask) -> Tuple[List[BaseNode], float]:
+    started = time.perf_counter()
+    nodes = parse_task(task)
+    return nodes, time.perf_counter() - started
+
+
+def parse_documents(tasks: Iterable[ParseTask], workers: Optional[int] = None,
+                    stats: Optional[IngestStats] = None) -> Iterator[Tuple[ParseTask, List[BaseNode]]]:
+    """
+    Yield (task, nodes) in task order. With several workers and tasks the parts
+    are parsed in a process pool, at most two per worker submitted ahead of the
+    consumer, so unconsumed results never pile up.
+    """
+    tasks = list(tasks)
+    workers = min(workers or Config.INGEST_WORKERS, len(tasks))
+    stats = stats or IngestStats()
+
+    def done(i, nodes, seconds):
+        stats.record("parse", 1, len(nodes), seconds)
+        stats.progress("parse", i + 1, len(tasks))
+
+    if workers <= 1:
+        for i, task in enumerate(tasks):
+            nodes, seconds = _timed_parse(task)
+            done(i, nodes, seconds)
+            yield task, nodes
+        return
+
+    # spawn, not fork: the parent may be a threaded server (Streamlit, the API)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(Settings.chunk_size, Settings.chunk_overlap),
+    )
+    try:
+        remaining = iter(tasks)
+        in_flight = deque((task, pool.submit(_timed_parse, task)) for task in islice(remaining, workers * 2))
+        for i in range(len(tasks)):
+            task, future = in_flight.popleft()
+            nodes, seconds = future.result()
+            following = next(remaining, None)
+            if following is not None:
+                in_flight.append((following, pool.submit(_timed_parse, following)))
+            done(i, nodes, seconds)
+            yield task, nodes
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+# --- 4. CLI ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Add documents to the knowledge base and report stage throughput")
+    parser.add_argument("files", nargs="+", help="documents to copy into data/documents")
+    parser.add_argument("--workers", type=int, default=None, help="parsing processes (default INGEST_WORKERS)")
+    args = parser.parse_args()
+
+    from utils.document_loader import reconcile_knowledge_base
+
+    def progress(stage, done, total):
+        print(f"\r   [Ingest] {stage}: {done:,}" + (f"/{total:,}" if total else ""), end="", flush=True)
+
+    stats = IngestStats(progress)
+    for file_path in args.files:
+        with open(file_path, "rb") as f:
+            save_upload(f, Config.DOCS_DIR, stats=stats)
+    report = reconcile_knowledge_base(stats=stats, workers=args.workers)
+    print()
+    if report is None:
+        print("No documents to index.")
+        return
+    print(f"Indexed in {report.seconds:.2f}s: {report.nodes_inserted} chunks inserted, "
+          f"{report.embeddings_computed} embedded, {report.embeddings_cached} from cache.")
+    print(stats.describe())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+# utils/knowledge_sync.py
+"""
+Incremental sync between data/documents and the persisted vector index.
+
+A manifest next to the persisted store records, per document, its stat,
+its content hash and the ids/hashes of the chunks it produced. Syncing only
+re-reads files whose stat changed, only touches the nodes of files that
+actually changed, and embeds only chunks missing from the on-disk embedding
+cache.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from llama_index.core import Settings, SimpleDirectoryReader
+from llama_index.core.readers.base import BaseReader
+from llama_index.core.schema import BaseNode, Document, MetadataMode, NodeRelationship
+
+from config.config import Config
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+class SyncReport(NamedTuple):
+    files_added: int
+    files_changed: int
+    files_removed: int
+    nodes_inserted: int
+    nodes_deleted: int
+    embeddings_cached: int
+    embeddings_computed: int
+    seconds: float
+    stages: Optional["IngestStats"] = None  # per-stage counts and throughput (utils/ingestion.py)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.nodes_inserted or self.nodes_deleted or self.files_added or self.files_removed)
+
+
+# --- Embedding cache ---
+
+class EmbeddingCache:
+    """SQLite cache of embeddings keyed by embedding model and chunk hash."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or Config.EMBEDDING_CACHE_PATH, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                chunk_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, chunk_hash)
+            )
+        """)
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        hashes = list(hashes)
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT chunk_hash, vector FROM embeddings WHERE model = ? "
+                    f"AND chunk_hash IN ({','.join('?' * len(batch))})",
+                    [model, *batch],
+                )
+                for chunk_hash, blob in rows:
+                    found[chunk_hash] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, chunk_hash, vector) VALUES (?, ?, ?)",
+                [(model, h, array("f", v).tobytes()) for h, v in vectors.items()],
+            )
+            self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def chunk_hash(node: BaseNode) -> str:
+    """Hash of exactly the text the embedding model sees for this node."""
+    return hashlib.sha256(node.get_content(metadata_mode=MetadataMode.EMBED).encode("utf-8")).hexdigest()
+
+
+def embed_nodes(nodes: List[BaseNode], cache: EmbeddingCache):
+    """Attach embeddings to `nodes`, calling the model only for uncached chunks."""
+    embed_model = Settings.embed_model
+    model = getattr(embed_model, "model_name", None) or type(embed_model).__name__
+
+    texts = {}
+    for node in nodes:
+        texts.setdefault(chunk_hash(node), node.get_content(metadata_mode=MetadataMode.EMBED))
+
+    vectors = cache.get_many(model, texts)
+    missing = [h for h in texts if h not in vectors]
+    if missing:
+        computed = embed_model.get_text_embedding_batch([texts[h] for h in missing])
+        new_vectors = dict(zip(missing, computed))
+        cache.put_many(model, new_vectors)
+        vectors.update(new_vectors)
+
+    for node in nodes:
+        node.embedding = vectors[chunk_hash(node)]
+    return len(texts) - len(missing), len(missing)
+
+
+# --- Manifest ---
+
+def manifest_path(persist_dir: str) -> str:
+    return os.path.join(persist_dir, MANIFEST_NAME)
+
+
+def load_manifest(persist_dir: str) -> Optional[dict]:
+    try:
+        with open(manifest_path(persist_dir), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def save_manifest(persist_dir: str, manifest: dict):
+    os.makedirs(persist_dir, exist_ok=True)
+    tmp_path = manifest_path(persist_dir) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path(persist_dir))
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_document_files(docs_dir: str) -> Dict[str, os.stat_result]:
+    """Top-level, non-hidden files (what SimpleDirectoryReader would load)."""
+    files = {}
+    if not os.path.isdir(docs_dir):
+        return files
+    for entry in os.scandir(docs_dir):
+        if entry.is_file() and not entry.name.startswith("."):
+            files[entry.name] = entry.stat()
+    return files
+
+
+# --- Parsing ---
+
+class ParseTask(NamedTuple):
+    """
+    One unit of parsing work: a whole file, or (for large files) a range of
+    PDF pages or of text bytes, so no worker ever holds more than one range.
+    """
+    path: str
+    part: int = 0                  # position of this range within the file
+    start: int = 0                 # first page (PDF) or byte (text)
+    stop: Optional[int] = None     # end of the range, exclusive; None for a whole file
+    kind: str = "file"             # 'file', 'pdf_pages' or 'text_bytes'
+
+
+# Plain-text formats that can be cut into byte ranges at line ends
+TEXT_SUFFIXES = (".txt", ".md")
+
+
+def plan_parse_tasks(path: str, pages_per_task: Optional[int] = None,
+                     segment_bytes: Optional[int] = None) -> List[ParseTask]:
+    """Whole files below the split thresholds; page or byte ranges above them."""
+    pages_per_task = pages_per_task or Config.INGEST_PAGES_PER_TASK
+    segment_bytes = segment_bytes or Config.INGEST_SEGMENT_BYTES
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".pdf":
+        from pypdf import PdfReader  # llama-index-readers-file's PDF dependency; reads pages lazily
+
+        pages = len(PdfReader(path).pages)
+        if pages > pages_per_task:
+            return [ParseTask(path, part, start, min(start + pages_per_task, pages), "pdf_pages")
+                    for part, start in enumerate(range(0, pages, pages_per_task))]
+    elif suffix in TEXT_SUFFIXES and os.path.getsize(path) > segment_bytes:
+        return [ParseTask(path, part, start, stop, "text_bytes")
+                for part, (start, stop) in enumerate(_text_segments(path, segment_bytes))]
+    return [ParseTask(path)]
+
+
+def _text_segments(path: str, segment_bytes: int) -> List[tuple]:
+    """Byte ranges of about segment_bytes, cut at line ends so no character or line is split."""
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        while bounds[-1] + segment_bytes < size:
+            f.seek(bounds[-1] + segment_bytes)
+            f.readline()  # to the end of the line we landed in
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+class _RangeReader(BaseReader):
+    """Reads one task's page or byte range, with the metadata SimpleDirectoryReader gives a whole file."""
+
+    def __init__(self, task: ParseTask):
+        self.task = task
+
+    def load_data(self, file, extra_info=None, **kwargs) -> List[Document]:
+        task, metadata = self.task, dict(extra_info or {})
+        if task.kind == "pdf_pages":
+            from pypdf import PdfReader
+
+            reader = PdfReader(str(file))
+            return [Document(text=reader.pages[i].extract_text() or "",
+                             metadata={**metadata, "page_label": reader.page_labels[i]})
+                    for i in range(task.start, task.stop)]
+        with open(file, "rb") as f:
+            f.seek(task.start)
+            text = f.read(task.stop - task.start).decode("utf-8", errors="ignore")
+        return [Document(text=text, metadata=metadata)]
+
+
+def parse_task(task: ParseTask) -> List[BaseNode]:
+    """Nodes of one task, with the splitter's random ids (NodeIds makes them deterministic)."""
+    extractor = {} if task.kind == "file" else {os.path.splitext(task.path)[1].lower(): _RangeReader(task)}
+    documents = SimpleDirectoryReader(input_files=[task.path], file_extractor=extractor,
+                                      filename_as_id=True).load_data()
+    for i, doc in enumerate(documents):
+        if task.kind != "file":
+            doc.id_ = f"{task.path}_part_{task.part}_{i}"
+        # Keep the embedded text location-independent so cached vectors survive a move
+        if "file_path" not in doc.excluded_embed_metadata_keys:
+            doc.excluded_embed_metadata_keys.append("file_path")
+    return Settings.node_parser.get_nodes_from_documents(documents)
+
+
+class NodeIds:
+    """
+    Deterministic node ids for one file (<file name>#<chunk hash>-<occurrence>),
+    so an unchanged chunk keeps its id across syncs. Feed it the file's tasks in order.
+    """
+
+    def __init__(self, path: str):
+        self.file_name = os.path.basename(path)
+        self.occurrences = Counter()
+
+    def assign(self, nodes: List[BaseNode]) -> List[BaseNode]:
+        new_ids = {}
+        for node in nodes:
+            h = chunk_hash(node)
+            self.occurrences[h] += 1
+            new_ids[node.node_id] = f"{self.file_name}#{h[:16]}-{self.occurrences[h]}"
+
+        for node in nodes:
+            node.id_ = new_ids[node.node_id]
+            for rel in (NodeRelationship.PREVIOUS, NodeRelationship.NEXT):
+                related = node.relationships.get(rel)
+                if related is not None and related.node_id in new_ids:
+                    related.node_id = new_ids[related.node_id]
+        return nodes
+
+
+def parse_file(path: str) -> List[BaseNode]:
+    """Split one document into nodes with deterministic ids, in this process."""
+    ids = NodeIds(path)
+    return [node for task in plan_parse_tasks(path) for node in ids.assign(parse_task(task))]
+
+
+# --- Sync ---
+
+def sync_index(index, docs_dir: str, persist_dir: str, cache: Optional[EmbeddingCache] = None,
+               workers: Optional[int] = None, stats: Optional["IngestStats"] = None) -> SyncReport:
+    """
+    Bring `index` in line with `docs_dir`, touching only what changed, then
+    persist the index and the manifest.
+
+    Changed files are parsed in a process pool (utils/ingestion.py) and their
+    chunks embedded and inserted INGEST_EMBED_BATCH at a time as the parts
+    arrive, so memory is bounded by the batch and the pool's in-flight window,
+    not by the size of the documents.
+    """
+    from utils.ingestion import IngestStats, parse_documents
+
+    start = time.perf_counter()
+    own_cache = cache is None
+    cache = cache or EmbeddingCache()
+    stats = stats or IngestStats()
+
+    manifest = load_manifest(persist_dir) or {"version": MANIFEST_VERSION, "files": {}}
+    entries = manifest["files"]
+    current = list_document_files(docs_dir)
+
+    # 1. Which files need parsing
+    added = changed = 0
+    to_parse = {}  # path -> (name, stat, sha256, previous manifest entry)
+    for name, file_stats in current.items():
+        entry = entries.get(name)
+        if entry and entry["mtime_ns"] == file_stats.st_mtime_ns and entry["size"] == file_stats.st_size:
+            continue
+
+        path = os.path.join(docs_dir, name)
+        digest = file_sha256(path)
+        if entry and entry["sha256"] == digest:
+            # Touched but not modified: just remember the new stat
+            entry.update(mtime_ns=file_stats.st_mtime_ns, size=file_stats.st_size)
+            continue
+        to_parse[path] = (name, file_stats, digest, entry)
+        if entry:
+            changed += 1
+        else:
+            added += 1
+
+    removed = [name for name in entries if name not in current]
+    to_delete: List[str] = []
+    for name in removed:
+        to_delete.extend(entries.pop(name)["nodes"])
+
+    # 2. Parse in the pool; embed and insert a batch at a time
+    embed_model = Settings.embed_model
+    if getattr(embed_model, "embed_batch_size", Config.EMBED_REQUEST_SIZE) < Config.EMBED_REQUEST_SIZE:
+        embed_model.embed_batch_size = Config.EMBED_REQUEST_SIZE  # fewer, larger embedding requests
+
+    tasks = [task for path in to_parse for task in plan_parse_tasks(path)]
+    last_part = {task.path: task.part for task in tasks}
+    if sum(item[1].st_size for item in to_parse.values()) < Config.INGEST_POOL_MIN_BYTES:
+        workers = 1  # starting worker processes costs more than parsing a few small files
+
+    inserted = cached = computed = 0
+    pending: List[BaseNode] = []
+
+    def flush(batch: List[BaseNode]):
+        nonlocal inserted, cached, computed
+        started = time.perf_counter()
+        batch_cached, batch_computed = embed_nodes(batch, cache)
+        stats.record("embed", 1, len(batch), time.perf_counter() - started)
+        cached, computed = cached + batch_cached, computed + batch_computed
+
+        started = time.perf_counter()
+        index.insert_nodes(batch)
+        stats.record("index", 1, len(batch), time.perf_counter() - started)
+        inserted += len(batch)
+        stats.progress("index", inserted, None)
+
+    try:
+        if to_delete:
+            index.delete_nodes(to_delete, delete_from_docstore=True)
+        ids = new_nodes = None
+        for task, nodes in parse_documents(tasks, workers, stats):
+            name, file_stats, digest, entry = to_parse[task.path]
+            if task.part == 0:
+                ids, new_nodes = NodeIds(task.path), {}
+            old_ids = entry["nodes"] if entry else {}
+            for node in ids.assign(nodes):
+                new_nodes[node.node_id] = chunk_hash(node)
+                if node.node_id not in old_ids:
+                    pending.append(node)
+            while len(pending) >= Config.INGEST_EMBED_BATCH:
+                flush(pending[:Config.INGEST_EMBED_BATCH])
+                del pending[:Config.INGEST_EMBED_BATCH]
+
+            if task.part == last_part[task.path]:
+                stale = [node_id for node_id in old_ids if node_id not in new_nodes]
+                if stale:
+                    index.delete_nodes(stale, delete_from_docstore=True)
+                    to_delete.extend(stale)
+                entries[name] = {
+                    "mtime_ns": file_stats.st_mtime_ns,
+                    "size": file_stats.st_size,
+                    "sha256": digest,
+                    "nodes": new_nodes,
+                }
+        if pending:
+            flush(pending)
+    finally:
+        if own_cache:
+            cache.close()
+
+    report = SyncReport(
+        files_added=added,
+        files_changed=changed,
+        files_removed=len(removed),
+        nodes_inserted=inserted,
+        nodes_deleted=len(to_delete),
+        embeddings_cached=cached,
+        embeddings_computed=computed,
+        seconds=0.0,
+        stages=stats,
+    )
+    if report.changed or not os.path.exists(os.path.join(persist_dir, "docstore.json")):
+        index.storage_context.persist(persist_dir=persist_dir)
+    save_manifest(persist_dir, manifest)
+    return report._replace(seconds=time.perf_counter() - start)
@@ -0,0 +1,212 @@
+# utils/llm_cache.py
+"""
+Disk-backed cache of chat-completion calls, shared by every framework.
+
+LangChain's ChatOpenAI, CrewAI (through litellm) and AutoGen all end up in the
+OpenAI SDK, which sends requests through an httpx client. CachingTransport
+sits under that client and stores each POST /chat/completions request body
+(model, messages, tools, temperature, ...) with its response in SQLite.
+
+Modes (Config.LLM_CACHE_MODE):
+- off:          no caching, clients are left untouched
+- record:       always call the API, store every response
+- replay:       serve only from the cache; a miss fails the call (no network)
+- read-through: serve deterministic (temperature 0) calls from the cache,
+                call and store on a miss; other calls pass straight through
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+import httpx
+
+from config.config import Config
+
+LLM_CACHE_MODES = ("off", "record", "replay", "read-through")
+
+# Only headers the SDKs need to parse a replayed body
+_KEPT_HEADERS = ("content-type",)
+
+# Replay misses are answered with this status: a 4xx, so the SDKs fail at once instead of retrying
+REPLAY_MISS_STATUS = 424
+
+
+def request_key(body: dict) -> str:
+    """Stable key over the whole request body (model, messages, tools, temperature, stream, ...)."""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(body: dict) -> bool:
+    # The API's default temperature is 1
+    return body.get("temperature", 1) == 0 and body.get("n", 1) == 1
+
+
+class LLMCallCache:
+    """SQLite store of request/response pairs."""
+
+    def __init__(self, path: Optional[str] = None):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or Config.LLM_CACHE_PATH, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_calls (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                temperature REAL,
+                request TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[int, dict, bytes]]:
+        with self._lock:
+            row = self._conn.execute("SELECT status, headers, body FROM llm_calls WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE llm_calls SET hits = hits + 1 WHERE key = ?", (key,))
+            self._conn.commit()
+        return row[0], json.loads(row[1]), row[2]
+
+    def put(self, key: str, body: dict, status: int, headers: dict, content: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_calls "
+                "(key, model, temperature, request, status, headers, body, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, body.get("model"), body.get("temperature"), json.dumps(body, sort_keys=True),
+                 status, json.dumps(headers), content, time.time()),
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """[(model, entries, hits)] per model."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT model, COUNT(*), SUM(hits) FROM llm_calls GROUP BY model ORDER BY model"
+            ).fetchall()
+
+    def close(self):
+        self._conn.close()
+
+
+class _CachePolicy:
+    """Mode logic shared by the sync and async transports."""
+
+    def __init__(self, cache: LLMCallCache, mode: str):
+        if mode not in LLM_CACHE_MODES:
+            raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {LLM_CACHE_MODES}")
+        self.cache = cache
+        self.mode = mode
+
+    def plan(self, request: httpx.Request):
+        """(key, body, cached response or None, whether to store the live response)."""
+        if self.mode == "off" or request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+            return None, None, None, False
+        body = json.loads(request.content or b"{}")
+        key = request_key(body)
+
+        if self.mode == "record":
+            return key, body, None, True
+        if self.mode == "read-through" and not is_deterministic(body):
+            return None, None, None, False
+
+        hit = self.cache.get(key)
+        if hit is not None:
+            status, headers, content = hit
+            return key, body, httpx.Response(status, headers=headers, content=content, request=request), False
+        if self.mode == "replay":
+            message = f"LLM cache miss in replay mode: no recorded response for {body.get('model')} request {key[:12]}"
+            print(f"   [LLM Cache] {message}")
+            miss = httpx.Response(REPLAY_MISS_STATUS, json={"error": {"message": message, "type": "llm_cache_miss"}},
+                                  request=request)
+            return key, body, miss, False
+        return key, body, None, True
+
+    def store(self, key: str, body: dict, response: httpx.Response):
+        if response.status_code == 200:
+            headers = {h: response.headers[h] for h in _KEPT_HEADERS if h in response.headers}
+            self.cache.put(key, body, response.status_code, headers, response.content)
+
+
+class CachingTransport(httpx.BaseTransport):
+    def __init__(self, cache: LLMCallCache, mode: str, inner: Optional[httpx.BaseTransport] = None):
+        self._policy = _CachePolicy(cache, mode)
+        self._inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key, body, cached, store = self._policy.plan(request)
+        if cached is not None:
+            return cached
+        response = self._inner.handle_request(request)
+        if store:
+            # Buffer the (possibly streamed) body so it can be stored
+            response.read()
+            self._policy.store(key, body, response)
+        return response
+
+    def close(self):
+        self._inner.close()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cache: LLMCallCache, mode: str, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self._policy = _CachePolicy(cache, mode)
+        self._inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        key, body, cached, store = self._policy.plan(request)
+        if cached is not None:
+            return cached
+        response = await self._inner.handle_async_request(request)
+        if store:
+            await response.aread()
+            self._policy.store(key, body, response)
+        return response
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class SharedClient(httpx.Client):
+    """httpx client that survives AutoGen's deepcopy of llm_config as the same shared instance."""
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def build_http_clients(mode: str, path: Optional[str] = None,
+                       trace: bool = False) -> Tuple[SharedClient, httpx.AsyncClient]:
+    """
+    Sync and async httpx clients that route chat completions through the cache
+    (and, with trace=True, time each call as a span; see utils/tracing.py),
+    also installed as litellm's sessions so CrewAI calls share the same layer.
+    """
+    transport, async_transport = httpx.HTTPTransport(), httpx.AsyncHTTPTransport()
+    if mode != "off":
+        cache = LLMCallCache(path)
+        transport, async_transport = CachingTransport(cache, mode, transport), AsyncCachingTransport(cache, mode, async_transport)
+    if trace:
+        from utils.tracing import AsyncTracingTransport, TracingTransport
+        transport, async_transport = TracingTransport(transport), AsyncTracingTransport(async_transport)
+
+    timeout = httpx.Timeout(600.0, connect=5.0)
+    client = SharedClient(transport=transport, timeout=timeout)
+    async_client = httpx.AsyncClient(transport=async_transport, timeout=timeout)
+
+    import litellm
+    litellm.client_session = client
+    litellm.aclient_session = async_client
+    return client, async_client
+
+
+if __name__ == "__main__":
+    # python -m utils.llm_cache  ->  what is recorded, per model
+    for model, entries, hits in LLMCallCache().stats():
+        print(f"{model}: {entries} recorded calls, {hits or 0} cache hits")
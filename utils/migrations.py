@@ -0,0 +1,190 @@
+# utils/migrations.py
+"""
+Versioned schema migrations for telecom.db.
+
+    python -m utils.migrations            # apply pending migrations
+    python -m utils.migrations --status   # show the current version
+
+The schema version lives in SQLite's own header (PRAGMA user_version). Each
+migration runs in a single BEGIN IMMEDIATE transaction together with its
+version bump, so a crash leaves the database at the previous version, and
+concurrent processes (Streamlit, API, triage) apply each migration once.
+Migrations are append-only: never edit one that has shipped, add a new one.
+"""
+import argparse
+import sqlite3
+from typing import Callable, List, NamedTuple
+
+from utils import customer_summary
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+def _run(*statements: str) -> Callable[[sqlite3.Connection], None]:
+    def apply(conn: sqlite3.Connection):
+        for statement in statements:
+            conn.execute(statement)
+    return apply
+
+
+# --- 1. Materialised customer summary (user-013) ---
+
+def _customer_summary(conn: sqlite3.Connection):
+    # Databases that created the table before migrations existed already have it;
+    # every statement is IF NOT EXISTS and the refresh rebuilds all rows
+    _run(customer_summary.SUMMARY_SCHEMA, *customer_summary.SUPPORT_INDEXES, *customer_summary.TRIGGERS)(conn)
+    customer_summary.refresh_customer_summary(conn)
+
+
+# --- 2. Secondary indexes and incident full-text search ---
+
+INCIDENT_FTS_TRIGGERS = (
+    # External-content FTS5: the index stores tokens only; rows live in network_incidents
+    """CREATE TRIGGER IF NOT EXISTS trg_incidents_fts_insert AFTER INSERT ON network_incidents BEGIN
+        INSERT INTO network_incidents_fts (rowid, location, description)
+        VALUES (NEW.rowid, NEW.location, NEW.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_incidents_fts_delete AFTER DELETE ON network_incidents BEGIN
+        INSERT INTO network_incidents_fts (network_incidents_fts, rowid, location, description)
+        VALUES ('delete', OLD.rowid, OLD.location, OLD.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS trg_incidents_fts_update AFTER UPDATE OF location, description ON network_incidents BEGIN
+        INSERT INTO network_incidents_fts (network_incidents_fts, rowid, location, description)
+        VALUES ('delete', OLD.rowid, OLD.location, OLD.description);
+        INSERT INTO network_incidents_fts (rowid, location, description)
+        VALUES (NEW.rowid, NEW.location, NEW.description);
+    END""",
+)
+
+SEARCH_INDEXES = _run(
+    # Active-incident lookups and the network dashboard (status = ?, newest first)
+    "CREATE INDEX IF NOT EXISTS idx_network_incidents_status_start ON network_incidents (status, start_time)",
+    # Admin ticket table: every not-closed ticket, newest first, straight off a partial index
+    "CREATE INDEX IF NOT EXISTS idx_support_tickets_unclosed_created "
+    "ON support_tickets (creation_time) WHERE status != 'Closed'",
+    """CREATE VIRTUAL TABLE IF NOT EXISTS network_incidents_fts USING fts5(
+        location, description, content='network_incidents', content_rowid='rowid'
+    )""",
+    *INCIDENT_FTS_TRIGGERS,
+    "INSERT INTO network_incidents_fts (network_incidents_fts) VALUES ('rebuild')",
+)
+
+
+# --- 3. Change log for the in-memory network geo index (utils/geo_index.py) ---
+
+# Table -> the key the geo index reloads when one of its rows changes
+GEO_TRACKED_KEYS = {
+    "cell_towers": "tower_id",
+    "tower_technologies": "tower_id",
+    "service_areas": "area_id",
+    "coverage_quality": "area_id",
+    "network_incidents": "incident_id",
+}
+
+
+def _geo_change_triggers(table: str, key: str):
+    log = f"INSERT INTO geo_changes (table_name, row_key) SELECT '{table}', "
+    return (
+        f"""CREATE TRIGGER IF NOT EXISTS trg_geo_{table}_insert AFTER INSERT ON {table} BEGIN
+            {log}NEW.{key};
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_geo_{table}_update AFTER UPDATE ON {table} BEGIN
+            {log}NEW.{key};
+            {log}OLD.{key} WHERE OLD.{key} IS NOT NEW.{key};
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS trg_geo_{table}_delete AFTER DELETE ON {table} BEGIN
+            {log}OLD.{key};
+        END""",
+    )
+
+
+GEO_CHANGE_LOG = _run(
+    # Readers remember the last seq they applied and reload only the rows changed since
+    """CREATE TABLE IF NOT EXISTS geo_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_key TEXT NOT NULL
+    )""",
+    *(trigger for table, key in GEO_TRACKED_KEYS.items() for trigger in _geo_change_triggers(table, key)),
+)
+
+
+# --- 4. Bulk triage results (orchestration/batch_triage.py) ---
+
+TICKET_TRIAGE = _run(
+    # Databases triaged before this migration already have the table
+    """CREATE TABLE IF NOT EXISTS ticket_triage (
+        ticket_id VARCHAR(50) PRIMARY KEY,
+        customer_id VARCHAR(50) NOT NULL,
+        classification VARCHAR(20),
+        draft_reply TEXT,
+        status VARCHAR(10) NOT NULL,      -- 'done' or 'error'
+        error TEXT,
+        latency_ms REAL NOT NULL,
+        started_at TIMESTAMP NOT NULL,
+        completed_at TIMESTAMP NOT NULL,
+        FOREIGN KEY (ticket_id) REFERENCES support_tickets(ticket_id)
+    )""",
+)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "customer_summary", _customer_summary),
+    Migration(2, "search_indexes", SEARCH_INDEXES),
+    Migration(3, "geo_change_log", GEO_CHANGE_LOG),
+    Migration(4, "ticket_triage", TICKET_TRIAGE),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, target: int = LATEST_VERSION) -> List[str]:
+    """Apply pending migrations up to `target`; returns the names applied (empty if up to date)."""
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version > target or migration.version <= schema_version(conn):
+            continue
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-check under the write lock: another process may have just applied it
+            if schema_version(conn) < migration.version:
+                migration.apply(conn)
+                conn.execute(f"PRAGMA user_version = {migration.version:d}")
+                applied.append(migration.name)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return applied
+
+
+def main():
+    from config.config import Config
+
+    parser = argparse.ArgumentParser(description="Apply telecom.db schema migrations")
+    parser.add_argument("--db", default=Config.DB_PATH, help="database file")
+    parser.add_argument("--status", action="store_true", help="only print the current version")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    try:
+        if not args.status:
+            for name in migrate(conn):
+                print(f"Applied migration: {name}")
+        print(f"Schema version {schema_version(conn)} (latest {LATEST_VERSION})")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# utils/registry.py
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from langchain_community.utilities import SQLDatabase
+from langchain_openai import ChatOpenAI
+from config.config import Config
+from utils.llm_cache import build_http_clients
+
+# Process-wide objects shared by every request, thread and Streamlit session
+_shared: Dict[Hashable, Any] = {}
+# Re-entrant: factories may themselves fetch shared clients (agent -> llm)
+_shared_lock = threading.RLock()
+
+# Stateful agents (CrewAI, AutoGen) keep conversation state on the instance, so
+# one instance serves one request at a time: it is checked out of a process-wide
+# free list and returned afterwards. Streamlit runs every rerun on a new thread,
+# so a per-thread cache would rebuild the team on every chat message.
+_pools: Dict[Hashable, List[Any]] = {}
+_pools_lock = threading.Lock()
+_generation = 0  # bumped by clear_registry, so teams checked out before it are dropped on return
+
+
+def get_shared(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """Return the process-wide instance for `key`, building it on first use."""
+    try:
+        return _shared[key]
+    except KeyError:
+        pass
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = factory()
+        return _shared[key]
+
+
+@contextmanager
+def checkout(key: Hashable, factory: Callable[[], Any]) -> Iterator[Any]:
+    """
+    Borrow an instance for `key` for one request: a free one if any, else a new
+    one from `factory`. It goes back to the free list when the block exits, so
+    concurrent requests each get their own and sequential ones share one.
+    """
+    with _pools_lock:
+        free = _pools.setdefault(key, [])
+        instance = free.pop() if free else None
+        generation = _generation
+    if instance is None:
+        instance = factory()
+    try:
+        yield instance
+    finally:
+        with _pools_lock:
+            if generation == _generation:
+                _pools.setdefault(key, []).append(instance)
+
+
+def clear_registry():
+    """Drop every cached instance (e.g. after a config change or in tests)."""
+    global _generation
+    with _shared_lock:
+        _shared.clear()
+    with _pools_lock:
+        _pools.clear()
+        _generation += 1
+
+
+# --- Shared clients ---
+
+def get_llm_http_clients() -> Tuple[Any, Any]:
+    """
+    (sync, async) httpx clients that send chat completions through the LLM call
+    cache and/or the tracing layer, or (None, None) when both are off.
+    """
+    mode, trace = Config.LLM_CACHE_MODE, Config.TRACING_ENABLED
+    if mode == "off" and not trace:
+        return None, None
+    return get_shared(("llm_http", mode, Config.LLM_CACHE_PATH, trace),
+                      lambda: build_http_clients(mode, Config.LLM_CACHE_PATH, trace))
+
+
+def get_llm(model: Optional[str] = None, temperature: float = 0) -> ChatOpenAI:
+    """Shared ChatOpenAI client; safe to use from many threads at once."""
+    model = model or Config.LLM_MODEL
+
+    def build():
+        http_client, http_async_client = get_llm_http_clients()
+        return ChatOpenAI(model=model, temperature=temperature,
+                          http_client=http_client, http_async_client=http_async_client)
+
+    return get_shared(("llm", model, temperature), build)
+
+
+def get_sql_database() -> SQLDatabase:
+    """Shared SQLDatabase handle, so the schema is reflected once per process."""
+    def build():
+        from utils.database import db_connection
+        from utils.schema_cards import user_tables
+
+        # Reflect after migrations (customer_summary etc.), so the SQL agents see the latest schema,
+        # minus the full-text index tables (no columns to sample; sql_db_schema fails on them)
+        with db_connection() as conn:
+            tables = user_tables(conn)
+        return SQLDatabase.from_uri(f"sqlite:///{Config.DB_PATH}", include_tables=tables)
+    return get_shared("sql_database", build)
@@ -0,0 +1,181 @@
+# utils/retrieval.py
+"""
+Lexical (BM25) and hybrid retrieval over the knowledge-base chunks.
+
+The BM25 index is an inverted index over the same nodes as the vector
+store, persisted next to it. "bm25" mode needs no embedding call at all;
+"hybrid" fuses BM25 and vector rankings by reciprocal rank.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from llama_index.core.retrievers import BaseRetriever, QueryFusionRetriever
+from llama_index.core.schema import MetadataMode, NodeWithScore, QueryBundle
+
+from utils import tracing
+
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid")
+BM25_INDEX_NAME = "bm25_index.json"
+BM25_FORMAT_VERSION = 1  # bump when tokenize() changes, so persisted indexes are rebuilt
+
+# Keeps tokens like "e-403", "5g", "wi-fi" and "v2.1" whole
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_.][a-z0-9]+)*")
+
+
+# Function words that would otherwise let long chunks win on "how do i ..."
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i if in is it its me my of on or our
+should so that the their there this to was we what when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def nodes_signature(node_ids: Iterable[str]) -> str:
+    """Identifies a set of nodes, so a persisted BM25 index can tell it is stale."""
+    return hashlib.sha1("\n".join(sorted(node_ids)).encode("utf-8")).hexdigest()
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index: term -> [(doc position, term frequency)]."""
+
+    def __init__(self, doc_ids: List[str], doc_lengths: List[int], postings: Dict[str, List[Tuple[int, int]]],
+                 signature: str = "", k1: float = 1.5, b: float = 0.75):
+        self.doc_ids = doc_ids
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+        self.signature = signature
+        self.k1 = k1
+        self.b = b
+        self.avg_length = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+        n = len(doc_ids)
+        self.idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in postings.items()}
+
+    @classmethod
+    def from_texts(cls, texts: Dict[str, str], **kwargs) -> "BM25Index":
+        doc_ids = list(texts)
+        doc_lengths = []
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for position, doc_id in enumerate(doc_ids):
+            counts = Counter(tokenize(texts[doc_id]))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((position, tf))
+        return cls(doc_ids, doc_lengths, postings, signature=nodes_signature(doc_ids), **kwargs)
+
+    @classmethod
+    def from_nodes(cls, nodes: Iterable, **kwargs) -> "BM25Index":
+        return cls.from_texts({n.node_id: n.get_content(metadata_mode=MetadataMode.NONE) for n in nodes}, **kwargs)
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        scores: Dict[int, float] = {}
+        k1, b, avg = self.k1, self.b, self.avg_length or 1.0
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for position, tf in postings:
+                norm = k1 * (1 - b + b * self.doc_lengths[position] / avg)
+                scores[position] = scores.get(position, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(self.doc_ids[position], score) for position, score in best]
+
+    # --- Persistence ---
+
+    def save(self, path: str):
+        data = {
+            "version": BM25_FORMAT_VERSION,
+            "signature": self.signature,
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "doc_lengths": self.doc_lengths,
+            "postings": self.postings,
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != BM25_FORMAT_VERSION:
+            return None
+        postings = {t: [tuple(p) for p in plist] for t, plist in data["postings"].items()}
+        return cls(data["doc_ids"], data["doc_lengths"], postings,
+                   signature=data["signature"], k1=data["k1"], b=data["b"])
+
+
+class BM25Retriever(BaseRetriever):
+    """LlamaIndex retriever over a BM25Index, returning nodes from the docstore."""
+
+    def __init__(self, bm25: BM25Index, docstore, similarity_top_k: int = 5):
+        super().__init__()
+        self._bm25 = bm25
+        self._docstore = docstore
+        self._top_k = similarity_top_k
+
+    def _retrieve(self, query_bundle: QueryBundle) -> List[NodeWithScore]:
+        results = []
+        for node_id, score in self._bm25.search(query_bundle.query_str, self._top_k):
+            node = self._docstore.get_node(node_id, raise_error=False)
+            if node is not None:
+                results.append(NodeWithScore(node=node, score=score))
+        return results
+
+
+def build_retriever(index, bm25: Optional[BM25Index], mode: str, similarity_top_k: int) -> BaseRetriever:
+    """Retriever for `mode`; hybrid fuses vector and BM25 by reciprocal rank."""
+    if mode not in RETRIEVAL_MODES:
+        raise ValueError(f"Unknown retrieval mode '{mode}', expected one of {RETRIEVAL_MODES}")
+    if mode == "vector" or bm25 is None:
+        return index.as_retriever(similarity_top_k=similarity_top_k)
+
+    lexical = BM25Retriever(bm25, index.docstore, similarity_top_k=similarity_top_k)
+    if mode == "bm25":
+        return lexical
+    return QueryFusionRetriever(
+        [index.as_retriever(similarity_top_k=similarity_top_k), lexical],
+        mode="reciprocal_rerank",
+        similarity_top_k=similarity_top_k,
+        num_queries=1,  # fuse the two rankings only; no LLM query rewriting
+        use_async=False,
+    )
+
+
+# --- Per-query reporting ---
+
+# Recent retrievals, newest last, for latency / hit-rate measurement
+RETRIEVAL_LOG = deque(maxlen=1000)
+_log_lock = threading.Lock()
+
+
+def record_retrieval(query: str, mode: str, nodes: List[NodeWithScore], started: float) -> dict:
+    """Log one retrieval (mode, latency, hits, source files) and return the record."""
+    report = {
+        "query": query,
+        "mode": mode,
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        "hits": len(nodes),
+        "sources": [n.node.metadata.get("file_name") for n in nodes],
+    }
+    with _log_lock:
+        RETRIEVAL_LOG.append(report)
+    tracing.record("retrieval", mode, report["latency_ms"], hits=report["hits"], sources=report["sources"])
+    print(f"   [Retrieval] mode={mode} hits={report['hits']} latency={report['latency_ms']}ms")
+    return report
@@ -0,0 +1,148 @@
+# utils/schema_cards.py
+"""
+Compact, intent-scoped schema context for the SQL agents.
+
+Left to itself the LangChain SQL agent spends its first turns listing the
+tables and fetching CREATE statements plus sample rows for several of them
+before it writes a query. Instead, a one-line card per table (columns, keys,
+foreign keys, typical category values) is built once from sqlite_master and
+only the cards relevant to the question are put in the prompt, so the agent
+can write its query on the first turn.
+
+Cards are cached per database file and rebuilt when PRAGMA schema_version
+changes (SQLite bumps it on every CREATE/ALTER/DROP, e.g. a new migration).
+
+    python -m utils.schema_cards "Which plan includes international roaming?"
+"""
+import re
+import sqlite3
+import sys
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from config.config import Config
+from utils.database import db_connection
+
+# --- 1. Scopes ---
+
+# Question keywords -> the tables that answer them (in the order they are shown)
+SCHEMA_SCOPES: Dict[str, Tuple[re.Pattern, Tuple[str, ...]]] = {
+    "plans": (re.compile(r"\b(plans?|upgrade|downgrade|roaming|prepaid|postpaid|contract|termination|"
+                         r"family|business|unlimited|cheaper|cost|price|new (connection|line)|add .* line)\b"),
+              ("service_plans", "customer_summary", "customers")),
+    "usage": (re.compile(r"\b(usage|used|use|left|remaining|data|minutes|sms|bill(ing)?|period)\b"),
+              ("customer_summary", "customer_usage", "service_plans")),
+    "devices": (re.compile(r"\b(phone|device|handset|iphone|samsung|pixel|oneplus|e-?sim|volte|5g|4g|os)\b"),
+                ("device_compatibility",)),
+    "coverage": (re.compile(r"\b(coverage|signal|area|city|district|tower|speed|latency|network)\b"),
+                 ("coverage_quality", "service_areas")),
+    "tickets": (re.compile(r"\b(tickets?|complaints?|support request|case)\b"),
+                ("support_tickets",)),
+}
+DEFAULT_TABLES = ("customer_summary", "service_plans")
+
+# What a column name alone does not say
+TABLE_NOTES = {
+    "customer_summary": "one row per customer, kept current by triggers: plan, limits, latest-period usage, open tickets",
+    "customer_usage": "one row per customer per billing period",
+    "service_plans": "the plan catalogue",
+}
+
+# Text columns with at most this many distinct, repeated values (in a sample) get them listed
+CATEGORY_MAX_VALUES = 6
+CATEGORY_SAMPLE_ROWS = 1000
+
+
+def tables_for(query: str) -> List[str]:
+    """Tables whose cards answer `query`: the union of every matching scope, else DEFAULT_TABLES."""
+    text = query.lower()
+    tables: List[str] = []
+    for pattern, scope in SCHEMA_SCOPES.values():
+        if pattern.search(text):
+            tables += [t for t in scope if t not in tables]
+    return tables or list(DEFAULT_TABLES)
+
+
+# --- 2. Cards ---
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _category_values(conn: sqlite3.Connection, table: str, column: str) -> List[str]:
+    """A column's values if it looks like a category: few distinct values, each repeated."""
+    sample = f"(SELECT {_quote(column)} AS v FROM {_quote(table)} LIMIT {CATEGORY_SAMPLE_ROWS})"
+    rows, distinct = conn.execute(f"SELECT COUNT(v), COUNT(DISTINCT v) FROM {sample}").fetchone()
+    if not distinct or distinct > CATEGORY_MAX_VALUES or distinct * 2 > rows:
+        return []
+    values = [str(r[0]) for r in conn.execute(f"SELECT DISTINCT v FROM {sample} WHERE v IS NOT NULL")]
+    return [] if any(len(v) > 24 for v in values) else sorted(values)
+
+
+def _card(conn: sqlite3.Connection, table: str) -> str:
+    foreign = {row[3]: f"{row[2]}.{row[4]}" for row in conn.execute(f"PRAGMA foreign_key_list({_quote(table)})")}
+    columns = []
+    for _cid, name, declared, notnull, _default, pk in conn.execute(f"PRAGMA table_info({_quote(table)})"):
+        column = f"{name} {declared or 'ANY'}"
+        if pk:
+            column += " PK"
+        elif name in foreign:
+            column += f" -> {foreign[name]}"
+        elif re.match(r"(VAR)?CHAR|TEXT", declared or "", re.I) and not name.endswith("_id"):
+            values = _category_values(conn, table, name)
+            if values:
+                column += " [" + ", ".join(values) + "]"
+        columns.append(column)
+    note = f" -- {TABLE_NOTES[table]}" if table in TABLE_NOTES else ""
+    return f"{table}({', '.join(columns)}){note}"
+
+
+# Bookkeeping tables (trigger change log, batch triage output), of no use to an agent
+INTERNAL_TABLES = {"geo_changes", "ticket_triage"}
+
+
+def user_tables(conn: sqlite3.Connection) -> List[str]:
+    """Tables an agent may query (full-text indexes, their shadow tables and bookkeeping left out)."""
+    rows = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+                        "ORDER BY name").fetchall()
+    virtual = [name for name, sql in rows if (sql or "").upper().startswith("CREATE VIRTUAL")]
+    return [name for name, _ in rows if name not in INTERNAL_TABLES
+            and not any(name == v or name.startswith(v + "_") for v in virtual)]
+
+
+def build_schema_cards(conn: sqlite3.Connection) -> Dict[str, str]:
+    """{table: card} for every user table in the database."""
+    return {table: _card(conn, table) for table in user_tables(conn)}
+
+
+# --- 3. Cache ---
+
+_lock = threading.Lock()
+_cache: Dict[str, Tuple[int, Dict[str, str]]] = {}  # db path -> (schema_version, cards)
+
+
+def get_schema_cards() -> Dict[str, str]:
+    """Cards for Config.DB_PATH, rebuilt only when its schema has changed."""
+    with db_connection() as conn:
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        cached = _cache.get(Config.DB_PATH)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with _lock:
+            cards = build_schema_cards(conn)
+            _cache[Config.DB_PATH] = (version, cards)
+    print(f"   [Schema] Built {len(cards)} schema cards (schema version {version})")
+    return cards
+
+
+def schema_context(query: str, tables: Iterable[str] = None) -> str:
+    """The prompt block for `query`: the cards of its scoped tables that exist in this database."""
+    cards = get_schema_cards()
+    chosen = [cards[t] for t in (tables or tables_for(query)) if t in cards]
+    return "Relevant tables (SQLite):\n" + "\n".join(f"- {card}" for card in chosen)
+
+
+if __name__ == "__main__":
+    question = " ".join(sys.argv[1:]) or "What is my current plan?"
+    print(f"Scope: {tables_for(question)}\n")
+    print(schema_context(question))
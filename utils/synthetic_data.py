@@ -0,0 +1,295 @@
+# utils/synthetic_data.py
+"""
+Seeded synthetic telecom.db generator for scale testing.
+
+    python -m utils.synthetic_data --customers 100000 --months 6 --out data/telecom_synthetic.db
+
+Builds a database with the same schema as data/telecom.db: the base tables are
+copied verbatim from it, then migrated to the latest version (indexes, FTS5,
+customer_summary). Reference tables (service_plans, building_types,
+common_network_issues, device_compatibility) are copied as-is; every other
+table is generated at a size derived from the customer count, with all
+foreign keys pointing at generated rows. The same seed always produces the
+same database.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, Iterator, List
+
+from config.config import Config
+from utils.migrations import migrate
+
+BASE_TABLES = (
+    "service_plans", "customers", "customer_usage", "support_tickets", "network_incidents",
+    "service_areas", "cell_towers", "tower_technologies", "coverage_quality",
+    "transportation_routes", "building_types", "common_network_issues", "device_compatibility",
+)
+REFERENCE_TABLES = ("service_plans", "building_types", "common_network_issues", "device_compatibility")
+
+CITIES = {
+    "Mumbai": ("Maharashtra", 19.0760, 72.8777), "Delhi": ("Delhi", 28.6139, 77.2090),
+    "Bangalore": ("Karnataka", 12.9716, 77.5946), "Chennai": ("Tamil Nadu", 13.0827, 80.2707),
+    "Hyderabad": ("Telangana", 17.3850, 78.4867), "Kolkata": ("West Bengal", 22.5726, 88.3639),
+    "Pune": ("Maharashtra", 18.5204, 73.8567), "Ahmedabad": ("Gujarat", 23.0225, 72.5714),
+    "Jaipur": ("Rajasthan", 26.9124, 75.7873), "Lucknow": ("Uttar Pradesh", 26.8467, 80.9462),
+    "Kochi": ("Kerala", 9.9312, 76.2673), "Bhopal": ("Madhya Pradesh", 23.2599, 77.4126),
+}
+DISTRICTS = ("Central", "North", "South", "East", "West")
+FIRST_NAMES = ("Aarav", "Vivaan", "Aditya", "Ananya", "Diya", "Ishaan", "Kavya", "Meera", "Rohan", "Saanvi",
+               "Arjun", "Priya", "Rahul", "Sneha", "Vikram", "Neha", "Karan", "Pooja", "Siddharth", "Riya")
+LAST_NAMES = ("Sharma", "Patel", "Reddy", "Singh", "Iyer", "Nair", "Gupta", "Mehta", "Rao", "Das",
+              "Kumar", "Joshi", "Chopra", "Menon", "Bose", "Verma", "Pillai", "Shah", "Kapoor", "Agarwal")
+TICKET_ISSUES = {
+    "Billing Inquiry": ("Charged for services not subscribed to", "Bill higher than usual this month",
+                        "Late fee applied despite timely payment"),
+    "Connectivity Issue": ("Unable to make calls in home area", "Mobile data very slow in the evening",
+                           "No signal inside office building"),
+    "Plan Change": ("Want to upgrade to a plan with more data", "Request to downgrade plan"),
+    "Account Management": ("Request to reactivate suspended account", "Update registered address"),
+    "Device Support": ("5G not showing on new phone", "VoLTE calls failing after software update"),
+}
+# (status, weight): most tickets are long closed, a few are still being worked
+TICKET_STATUSES = (("Closed", 70), ("Resolved", 15), ("In Progress", 5), ("Assigned", 5), ("Open", 5))
+INCIDENT_TYPES = {
+    "Service Outage": "Complete service outage due to fiber cut",
+    "Network Congestion": "Slow data speeds due to unexpected high traffic",
+    "Equipment Failure": "Service disruption due to tower equipment failure",
+    "Scheduled Maintenance": "Planned network upgrade",
+    "Power Outage": "Service disruption due to power grid failure",
+}
+TECHNOLOGIES = (("2G", "900MHz", 5, 1), ("3G", "2100MHz", 5, 21), ("4G", "1800MHz", 20, 150),
+                ("5G", "3500MHz", 100, 1000))
+SIGNAL_CATEGORIES = ("Excellent", "Good", "Fair", "Poor")
+PERIOD_END = date(2024, 6, 30)
+CHUNK_SIZE = 50_000
+
+
+def _weighted(rng: random.Random, choices) -> str:
+    return rng.choices([c for c, _ in choices], weights=[w for _, w in choices])[0]
+
+
+def _timestamp(rng: random.Random, start: datetime, days: int) -> datetime:
+    return start + timedelta(seconds=rng.randrange(days * 86400))
+
+
+def _insert(conn: sqlite3.Connection, table: str, rows: Iterable[tuple]) -> int:
+    """executemany in chunks, so memory stays flat at any scale."""
+    count = 0
+    batch: List[tuple] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= CHUNK_SIZE:
+            conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(row))})", batch)
+            count += len(batch)
+            batch.clear()
+    if batch:
+        conn.executemany(f"INSERT INTO {table} VALUES ({', '.join('?' * len(batch[0]))})", batch)
+        count += len(batch)
+    return count
+
+
+# --- 1. Geography and network ---
+
+def _areas(rng: random.Random, n_areas: int) -> Iterator[tuple]:
+    cities = list(CITIES)
+    for i in range(n_areas):
+        city = cities[i % len(cities)]
+        sector = i // (len(cities) * len(DISTRICTS))
+        district = DISTRICTS[(i // len(cities)) % len(DISTRICTS)] + (f" {sector + 1}" if sector else "")
+        yield (f"AREA{i + 1:06d}", city, district, f"{rng.randrange(110000, 860000)}", CITIES[city][0],
+               rng.choice(("High", "Medium", "Low")), rng.choice(("Urban", "Suburban", "Rural")))
+
+
+def _towers(rng: random.Random, areas: List[tuple], per_area: int) -> Iterator[tuple]:
+    n = 0
+    for area_id, city, *_ in areas:
+        _, lat, lon = CITIES[city]
+        for _ in range(per_area):
+            n += 1
+            installed = date(2015, 1, 1) + timedelta(days=rng.randrange(3000))
+            yield (f"TWR{n:07d}", area_id, round(lat + rng.uniform(-0.25, 0.25), 6),
+                   round(lon + rng.uniform(-0.25, 0.25), 6), rng.choice(("Macro", "Micro", "Small Cell")),
+                   rng.randrange(10, 60), installed.isoformat(),
+                   (installed + timedelta(days=rng.randrange(30, 1500))).isoformat(),
+                   _weighted(rng, (("Active", 92), ("Maintenance", 5), ("Offline", 3))))
+
+
+def _tower_technologies(rng: random.Random, n_towers: int) -> Iterator[tuple]:
+    n = 0
+    for t in range(1, n_towers + 1):
+        for tech, band, bandwidth, capacity in rng.sample(TECHNOLOGIES, rng.randint(1, 3)):
+            n += 1
+            yield (f"TECH{n:08d}", f"TWR{t:07d}", tech, band, bandwidth, capacity, int(rng.random() < 0.95))
+
+
+def _coverage(rng: random.Random, areas: List[tuple]) -> Iterator[tuple]:
+    n = 0
+    for area_id, *_ in areas:
+        for tech, download in (("4G", 30), ("5G", 250)):
+            n += 1
+            yield (f"COV{n:07d}", area_id, tech, rng.choice(SIGNAL_CATEGORIES),
+                   round(download * rng.uniform(0.2, 1.5), 2), round(download * rng.uniform(0.05, 0.4), 2),
+                   rng.randrange(10, 120), _timestamp(rng, datetime(2024, 1, 1), 180).isoformat(" "))
+
+
+def _incidents(rng: random.Random, areas: List[tuple], n_incidents: int) -> Iterator[tuple]:
+    for i in range(n_incidents):
+        _, city, district, *_ = rng.choice(areas)
+        incident_type = rng.choice(list(INCIDENT_TYPES))
+        status = _weighted(rng, (("Resolved", 90), ("In Progress", 5), ("Active", 5)))
+        start = _timestamp(rng, datetime(2023, 1, 1), 540)
+        resolved = start + timedelta(minutes=rng.randrange(30, 1440)) if status == "Resolved" else None
+        yield (f"INC{i + 1:07d}", incident_type, f"{city} {district}", rng.choice(("Voice, Data", "Data", "Voice, Data, SMS")),
+               start.isoformat(" "), resolved and resolved.isoformat(" "), status,
+               rng.choice(("Low", "Medium", "High", "Critical")), INCIDENT_TYPES[incident_type],
+               "Service restored" if resolved else None)
+
+
+def _routes(rng: random.Random, n_routes: int) -> Iterator[tuple]:
+    cities = list(CITIES)
+    for i in range(n_routes):
+        city = cities[i % len(cities)]
+        route_type = rng.choice(("Train", "Metro", "Highway"))
+        yield (f"ROUTE{i + 1:05d}", f"{city} {route_type} Line {i // len(cities) + 1}", route_type,
+               f"{city} {rng.choice(DISTRICTS)}", f"{city} {rng.choice(DISTRICTS)}",
+               rng.choice(("Good", "Variable", "Poor")), rng.choice((None, "Signal drops in tunnels",
+                                                                     "Congestion during peak hours")))
+
+
+# --- 2. Customers and their activity ---
+
+def _customers(rng: random.Random, n_customers: int, plan_ids: List[str], areas: List[tuple]) -> Iterator[tuple]:
+    for i in range(1, n_customers + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        _, city, district, *_ = rng.choice(areas)
+        registered = date(2018, 1, 1) + timedelta(days=rng.randrange(2000))
+        yield (f"CUST{i:07d}", f"{first} {last}", f"{first.lower()}.{last.lower()}.{i}@example.com",
+               f"9{rng.randrange(10**9):09d}", f"{rng.randrange(1, 500)} {district} Road, {city}",
+               rng.choice(plan_ids), _weighted(rng, (("Active", 90), ("Suspended", 5), ("Inactive", 5))),
+               registered.isoformat(), PERIOD_END.isoformat())
+
+
+def _usage(rng: random.Random, n_customers: int, months: int, customer_plans: List[str],
+           plans: Dict[str, tuple]) -> Iterator[tuple]:
+    periods = []
+    end = PERIOD_END
+    for _ in range(months):
+        start = end.replace(day=1)
+        periods.append((start.isoformat(), end.isoformat()))
+        end = start - timedelta(days=1)
+    periods.reverse()
+
+    n = 0
+    for c in range(n_customers):
+        cost, data_limit, unlimited_data = plans[customer_plans[c]]
+        for start, end in periods:
+            n += 1
+            data_used = round(rng.uniform(0.1, 1.3) * (data_limit or 50), 2)
+            over = 0 if unlimited_data or not data_limit else max(data_used - data_limit, 0)
+            additional = round(over * 100, 2)
+            yield (f"USG{n:09d}", f"CUST{c + 1:07d}", start, end, data_used, rng.randrange(20, 2000),
+                   rng.randrange(0, 900), additional, cost + additional)
+
+
+def _tickets(rng: random.Random, n_tickets: int, n_customers: int) -> Iterator[tuple]:
+    for i in range(1, n_tickets + 1):
+        category = rng.choice(list(TICKET_ISSUES))
+        status = _weighted(rng, TICKET_STATUSES)
+        created = _timestamp(rng, datetime(2023, 1, 1), 540)
+        resolved = created + timedelta(hours=rng.randrange(1, 96)) if status in ("Closed", "Resolved") else None
+        yield (f"TKT{i:08d}", f"CUST{rng.randrange(1, n_customers + 1):07d}", category,
+               rng.choice(TICKET_ISSUES[category]), created.isoformat(" "), resolved and resolved.isoformat(" "),
+               status, rng.choice(("Low", "Medium", "High")), "Resolved by support" if resolved else None)
+
+
+def generate_database(path: str, customers: int = 10_000, months: int = 6, seed: int = 42,
+                      template: str = None) -> Dict[str, int]:
+    """
+    Write a fresh synthetic database to `path` and return row counts per table.
+    Sizes: one usage row per customer per month, ~0.5 tickets per customer,
+    one service area per 500 customers (min 60), 8 towers per area.
+    """
+    template = template or Config.DB_PATH
+    if os.path.exists(path) and os.path.samefile(path, template):
+        raise ValueError("Refusing to overwrite the template database")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    # Bulk load: no journal, no fsync; migrations build indexes afterwards in one pass
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA cache_size=-200000")
+    conn.execute("ATTACH DATABASE ? AS template", (template,))
+    counts: Dict[str, int] = {}
+    try:
+        # 1. Schema and reference data straight from the template
+        for (sql,) in conn.execute(
+            f"SELECT sql FROM template.sqlite_master WHERE type = 'table' AND name IN ({', '.join('?' * len(BASE_TABLES))})",
+            BASE_TABLES,
+        ).fetchall():
+            conn.execute(sql)
+        for table in REFERENCE_TABLES:
+            conn.execute(f"INSERT INTO main.{table} SELECT * FROM template.{table}")
+            counts[table] = conn.execute(f"SELECT COUNT(*) FROM main.{table}").fetchone()[0]
+        conn.commit()
+        conn.execute("DETACH DATABASE template")
+
+        plans = {plan_id: (cost, limit, unlimited) for plan_id, cost, limit, unlimited in
+                 conn.execute("SELECT plan_id, monthly_cost, data_limit_gb, unlimited_data FROM service_plans")}
+        plan_ids = sorted(plans)
+
+        # 2. Geography and network
+        n_areas = max(60, customers // 500)
+        areas = list(_areas(rng, n_areas))
+        counts["service_areas"] = _insert(conn, "service_areas", areas)
+        counts["cell_towers"] = _insert(conn, "cell_towers", _towers(rng, areas, per_area=8))
+        counts["tower_technologies"] = _insert(conn, "tower_technologies", _tower_technologies(rng, counts["cell_towers"]))
+        counts["coverage_quality"] = _insert(conn, "coverage_quality", _coverage(rng, areas))
+        counts["network_incidents"] = _insert(conn, "network_incidents", _incidents(rng, areas, n_areas * 2))
+        counts["transportation_routes"] = _insert(conn, "transportation_routes", _routes(rng, max(12, n_areas // 10)))
+
+        # 3. Customers and their activity (usage reuses each customer's plan)
+        customer_plans: List[str] = []
+
+        def customer_rows():
+            for row in _customers(rng, customers, plan_ids, areas):
+                customer_plans.append(row[5])
+                yield row
+        counts["customers"] = _insert(conn, "customers", customer_rows())
+        counts["customer_usage"] = _insert(conn, "customer_usage", _usage(rng, customers, months, customer_plans, plans))
+        counts["support_tickets"] = _insert(conn, "support_tickets", _tickets(rng, customers // 2, customers))
+        conn.commit()
+
+        # 4. Indexes, FTS5 and customer_summary, then planner statistics
+        migrate(conn)
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic telecom database")
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--months", type=int, default=6, help="usage rows per customer")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=os.path.join(Config.DATA_DIR, "telecom_synthetic.db"))
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate_database(args.out, args.customers, args.months, args.seed)
+    for table, count in sorted(counts.items()):
+        print(f"{table:<24}{count:>12,}")
+    print(f"\nWrote {args.out} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
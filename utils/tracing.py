@@ -0,0 +1,461 @@
+# utils/tracing.py
+"""
+Structured latency spans for every request, written to a rotating JSONL file.
+
+    python -m utils.tracing            # p50/p95 per span and the slowest recent requests
+
+One JSON object per line:
+
+    {"ts": 1718000000.123, "request_id": "...", "span_id": "...", "parent_id": "...",
+     "kind": "node" | "llm" | "tool" | "sql" | "retrieval", "name": "billing",
+     "duration_ms": 812.4, "status": "ok" | "error", "error": null, "attrs": {...}}
+
+Spans are tied together by a request id that travels in the graph state
+(TelecomAssistantState.request_id) and, within a node, in a context variable,
+so LLM calls, tool calls, SQL and retrievals made anywhere below a node,
+including worker threads started with asyncio.to_thread, land under it.
+LLM calls are traced at the HTTP layer (TracingTransport), so LangChain,
+CrewAI (litellm), AutoGen and LlamaIndex calls are all seen, with token counts.
+"""
+import contextvars
+import functools
+import json
+import logging
+import os
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+from config.config import Config
+
+SPAN_KINDS = ("node", "llm", "tool", "sql", "retrieval")
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_request_id", default=None)
+_parent_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_parent_id", default=None)
+
+_logger: Optional[logging.Logger] = None
+_logger_lock = threading.Lock()
+
+
+def _span_logger() -> logging.Logger:
+    """The rotating JSONL writer, created on the first span (RotatingFileHandler is thread-safe)."""
+    global _logger
+    if _logger is None:
+        with _logger_lock:
+            if _logger is None:
+                os.makedirs(os.path.dirname(Config.TRACE_PATH), exist_ok=True)
+                handler = RotatingFileHandler(Config.TRACE_PATH, maxBytes=Config.TRACE_MAX_BYTES,
+                                              backupCount=Config.TRACE_BACKUP_COUNT, encoding="utf-8")
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                logger = logging.getLogger("telecom.tracing")
+                logger.handlers = [handler]
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                _logger = logger
+    return _logger
+
+
+def reset_tracing():
+    """Close the span file (e.g. after changing Config.TRACE_PATH in tests)."""
+    global _logger
+    with _logger_lock:
+        if _logger is not None:
+            for handler in _logger.handlers:
+                handler.close()
+            _logger.handlers = []
+        _logger = None
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def _write(record: dict):
+    if Config.TRACING_ENABLED:
+        _span_logger().info(json.dumps(record, default=str, separators=(",", ":")))
+
+
+class OpenSpan:
+    """A started span; end() writes it. Usable across threads (e.g. when a stream closes)."""
+
+    __slots__ = ("kind", "name", "attrs", "span_id", "parent_id", "request_id", "ts", "_started", "_ended")
+
+    def __init__(self, kind: str, name: str, attrs: Dict[str, Any]):
+        self.kind = kind
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = _parent_id.get()
+        self.request_id = _request_id.get()
+        self.ts = time.time()
+        self._started = time.perf_counter()
+        self._ended = False
+
+    def end(self, error: Optional[BaseException] = None):
+        if self._ended:
+            return
+        self._ended = True
+        _write({
+            "ts": round(self.ts, 6),
+            "request_id": self.request_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "name": self.name,
+            "duration_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "status": "error" if error else "ok",
+            "error": f"{type(error).__name__}: {error}" if error else None,
+            "attrs": self.attrs,
+        })
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs) -> Iterator[Dict[str, Any]]:
+    """
+    Time the block as one span; yields its attrs dict so the block can add
+    results (row counts, tokens). Nested spans and LLM calls become children.
+    """
+    if not Config.TRACING_ENABLED:
+        yield attrs
+        return
+    opened = OpenSpan(kind, name, attrs)
+    token = _parent_id.set(opened.span_id)
+    try:
+        yield attrs
+    except BaseException as e:
+        opened.end(e)
+        raise
+    finally:
+        _parent_id.reset(token)
+    opened.end()
+
+
+def record(kind: str, name: str, duration_ms: float, **attrs):
+    """Write a span that already finished (e.g. timed by the caller)."""
+    if not Config.TRACING_ENABLED:
+        return
+    _write({
+        "ts": round(time.time() - duration_ms / 1000, 6),
+        "request_id": _request_id.get(),
+        "span_id": uuid.uuid4().hex[:16],
+        "parent_id": _parent_id.get(),
+        "kind": kind,
+        "name": name,
+        "duration_ms": round(duration_ms, 3),
+        "status": "ok",
+        "error": None,
+        "attrs": attrs,
+    })
+
+
+@contextmanager
+def request_scope(request_id: Optional[str]):
+    token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(token)
+
+
+# --- 1. Graph nodes ---
+
+def _node_attrs(name: str, state: dict) -> dict:
+    attrs = {}
+    if name == "classify_query":
+        attrs["query"] = state.get("query", "")[:200]
+        attrs["customer_id"] = state.get("customer_info", {}).get("id")
+    return attrs
+
+
+def _finish_node(name: str, attrs: dict, request_id: Optional[str], result):
+    if isinstance(result, dict):
+        if name == "classify_query":
+            attrs["classification"] = result.get("classification")
+        elif name == "check_answer_cache":
+            attrs["cache_hit"] = bool(result.get("cache_hit"))
+        # Later nodes pick the id up from the state (parallel branches, which return
+        # partial updates for a state that has it already, must not write it again)
+        if request_id is not None:
+            result.setdefault("request_id", request_id)
+    return result
+
+
+def traced_node(name: str, func):
+    """Wrap a sync graph node: one 'node' span, with the request id set for everything below it."""
+    @functools.wraps(func)
+    def wrapper(state):
+        request_id = state.get("request_id") or new_request_id()
+        new_id = None if state.get("request_id") else request_id
+        with request_scope(request_id), span("node", name, **_node_attrs(name, state)) as attrs:
+            return _finish_node(name, attrs, new_id, func(state))
+    return wrapper
+
+
+def atraced_node(name: str, afunc):
+    """Async twin of traced_node."""
+    @functools.wraps(afunc)
+    async def wrapper(state):
+        request_id = state.get("request_id") or new_request_id()
+        new_id = None if state.get("request_id") else request_id
+        with request_scope(request_id), span("node", name, **_node_attrs(name, state)) as attrs:
+            return _finish_node(name, attrs, new_id, await afunc(state))
+    return wrapper
+
+
+# --- 2. Tools (LangChain callbacks; CrewAI and AutoGen tools use span() directly) ---
+
+def tracing_callbacks() -> list:
+    """LangChain callbacks that turn each tool run (e.g. sql_db_query) into a 'tool' span."""
+    if not Config.TRACING_ENABLED:
+        return []
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class ToolSpanHandler(BaseCallbackHandler):
+        def __init__(self):
+            self._open: Dict[Any, OpenSpan] = {}
+
+        def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+            name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+            self._open[run_id] = OpenSpan("tool", name, {"input": str(input_str)[:500]})
+
+        def on_tool_end(self, output, *, run_id, **kwargs):
+            opened = self._open.pop(run_id, None)
+            if opened:
+                opened.attrs["output_chars"] = len(str(output))
+                opened.end()
+
+        def on_tool_error(self, error, *, run_id, **kwargs):
+            opened = self._open.pop(run_id, None)
+            if opened:
+                opened.end(error)
+
+    return [ToolSpanHandler()]
+
+
+# --- 3. LLM calls (HTTP layer) ---
+
+_USAGE_RE = re.compile(rb'"usage":\s*(\{[^{}]*\})')
+
+
+def _llm_span(request: httpx.Request) -> Optional[OpenSpan]:
+    path = request.url.path
+    if request.method != "POST" or not path.endswith(("/chat/completions", "/embeddings")):
+        return None
+    try:
+        body = json.loads(request.content or b"{}")
+    except ValueError:
+        body = {}
+    if path.endswith("/embeddings"):
+        inputs = body.get("input")
+        return OpenSpan("llm", "embeddings", {"model": body.get("model"),
+                                              "inputs": len(inputs) if isinstance(inputs, list) else 1})
+    last = body.get("messages", [{}])[-1].get("content") or ""
+    # AutoGen's group chat asks the model who speaks next; worth telling apart from real turns
+    name = "speaker_selection" if "select the next role" in str(last) else "chat.completions"
+    return OpenSpan("llm", name, {"model": body.get("model"), "stream": bool(body.get("stream")),
+                                  "messages": len(body.get("messages", [])), "tools": len(body.get("tools") or [])})
+
+
+def _add_usage(opened: OpenSpan, content: bytes):
+    matches = _USAGE_RE.findall(content)
+    if not matches:
+        return
+    try:
+        usage = json.loads(matches[-1])
+    except ValueError:
+        return
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        if key in usage:
+            opened.attrs[key] = usage[key]
+
+
+def _first_chunk(opened: OpenSpan):
+    if "ttfb_ms" not in opened.attrs:
+        opened.attrs["ttfb_ms"] = round((time.perf_counter() - opened._started) * 1000, 3)
+
+
+class _TracedStream(httpx.SyncByteStream):
+    """Pass a streamed body through, noting first-chunk time and the final usage chunk."""
+
+    def __init__(self, inner, opened: OpenSpan):
+        self._inner = inner
+        self._opened = opened
+        self._tail = b""
+
+    def __iter__(self):
+        for chunk in self._inner:
+            _first_chunk(self._opened)
+            self._tail = (self._tail + chunk)[-4096:]
+            yield chunk
+
+    def close(self):
+        _add_usage(self._opened, self._tail)
+        self._opened.end()
+        self._inner.close()
+
+
+class _AsyncTracedStream(httpx.AsyncByteStream):
+    def __init__(self, inner, opened: OpenSpan):
+        self._inner = inner
+        self._opened = opened
+        self._tail = b""
+
+    async def __aiter__(self):
+        async for chunk in self._inner:
+            _first_chunk(self._opened)
+            self._tail = (self._tail + chunk)[-4096:]
+            yield chunk
+
+    async def aclose(self):
+        _add_usage(self._opened, self._tail)
+        self._opened.end()
+        await self._inner.aclose()
+
+
+def _traced_response(request: httpx.Request, response: httpx.Response, opened: OpenSpan, stream_type) -> httpx.Response:
+    opened.attrs["status_code"] = response.status_code
+    if getattr(response, "_content", None) is not None:
+        # Already buffered (an LLM cache hit or a recorded call): the span ends now
+        _add_usage(opened, response.content)
+        opened.end()
+        return response
+    # The span ends when the caller finishes reading the body, so streamed answers are timed in full
+    return httpx.Response(response.status_code, headers=response.headers,
+                          stream=stream_type(response.stream, opened),
+                          extensions=response.extensions, request=request)
+
+
+class TracingTransport(httpx.BaseTransport):
+    """Times each chat completion / embedding request made through the wrapped transport."""
+
+    def __init__(self, inner: Optional[httpx.BaseTransport] = None):
+        self._inner = inner or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        opened = _llm_span(request) if Config.TRACING_ENABLED else None
+        if opened is None:
+            return self._inner.handle_request(request)
+        try:
+            response = self._inner.handle_request(request)
+        except Exception as e:
+            opened.end(e)
+            raise
+        return _traced_response(request, response, opened, _TracedStream)
+
+    def close(self):
+        self._inner.close()
+
+
+class AsyncTracingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, inner: Optional[httpx.AsyncBaseTransport] = None):
+        self._inner = inner or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        opened = _llm_span(request) if Config.TRACING_ENABLED else None
+        if opened is None:
+            return await self._inner.handle_async_request(request)
+        try:
+            response = await self._inner.handle_async_request(request)
+        except Exception as e:
+            opened.end(e)
+            raise
+        return _traced_response(request, response, opened, _AsyncTracedStream)
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+# --- 4. Reading spans back ---
+
+def read_spans(path: Optional[str] = None, limit: int = 50_000) -> List[dict]:
+    """The newest `limit` spans across the current file and its rotated backups, oldest first."""
+    path = path or Config.TRACE_PATH
+    files = [f"{path}.{i}" for i in range(Config.TRACE_BACKUP_COUNT, 0, -1)] + [path]
+    spans: List[dict] = []
+    for name in files:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue  # a line cut short by a crash or rotation
+    return spans[-limit:]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q * 100) - 1]
+
+
+def latency_summary(spans: List[dict], kinds=SPAN_KINDS) -> List[dict]:
+    """count/p50/p95/max per (kind, name), slowest p95 first."""
+    groups: Dict[tuple, List[float]] = defaultdict(list)
+    errors: Dict[tuple, int] = defaultdict(int)
+    for s in spans:
+        if s["kind"] in kinds:
+            groups[(s["kind"], s["name"])].append(s["duration_ms"])
+            errors[(s["kind"], s["name"])] += s["status"] == "error"
+    rows = [{
+        "kind": kind, "name": name, "count": len(values),
+        "p50_ms": round(_percentile(values, 0.50), 1), "p95_ms": round(_percentile(values, 0.95), 1),
+        "max_ms": round(max(values), 1), "errors": errors[(kind, name)],
+    } for (kind, name), values in groups.items()]
+    return sorted(rows, key=lambda r: r["p95_ms"], reverse=True)
+
+
+def slowest_requests(spans: List[dict], n: int = 20) -> List[dict]:
+    """Requests by wall time (first span start to last span end), with where the time went."""
+    by_request: Dict[str, List[dict]] = defaultdict(list)
+    for s in spans:
+        if s.get("request_id"):
+            by_request[s["request_id"]].append(s)
+
+    rows = []
+    for request_id, group in by_request.items():
+        nodes = [s for s in group if s["kind"] == "node"]
+        if not nodes:
+            continue
+        start = min(s["ts"] for s in nodes)
+        end = max(s["ts"] + s["duration_ms"] / 1000 for s in nodes)
+        classify = next((s for s in nodes if s["name"] == "classify_query"), {"attrs": {}})
+        slowest_node = max(nodes, key=lambda s: s["duration_ms"])
+        llm = [s for s in group if s["kind"] == "llm"]
+        rows.append({
+            "request_id": request_id,
+            "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start)),
+            "total_ms": round((end - start) * 1000, 1),
+            "route": classify["attrs"].get("classification"),
+            "query": classify["attrs"].get("query"),
+            "slowest_node": f"{slowest_node['name']} ({slowest_node['duration_ms']:.0f} ms)",
+            "llm_calls": len(llm),
+            "llm_ms": round(sum(s["duration_ms"] for s in llm), 1),
+            "tokens": sum(s["attrs"].get("total_tokens") or 0 for s in llm),
+            "errors": sum(s["status"] == "error" for s in group),
+        })
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)[:n]
+
+
+if __name__ == "__main__":
+    spans = read_spans()
+    print(f"=== SPANS ({len(spans)} from {Config.TRACE_PATH}) ===\n")
+    print(f"{'kind':<10}{'name':<28}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}")
+    for row in latency_summary(spans):
+        print(f"{row['kind']:<10}{row['name'][:27]:<28}{row['count']:>7}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}")
+    print("\n=== SLOWEST REQUESTS ===\n")
+    for row in slowest_requests(spans, 10):
+        print(f"{row['total_ms']:>9.1f} ms  {row['route'] or '?':<10} {row['slowest_node']:<28} {row['query']}")
@@ -0,0 +1,501 @@
+# utils/vector_store.py
+"""
+Memory-mapped NumPy vector store, in place of LlamaIndex's JSON SimpleVectorStore.
+
+On disk, next to the docstore:
+
+    vectors-<generation>.npy  every embedding, L2-normalised float32 rows,
+                              opened with np.load(mmap_mode="r"): loading reads
+                              the header, the OS pages rows in on first query
+    vector_nodes.db           SQLite side table: row -> node id, ref doc id and
+                              metadata (JSON), plus which .npy generation is current
+
+Loading is two file opens whatever the number of chunks; node ids are read
+only for the top-k rows until something needs all of them (an insert, a
+delete, a metadata filter). Top-k is one matrix-vector product over the
+mapped rows and an argpartition: cosine similarity, as SimpleVectorStore.
+
+Inserts copy the mapped rows into a growable in-memory buffer; deletes only
+mark rows dead. persist() writes the live rows to a new generation, switches
+the side table to it and maps the new file, so a reader never sees a
+half-written pair.
+
+With ANN_INDEX=ivf and at least ANN_MIN_VECTORS rows, persist() also lays
+the rows out by IVF cell and queries probe IVF_NPROBE cells instead of
+scoring every row (utils/ann_index.py); node-id or metadata-filtered queries
+stay exact.
+
+    python -m utils.vector_store   ->  convert data/vector_store to this format (and build the IVF index)
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from llama_index.core.bridge.pydantic import Field, PrivateAttr
+from llama_index.core.schema import BaseNode, NodeRelationship, RelatedNodeInfo, TextNode
+from llama_index.core.vector_stores.simple import SimpleVectorStore
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryMode,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import build_metadata_filter_fn, node_to_metadata_dict
+
+from config.config import Config
+from utils.ann_index import IVFIndex
+
+VECTOR_STORE_BACKENDS = ("numpy", "simple")
+ANN_INDEXES = ("off", "ivf")
+TABLE_NAME = "vector_nodes.db"
+SIMPLE_STORE_NAME = "default__vector_store.json"
+# Rows copied per step when writing a generation, so persisting never holds a second full matrix
+WRITE_BLOCK_ROWS = 8192
+# Keys node_to_metadata_dict adds next to the node's own metadata (dropped again by get_nodes)
+NODE_INFO_KEYS = ("_node_type", "document_id", "doc_id", "ref_doc_id")
+
+
+class _RowView:
+    """vectors[rows] for block-wise readers (IVFIndex.assign) without copying every row at once."""
+
+    def __init__(self, vectors: np.ndarray, rows: np.ndarray):
+        self.vectors, self.rows = vectors, rows
+        self.shape = (len(rows), vectors.shape[1])
+
+    def __getitem__(self, block: slice) -> np.ndarray:
+        return self.vectors[self.rows[block]]
+
+
+def _unit_rows(vectors) -> np.ndarray:
+    """float32 copy with every non-zero row scaled to length 1."""
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _vectors_name(generation: str) -> str:
+    return f"vectors-{generation}.npy"
+
+
+def _ivf_name(generation: str) -> str:
+    return f"ivf-{generation}.npz"
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    """Embeddings in one float32 matrix (memory-mapped once persisted); ids and metadata in SQLite."""
+
+    stores_text: bool = False
+    flat_metadata: bool = False
+    # Approximate search (utils/ann_index.py), built on persist once there are ann_min_vectors rows
+    ann_index: str = Field(default_factory=lambda: Config.ANN_INDEX)
+    ann_min_vectors: int = Field(default_factory=lambda: Config.ANN_MIN_VECTORS)
+    ivf_nlist: int = Field(default_factory=lambda: Config.IVF_NLIST)  # 0: about sqrt(rows)
+    ivf_nprobe: int = Field(default_factory=lambda: Config.IVF_NPROBE)
+
+    _lock: Any = PrivateAttr()
+    _vectors: Optional[np.ndarray] = PrivateAttr(default=None)  # (capacity, dim); np.memmap when clean
+    _size: int = PrivateAttr(default=0)            # rows in use, live or dead
+    _alive: Optional[np.ndarray] = PrivateAttr(default=None)
+    _dead: int = PrivateAttr(default=0)
+    # Side-table columns, per row; None until first needed (see _columns)
+    _ids: Optional[List[str]] = PrivateAttr(default=None)
+    _ref_doc_ids: Optional[List[str]] = PrivateAttr(default=None)
+    _metadata: Optional[List[str]] = PrivateAttr(default=None)
+    _row_of: Optional[Dict[str, int]] = PrivateAttr(default=None)
+    _conn: Optional[sqlite3.Connection] = PrivateAttr(default=None)
+    _persist_dir: Optional[str] = PrivateAttr(default=None)
+    _dirty: bool = PrivateAttr(default=False)
+    _ivf: Optional[IVFIndex] = PrivateAttr(default=None)
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        if self.ann_index not in ANN_INDEXES:
+            raise ValueError(f"Unknown ANN index '{self.ann_index}', expected one of {ANN_INDEXES}")
+        self._lock = threading.RLock()
+        self._ids, self._ref_doc_ids, self._metadata, self._row_of = [], [], [], {}
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @property
+    def client(self) -> None:
+        return None
+
+    # --- Loading ---
+
+    @staticmethod
+    def exists(persist_dir: str) -> bool:
+        return os.path.exists(os.path.join(persist_dir, TABLE_NAME))
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str, **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(**kwargs)
+        store._open(persist_dir)
+        return store
+
+    @classmethod
+    def from_simple(cls, simple: SimpleVectorStore, **kwargs: Any) -> "NumpyVectorStore":
+        """Convert a loaded SimpleVectorStore (embeddings, ref doc ids and metadata as they are)."""
+        store = cls(**kwargs)
+        data = simple.data
+        ids = list(data.embedding_dict)
+        if ids:
+            store.add_vectors(ids, [data.embedding_dict[i] for i in ids],
+                              [data.text_id_to_ref_doc_id.get(i, "None") for i in ids],
+                              [(data.metadata_dict or {}).get(i, {}) for i in ids])
+        return store
+
+    def _open(self, persist_dir: str):
+        if not self.exists(persist_dir):
+            raise FileNotFoundError(f"No {TABLE_NAME} in {persist_dir}")
+        conn = sqlite3.connect(os.path.join(persist_dir, TABLE_NAME), check_same_thread=False)
+        info = dict(conn.execute("SELECT key, value FROM info").fetchall())
+        # An empty array cannot be mapped (and needs no mapping)
+        vectors = np.load(os.path.join(persist_dir, _vectors_name(info["generation"])),
+                          mmap_mode="r" if int(info["rows"]) else None)
+        if vectors.shape[0] != int(info["rows"]):
+            conn.close()
+            raise ValueError(f"{TABLE_NAME} lists {info['rows']} rows, the vectors file has {vectors.shape[0]}")
+
+        ivf = None
+        if self.ann_index == "ivf" and info.get("ann") == "ivf":
+            ivf = IVFIndex.load(os.path.join(persist_dir, _ivf_name(info["generation"])))
+
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+            self._conn = conn
+            self._ivf = ivf
+            self._vectors = vectors
+            self._size = vectors.shape[0]
+            self._alive = np.ones(self._size, dtype=bool)
+            self._dead = 0
+            self._ids = self._ref_doc_ids = self._metadata = self._row_of = None
+            self._persist_dir = persist_dir
+            self._dirty = False
+
+    def _columns(self):
+        """Load every row's id, ref doc id and metadata from the side table (once)."""
+        if self._ids is None:
+            rows = self._conn.execute("SELECT node_id, ref_doc_id, metadata FROM nodes ORDER BY row").fetchall()
+            self._ids = [r[0] for r in rows]
+            self._ref_doc_ids = [r[1] for r in rows]
+            self._metadata = [r[2] for r in rows]
+            self._row_of = {node_id: row for row, node_id in enumerate(self._ids)}
+
+    def _node_ids(self, rows: np.ndarray) -> List[str]:
+        if self._ids is not None:
+            return [self._ids[row] for row in rows]
+        wanted = [int(row) for row in rows]
+        found = dict(self._conn.execute(
+            f"SELECT row, node_id FROM nodes WHERE row IN ({','.join('?' * len(wanted))})", wanted))
+        return [found[row] for row in wanted]
+
+    # --- Writing ---
+
+    def _reserve(self, extra: int, dim: int):
+        """Make room for `extra` more rows in a writable buffer (copies the mapped rows the first time)."""
+        vectors = self._vectors
+        if self._size and vectors.shape[1] != dim:
+            raise ValueError(f"Embedding has {dim} dimensions, the store holds {vectors.shape[1]}")
+        needed = self._size + extra
+        if vectors is None or isinstance(vectors, np.memmap) or vectors.shape[0] < needed:
+            capacity = max(needed, int(1.5 * (vectors.shape[0] if vectors is not None else 0)), 64)
+            grown = np.empty((capacity, dim), dtype=np.float32)
+            alive = np.zeros(capacity, dtype=bool)
+            if vectors is not None:
+                grown[:self._size] = vectors[:self._size]
+                alive[:self._size] = self._alive[:self._size]
+            self._vectors, self._alive = grown, alive
+
+    def add_vectors(self, ids: List[str], vectors, ref_doc_ids: Optional[List[str]] = None,
+                    metadata: Optional[List[dict]] = None):
+        """Add embeddings without building nodes (conversion, benchmarks); add() goes through here."""
+        vectors = _unit_rows(vectors)
+        ref_doc_ids = ref_doc_ids or ["None"] * len(ids)
+        metadata = [json.dumps(m) for m in metadata] if metadata is not None else ["{}"] * len(ids)
+        with self._lock:
+            self._columns()
+            self._reserve(len(ids), vectors.shape[1])
+            for node_id in ids:
+                if node_id in self._row_of:  # re-added: the new vector replaces the old one
+                    self._kill(self._row_of.pop(node_id))
+            start = self._size
+            self._vectors[start:start + len(ids)] = vectors
+            self._alive[start:start + len(ids)] = True
+            for offset, node_id in enumerate(ids):
+                self._row_of[node_id] = start + offset
+            self._ids.extend(ids)
+            self._ref_doc_ids.extend(ref_doc_ids)
+            self._metadata.extend(metadata)
+            self._size += len(ids)
+            if self._ivf is not None:
+                self._ivf.add(np.arange(start, self._size), vectors)
+            self._dirty = True
+
+    def _kill(self, row: int):
+        if self._alive[row]:
+            self._alive[row] = False
+            self._dead += 1
+            self._dirty = True
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> List[str]:
+        if not nodes:
+            return []
+        metadata = []
+        for node in nodes:
+            meta = node_to_metadata_dict(node, remove_text=True, flat_metadata=False)
+            meta.pop("_node_content", None)
+            metadata.append(meta)
+        ids = [node.node_id for node in nodes]
+        self.add_vectors(ids, [node.get_embedding() for node in nodes],
+                         [node.ref_doc_id or "None" for node in nodes], metadata)
+        return ids
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        with self._lock:
+            self._columns()
+            for row, ref in enumerate(self._ref_doc_ids):
+                if ref == ref_doc_id and self._alive[row]:
+                    self._kill(row)
+                    self._row_of.pop(self._ids[row], None)
+
+    def delete_nodes(self, node_ids: Optional[List[str]] = None, filters: Optional[MetadataFilters] = None,
+                     **delete_kwargs: Any) -> None:
+        with self._lock:
+            for row in self._live_rows(node_ids, filters):
+                self._kill(row)
+                self._row_of.pop(self._ids[row], None)
+
+    def _live_rows(self, node_ids: Optional[List[str]], filters: Optional[MetadataFilters]) -> List[int]:
+        """Live rows of `node_ids` (all by default) that pass `filters`."""
+        self._columns()
+        rows = [self._row_of[i] for i in node_ids if i in self._row_of] if node_ids is not None \
+            else [row for row in range(self._size) if self._alive[row]]
+        if filters is not None:
+            keep = build_metadata_filter_fn(lambda row: json.loads(self._metadata[row]), filters)
+            rows = [row for row in rows if keep(row)]
+        return rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors, self._alive, self._size, self._dead, self._ivf = None, None, 0, 0, None
+            self._ids, self._ref_doc_ids, self._metadata, self._row_of = [], [], [], {}
+            self._dirty = True
+
+    def get(self, text_id: str) -> List[float]:
+        """The stored (normalised) embedding of a node."""
+        with self._lock:
+            self._columns()
+            return self._vectors[self._row_of[text_id]].tolist()
+
+    def get_nodes(self, node_ids: Optional[List[str]] = None,
+                  filters: Optional[MetadataFilters] = None) -> List[BaseNode]:
+        """
+        Nodes rebuilt from the side table: id, (normalised) embedding, metadata and
+        source document. No text: the store does not keep it (the docstore does).
+        """
+        with self._lock:
+            nodes = []
+            for row in self._live_rows(node_ids, filters):
+                metadata = json.loads(self._metadata[row])
+                for key in NODE_INFO_KEYS:
+                    metadata.pop(key, None)
+                ref_doc_id = self._ref_doc_ids[row]
+                relationships = {NodeRelationship.SOURCE: RelatedNodeInfo(node_id=ref_doc_id)} \
+                    if ref_doc_id != "None" else {}
+                nodes.append(TextNode(id_=self._ids[row], text="", embedding=self._vectors[row].tolist(),
+                                      metadata=metadata, relationships=relationships))
+            return nodes
+
+    @property
+    def ann_due(self) -> bool:
+        """ANN is on and the store is big enough for it, but no IVF index is built yet (persist() builds it)."""
+        return self.ann_index == "ivf" and self._ivf is None and self.count() >= max(self.ann_min_vectors, 1)
+
+    def count(self) -> int:
+        """Live vectors. (No __len__: StorageContext tests `if vector_store:` and would skip an empty one.)"""
+        return self._size - self._dead
+
+    def persist(self, persist_path: str, fs=None) -> None:
+        """
+        Write the live rows as a new generation next to `persist_path` (StorageContext passes
+        the JSON store's path; only its directory is used), then map it.
+        """
+        persist_dir = os.path.dirname(persist_path) or "."
+        with self._lock:
+            if not self._dirty and self._persist_dir == persist_dir and not self.ann_due:
+                return
+            os.makedirs(persist_dir, exist_ok=True)
+            self._columns()
+            live = np.flatnonzero(self._alive[:self._size]) if self._size else np.zeros(0, dtype=np.int64)
+            dim = self._vectors.shape[1] if self._vectors is not None else 0
+            ivf = self._layout_ivf(live)
+            if ivf is not None:
+                live = live[ivf.lay_out(ivf.cells_of(live))]
+
+            generation = uuid.uuid4().hex[:12]
+            vectors_path = os.path.join(persist_dir, _vectors_name(generation))
+            if len(live):
+                out = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(len(live), dim))
+                for i in range(0, len(live), WRITE_BLOCK_ROWS):
+                    out[i:i + WRITE_BLOCK_ROWS] = self._vectors[live[i:i + WRITE_BLOCK_ROWS]]
+                out.flush()
+                del out
+            else:
+                np.save(vectors_path, np.zeros((0, dim), dtype=np.float32))
+
+            table_path = os.path.join(persist_dir, TABLE_NAME)
+            tmp_path = table_path + ".tmp"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            conn = sqlite3.connect(tmp_path)
+            conn.execute("CREATE TABLE info (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            conn.execute("CREATE TABLE nodes (row INTEGER PRIMARY KEY, node_id TEXT NOT NULL UNIQUE, "
+                         "ref_doc_id TEXT NOT NULL, metadata TEXT NOT NULL)")
+            conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?)",
+                             ((new_row, self._ids[row], self._ref_doc_ids[row], self._metadata[row])
+                              for new_row, row in enumerate(live.tolist())))
+            info = [("generation", generation), ("rows", str(len(live))), ("dim", str(dim))]
+            if ivf is not None:
+                ivf.save(os.path.join(persist_dir, _ivf_name(generation)))
+                info.append(("ann", "ivf"))
+            conn.executemany("INSERT INTO info VALUES (?, ?)", info)
+            conn.commit()
+            conn.close()
+            os.replace(tmp_path, table_path)  # the switch to the new generation
+
+            current = (_vectors_name(generation), _ivf_name(generation))
+            for name in os.listdir(persist_dir):
+                if name.startswith(("vectors-", "ivf-")) and name.endswith((".npy", ".npz")) and name not in current:
+                    os.remove(os.path.join(persist_dir, name))
+            self._open(persist_dir)
+
+    def _layout_ivf(self, live: np.ndarray) -> Optional[IVFIndex]:
+        """
+        The IVF index to persist `live` with: None below ann_min_vectors, the current one
+        while it is still representative, else retrained (every row is then reassigned).
+        """
+        if self.ann_index != "ivf" or len(live) < max(self.ann_min_vectors, 1):
+            return None
+        ivf = self._ivf
+        if ivf is None or ivf.needs_retraining(len(live), self.ivf_nlist or None):
+            started = time.perf_counter()
+            ivf = IVFIndex.train(self._vectors, rows=live, nlist=self.ivf_nlist or None)
+            ivf.add(live, _RowView(self._vectors, live))
+            print(f"   [VectorStore] Trained IVF index: {ivf.nlist} cells over {len(live):,} vectors "
+                  f"in {time.perf_counter() - started:.1f}s")
+        return ivf
+
+    # --- Search ---
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.mode != VectorStoreQueryMode.DEFAULT:
+            raise ValueError(f"NumpyVectorStore supports only the default query mode, not {query.mode}")
+        with self._lock:
+            if not self.count() or not query.similarity_top_k:
+                return VectorStoreQueryResult(similarities=[], ids=[])
+            matrix = self._vectors[:self._size]
+            if len(query.query_embedding) != matrix.shape[1]:
+                raise ValueError(f"Query has {len(query.query_embedding)} dimensions, "
+                                 f"the store holds {matrix.shape[1]}")
+
+            unit_query = _unit_rows(query.query_embedding)[0]
+            if self._ivf is not None and query.node_ids is None and query.filters is None:
+                return self._ann_query(unit_query, query.similarity_top_k, kwargs.get("nprobe") or self.ivf_nprobe)
+
+            scores = matrix @ unit_query
+            candidates = self._candidates(query)
+            if candidates is not None:
+                scores = np.where(candidates, scores, -np.inf)
+                available = int(candidates.sum())
+            else:
+                available = self._size
+            k = min(query.similarity_top_k, available)
+            if k == 0:
+                return VectorStoreQueryResult(similarities=[], ids=[])
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return VectorStoreQueryResult(similarities=scores[top].tolist(), ids=self._node_ids(top))
+
+    def _ann_query(self, unit_query: np.ndarray, top_k: int, nprobe: int) -> VectorStoreQueryResult:
+        rows, scores = self._ivf.search(self._vectors, unit_query, nprobe)
+        if self._dead:
+            alive = self._alive[rows]
+            rows, scores = rows[alive], scores[alive]
+        k = min(top_k, len(rows))
+        if k == 0:
+            return VectorStoreQueryResult(similarities=[], ids=[])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return VectorStoreQueryResult(similarities=scores[top].tolist(), ids=self._node_ids(rows[top]))
+
+    def _candidates(self, query: VectorStoreQuery) -> Optional[np.ndarray]:
+        """Rows a query may return (None: all of them)."""
+        mask = self._alive[:self._size] if self._dead else None
+        if query.node_ids is not None:
+            self._columns()
+            allowed = np.zeros(self._size, dtype=bool)
+            allowed[[self._row_of[i] for i in query.node_ids if i in self._row_of]] = True
+            mask = allowed if mask is None else mask & allowed
+        if query.filters is not None:
+            self._columns()
+            keep = build_metadata_filter_fn(lambda row: json.loads(self._metadata[row]), query.filters)
+            rows = range(self._size) if mask is None else np.flatnonzero(mask)
+            allowed = np.zeros(self._size, dtype=bool)
+            allowed[[row for row in rows if keep(row)]] = True
+            mask = allowed
+        return mask
+
+
+# --- Wiring (utils/document_loader.py) ---
+
+def _backend() -> str:
+    if Config.VECTOR_STORE_BACKEND not in VECTOR_STORE_BACKENDS:
+        raise ValueError(f"Unknown vector store backend '{Config.VECTOR_STORE_BACKEND}', "
+                         f"expected one of {VECTOR_STORE_BACKENDS}")
+    return Config.VECTOR_STORE_BACKEND
+
+
+def new_vector_store() -> Optional[BasePydanticVectorStore]:
+    """Empty store of the configured backend (None: LlamaIndex's default SimpleVectorStore)."""
+    return NumpyVectorStore() if _backend() == "numpy" else None
+
+
+def load_vector_store(persist_dir: str) -> Optional[BasePydanticVectorStore]:
+    """
+    The persisted store of the configured backend (None: let StorageContext load its JSON).
+    A store persisted as JSON is converted once, keeping its embeddings; a store large
+    enough for a missing IVF index gets one.
+    """
+    if _backend() != "numpy":
+        return None
+    simple_path = os.path.join(persist_dir, SIMPLE_STORE_NAME)
+    if not NumpyVectorStore.exists(persist_dir) and os.path.exists(simple_path):
+        print(f"   [VectorStore] Converting {simple_path} to {TABLE_NAME} + .npy")
+        store = NumpyVectorStore.from_simple(SimpleVectorStore.from_persist_path(simple_path))
+        store.persist(simple_path)
+        return store
+    store = NumpyVectorStore.from_persist_dir(persist_dir)
+    if store.ann_due:  # ANN_INDEX was switched on for an existing store
+        store.persist(simple_path)
+    return store
+
+
+if __name__ == "__main__":
+    store = load_vector_store(Config.VECTOR_STORE_DIR)
+    if store is None:
+        print(f"VECTOR_STORE_BACKEND is '{Config.VECTOR_STORE_BACKEND}', nothing to convert.")
+    else:
+        store.persist(os.path.join(Config.VECTOR_STORE_DIR, SIMPLE_STORE_NAME))  # builds the IVF index if due
+        ann = f"IVF, {store._ivf.nlist} cells" if store._ivf is not None else "exact search"
+        print(f"{store.count()} vectors in {Config.VECTOR_STORE_DIR} ({ann})")